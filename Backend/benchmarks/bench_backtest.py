@@ -0,0 +1,62 @@
+"""
+Throughput of the backtest engine (services/backtest.py) on synthetic
+candles, single process and across a process pool.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_backtest --bars 200000 --symbols 8 --workers 1 2 4
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from services.backtest import param_grid, run_symbol_sweep
+
+FEE_RATE = 0.001  # TRADING_FEE_RATE in trading_config.py
+
+
+def make_tasks(symbols: int, bars: int, strategy: str):
+    combos = list(param_grid(strategy, {}))
+    rng = np.random.default_rng(3)
+    tasks = []
+    for i in range(symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        tasks.append({
+            "symbol": f"SYM{i}",
+            "strategy": strategy,
+            "combos": combos,
+            "open": open_,
+            "close": close,
+            "fee_rate": FEE_RATE,
+            "bars_per_year": 525600,
+        })
+    return tasks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=200000)
+    parser.add_argument("--symbols", type=int, default=8)
+    parser.add_argument("--strategy", default="ma_crossover")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.symbols, args.bars, args.strategy)
+    combos = len(tasks[0]["combos"])
+    print(f"{args.symbols} symbols x {args.bars} bars x {combos} combinations ({args.strategy})")
+
+    for workers in args.workers:
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            sweeps = list(pool.map(run_symbol_sweep, tasks))
+        wall = time.perf_counter() - started
+        cpu = sum(s["cpu_seconds"] for s in sweeps)
+        bars = sum(s["bars"] * s["simulations"] for s in sweeps)
+        print(f"  {workers} workers: {wall:6.2f}s wall  {bars / cpu / 1e6:6.1f}M bars/s per core  "
+              f"{bars / wall / 1e6:6.1f}M bars/s total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Delivery latency of the /ws/prices fan-out with many simulated clients,
+a share of which are deliberately slow.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_broadcaster --clients 1000 --slow 50
+    python -m benchmarks.bench_broadcaster --topics 300 --sequential-ticks 0
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from services.price_broadcaster import PriceBroadcaster, percentile
+
+
+class FakeWebSocket:
+    def __init__(self, name, send_delay, published_at, latencies):
+        self.client = name
+        self.send_delay = send_delay
+        self.published_at = published_at
+        self.latencies = latencies
+
+    async def send_text(self, frame):
+        await asyncio.sleep(self.send_delay)
+        self.latencies.append(time.perf_counter() - self.published_at[frame])
+
+    async def close(self, code=1000):
+        pass
+
+
+def make_payload(seq, symbols=1):
+    return {"e": "24hrTicker", "E": seq, "s": f"SYM{seq % symbols}USDT", "c": "65000.00", "P": "1.25"}
+
+
+async def run_sequential(sockets, ticks, tick_interval, published_at):
+    """
+    The previous behaviour: await each client in turn on every tick.
+    Latency is measured from when the tick was due upstream, since a slow
+    client also delays reading the next upstream frame.
+    """
+    started = time.perf_counter()
+    for seq in range(ticks):
+        frame = json.dumps(make_payload(seq))
+        published_at[frame] = started + seq * tick_interval
+        for ws in sockets:
+            await ws.send_text(frame)
+        await asyncio.sleep(max(0, started + (seq + 1) * tick_interval - time.perf_counter()))
+
+
+async def run_broadcaster(sockets, ticks, tick_interval, published_at, queue_size, send_timeout, topics=0):
+    engine = PriceBroadcaster(queue_size=queue_size, send_timeout=send_timeout)
+    for i, ws in enumerate(sockets):
+        engine.register(ws)
+        if topics:
+            engine.subscribe(ws, [f"SYM{i % topics}USDT"])
+    started = time.perf_counter()
+    for seq in range(ticks):
+        payload = make_payload(seq, topics or 1)
+        frame = json.dumps(payload)
+        published_at[frame] = started + seq * tick_interval
+        engine.publish_frame(frame, payload["s"])
+        await asyncio.sleep(max(0, started + (seq + 1) * tick_interval - time.perf_counter()))
+    # Let the queues drain
+    while any(not conn.queue.empty() for conn in engine.connections.values()):
+        await asyncio.sleep(0.01)
+    for ws in list(engine.connections):
+        await engine.unregister(ws)
+    return engine
+
+
+def build_clients(n_fast, n_slow, slow_delay, published_at):
+    fast_latencies, slow_latencies = [], []
+    sockets = [FakeWebSocket(f"fast-{i}", 0, published_at, fast_latencies) for i in range(n_fast)]
+    sockets += [FakeWebSocket(f"slow-{i}", slow_delay, published_at, slow_latencies) for i in range(n_slow)]
+    return sockets, fast_latencies
+
+
+def report(label, latencies, elapsed, extra=""):
+    p50 = percentile(latencies, 50) or 0
+    p99 = percentile(latencies, 99) or 0
+    print(
+        f"{label:<14} frames={len(latencies):>8}  p50={p50 * 1000:8.2f} ms  "
+        f"p99={p99 * 1000:8.2f} ms  wall={elapsed:6.2f}s {extra}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--slow", type=int, default=50)
+    parser.add_argument("--slow-delay", type=float, default=0.05)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--tick-interval", type=float, default=0.02)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--send-timeout", type=float, default=1.0)
+    parser.add_argument("--topics", type=int, default=0,
+                        help="stream this many symbols and subscribe each client to one of them")
+    parser.add_argument("--sequential-ticks", type=int, default=10,
+                        help="ticks for the sequential baseline, which is much slower")
+    args = parser.parse_args()
+
+    print(
+        f"{args.clients} fast + {args.slow} slow clients ({args.slow_delay * 1000:.0f} ms/send), "
+        f"{args.ticks} ticks every {args.tick_interval * 1000:.0f} ms"
+    )
+
+    if args.sequential_ticks:
+        published_at = {}
+        sockets, fast_latencies = build_clients(args.clients, args.slow, args.slow_delay, published_at)
+        started = time.perf_counter()
+        await run_sequential(sockets, args.sequential_ticks, args.tick_interval, published_at)
+        report("sequential", fast_latencies, time.perf_counter() - started)
+
+    published_at = {}
+    sockets, fast_latencies = build_clients(args.clients, args.slow, args.slow_delay, published_at)
+    started = time.perf_counter()
+    engine = await run_broadcaster(
+        sockets, args.ticks, args.tick_interval, published_at, args.queue_size, args.send_timeout, args.topics
+    )
+    label = f"topics={args.topics}" if args.topics else "broadcaster"
+    report(label, fast_latencies, time.perf_counter() - started, f"evicted={engine.evicted}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
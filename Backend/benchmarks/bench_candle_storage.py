@@ -0,0 +1,164 @@
+"""
+Read latency and storage size of the two candle layouts: one Candle
+document per bar versus CandleBucket documents with packed arrays.
+
+Writes synthetic 1m bars into a scratch database (dropped afterwards
+unless --keep), then times range reads through:
+    beanie     the previous /candles path (Candle models, then floats)
+    documents  DocumentCandleStore (raw cursor with projection)
+    buckets    BucketCandleStore
+    archive    TieredCandleStore over the memory-mapped disk archive
+
+Run from the Backend directory (needs MongoDB at MONGO_URI):
+    python -m benchmarks.bench_candle_storage --days 90 --symbols 2
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from models import Candle, CandleBucket
+from services.candle_series import INTERVAL_MS, from_ms
+from services.candle_archive import CandleArchive, TieredCandleStore
+from services.candle_store import BucketCandleStore, DocumentCandleStore
+
+DAY_MS = 24 * 60 * 60 * 1000
+WRITE_BATCH = 20000
+
+
+def synthetic_bars(symbol: str, start_ms: int, count: int):
+    price = 100.0
+    for i in range(count):
+        open_ = price
+        price = max(1.0, price * (1 + random.gauss(0, 0.001)))
+        high = max(open_, price) * (1 + random.random() * 0.0005)
+        low = min(open_, price) * (1 - random.random() * 0.0005)
+        yield (symbol, "1m", {
+            "t": start_ms + i * INTERVAL_MS["1m"],
+            "o": f"{open_:.2f}",
+            "h": f"{high:.2f}",
+            "l": f"{low:.2f}",
+            "c": f"{price:.2f}",
+            "v": f"{random.random() * 50:.4f}",
+        })
+
+
+async def load(store, rows):
+    for i in range(0, len(rows), WRITE_BATCH):
+        await store.upsert_bars(rows[i:i + WRITE_BATCH])
+
+
+async def read_beanie(symbol, interval, start_ms, end_ms):
+    candles = await Candle.find({
+        "symbol": symbol,
+        "interval": interval,
+        "candle_time": {"$gte": from_ms(start_ms), "$lte": from_ms(end_ms)},
+    }).sort("candle_time").to_list()
+    return [
+        {
+            "time": c.candle_time,
+            "open": float(c.open),
+            "high": float(c.high),
+            "low": float(c.low),
+            "close": float(c.close),
+            "volume": float(c.volume),
+        }
+        for c in candles
+    ]
+
+
+async def time_reads(read, symbol, start_ms, end_ms, repeats):
+    samples = []
+    bars = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = await read(symbol, "1m", start_ms, end_ms)
+        samples.append(time.perf_counter() - started)
+        bars = len(result)
+    return statistics.median(samples), bars
+
+
+async def collection_size(db, name):
+    try:
+        stats = await db.command("collStats", name)
+    except Exception:
+        return None
+    return {
+        "documents": stats.get("count"),
+        "data_mb": round(stats.get("size", 0) / 1e6, 2),
+        "storage_mb": round(stats.get("storageSize", 0) / 1e6, 2),
+        "index_mb": round(stats.get("totalIndexSize", 0) / 1e6, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="candle_storage_bench")
+    parser.add_argument("--symbols", type=int, default=2)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongo_uri)
+    db = client[args.database]
+    await client.drop_database(args.database)
+    await init_beanie(database=db, document_models=[Candle, CandleBucket])
+
+    documents, buckets = DocumentCandleStore(), BucketCandleStore()
+    end_ms = int(time.time() * 1000) // DAY_MS * DAY_MS
+    start_ms = end_ms - args.days * DAY_MS
+    symbols = [f"SYM{i}USDT" for i in range(args.symbols)]
+
+    for symbol in symbols:
+        rows = list(synthetic_bars(symbol, start_ms, args.days * 1440))
+        started = time.perf_counter()
+        await load(documents, rows)
+        doc_write = time.perf_counter() - started
+        started = time.perf_counter()
+        await load(buckets, rows)
+        bucket_write = time.perf_counter() - started
+        print(f"{symbol}: wrote {len(rows)} bars  documents {doc_write:.1f}s  buckets {bucket_write:.1f}s")
+
+    archive_dir = tempfile.mkdtemp(prefix="candle_archive_bench_")
+    archive = CandleArchive(archive_dir)
+    archive.append(await documents.read(symbols[0], "1m", start_ms, end_ms))
+
+    print("\nStorage")
+    for name in ("candles", "candle_buckets"):
+        print(f"  {name:15} {await collection_size(db, name)}")
+    print(f"  {'archive':15} {archive.stats()}")
+
+    readers = {
+        "beanie": read_beanie,
+        "documents": documents.read,
+        "buckets": buckets.read,
+        "archive": TieredCandleStore(documents, archive).read,
+    }
+    print(f"\nRead latency (median of {args.repeats}, {symbols[0]})")
+    for days in sorted({1, 7, 30, args.days}):
+        if days > args.days:
+            continue
+        window_start = end_ms - days * DAY_MS
+        line = [f"  {days:>4}d"]
+        for name, read in readers.items():
+            latency, bars = await time_reads(read, symbols[0], window_start, end_ms - 1, args.repeats)
+            line.append(f"{name} {latency * 1000:8.1f}ms")
+        print(f"{'  '.join(line)}  ({bars} bars)")
+
+    shutil.rmtree(archive_dir)
+    if not args.keep:
+        await client.drop_database(args.database)
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,155 @@
+"""
+Vectorized indicators (services/indicators.py) against a naive per-bar
+Python loop, plus the cost of stepping one newly closed bar incrementally.
+Also checks that all three agree.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_indicators --bars 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from services.candle_series import CandleSeries
+from services.indicators import parse_spec, IndicatorEngine
+
+SPEC = "sma:20,ema:50,rsi:14,macd:12:26:9,bb:20:2,atr:14"
+
+
+def naive_sma(close, period):
+    out = []
+    for i in range(len(close)):
+        out.append(sum(close[i - period + 1:i + 1]) / period if i >= period - 1 else None)
+    return out
+
+
+def naive_ema(close, period, alpha=None):
+    alpha = 2 / (period + 1) if alpha is None else alpha
+    out, value = [], None
+    for i, x in enumerate(close):
+        if i == period - 1:
+            value = sum(close[:period]) / period
+        elif i >= period:
+            value = alpha * x + (1 - alpha) * value
+        out.append(value)
+    return out
+
+
+def naive_rsi(close, period):
+    gains = [max(close[i] - close[i - 1], 0) for i in range(1, len(close))]
+    losses = [max(close[i - 1] - close[i], 0) for i in range(1, len(close))]
+    avg_gain = naive_ema(gains, period, 1 / period)
+    avg_loss = naive_ema(losses, period, 1 / period)
+    out = [None]
+    for g, l in zip(avg_gain, avg_loss):
+        out.append(None if g is None else (100.0 if l == 0 else 100 - 100 / (1 + g / l)))
+    return out
+
+
+def naive_macd(close, fast, slow, signal):
+    fast_ema, slow_ema = naive_ema(close, fast), naive_ema(close, slow)
+    line = [None if f is None or s is None else f - s for f, s in zip(fast_ema, slow_ema)]
+    first = max(fast, slow) - 1
+    sig = [None] * first + naive_ema(line[first:], signal)
+    return line, sig, [None if s is None else l - s for l, s in zip(line, sig)]
+
+
+def naive_bollinger(close, period, k):
+    mid, upper, lower = [], [], []
+    for i in range(len(close)):
+        if i < period - 1:
+            mid.append(None), upper.append(None), lower.append(None)
+            continue
+        window = close[i - period + 1:i + 1]
+        mean = sum(window) / period
+        std = (sum((x - mean) ** 2 for x in window) / period) ** 0.5
+        mid.append(mean), upper.append(mean + k * std), lower.append(mean - k * std)
+    return mid, upper, lower
+
+
+def naive_atr(high, low, close, period):
+    tr = [high[0] - low[0]] + [
+        max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        for i in range(1, len(close))
+    ]
+    return naive_ema(tr, period, 1 / period)
+
+
+def run_naive(series):
+    close, high, low = series.close.tolist(), series.high.tolist(), series.low.tolist()
+    return {
+        "sma_20": [naive_sma(close, 20)],
+        "ema_50": [naive_ema(close, 50)],
+        "rsi_14": [naive_rsi(close, 14)],
+        "macd_12_26_9": list(naive_macd(close, 12, 26, 9)),
+        "bb_20_2": list(naive_bollinger(close, 20, 2)),
+        "atr_14": [naive_atr(high, low, close, 14)],
+    }
+
+
+def max_diff(a, b):
+    a = np.asarray(a, dtype=np.float64)
+    b = np.array([np.nan if v is None else v for v in b], dtype=np.float64) if isinstance(b, list) else b
+    if not np.array_equal(np.isnan(a), np.isnan(b)):
+        return float("inf")
+    mask = ~np.isnan(a)
+    return float(np.max(np.abs(a[mask] - b[mask]) / np.maximum(1.0, np.abs(b[mask])))) if mask.any() else 0.0
+
+
+def random_walk(bars, interval_ms=60_000):
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.001, bars)) * close
+    high, low = np.maximum(open_, close) + spread, np.minimum(open_, close) - spread
+    time_ms = np.arange(bars, dtype=np.int64) * interval_ms
+    return CandleSeries("BENCH", "1m", time_ms, open_, high, low, close, rng.random(bars) * 10)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=100000)
+    parser.add_argument("--steps", type=int, default=1000, help="bars closed one at a time for the incremental test")
+    args = parser.parse_args()
+
+    series = random_walk(args.bars + args.steps)
+    history = series.take(slice(0, args.bars))
+    indicators = parse_spec(SPEC)
+    print(f"{args.bars} bars, indicators: {SPEC}")
+
+    started = time.perf_counter()
+    naive = run_naive(history)
+    naive_time = time.perf_counter() - started
+
+    engine = IndicatorEngine()
+    now_ms = int(history.time[-1]) + 120_000
+    started = time.perf_counter()
+    full = engine.compute("BENCH", "1m", indicators, history, now_ms)
+    numpy_time = time.perf_counter() - started
+
+    print(f"  naive loop   {naive_time * 1000:10.1f} ms")
+    print(f"  numpy        {numpy_time * 1000:10.1f} ms   ({naive_time / numpy_time:.0f}x faster)")
+
+    worst = max(max_diff(full["values"][key][i], column)
+                for key, columns in naive.items() for i, column in enumerate(columns))
+    print(f"  max relative difference numpy vs naive: {worst:.2e}")
+
+    # Close one bar at a time: each request only steps the new bar
+    started = time.perf_counter()
+    for i in range(args.steps):
+        window = series.take(slice(i + 1, args.bars + i + 1))
+        latest = engine.compute("BENCH", "1m", indicators, window, int(window.time[-1]) + 120_000)
+    step_time = (time.perf_counter() - started) / args.steps
+    print(f"  incremental  {step_time * 1000:10.3f} ms per closed bar (incl. slicing the response)")
+
+    expected = IndicatorEngine().compute("BENCH", "1m", indicators, series.take(slice(0, args.bars + args.steps)),
+                                         int(series.time[-1]) + 120_000)
+    drift = max(max_diff(latest["values"][key][i], expected["values"][key][i][-len(latest["time"]):])
+                for key in expected["values"] for i in range(len(expected["values"][key])))
+    print(f"  max relative difference incremental vs full recompute: {drift:.2e}")
+    print(f"  engine: {engine.stats()}")
+
+
+if __name__ == "__main__":
+    main()
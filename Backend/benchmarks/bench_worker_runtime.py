@@ -0,0 +1,139 @@
+"""
+Trades per second through a Dramatiq-style worker, before and after the
+persistent worker runtime:
+    before  asyncio.run() per message, init_beanie on every message
+    after   one event loop thread per process (Dramatiq's EventLoopThread),
+            init_beanie once at boot, messages submitted to the loop
+
+Each simulated trade does the database work of process_trade_task (user
+lookup, Order, Transaction, user update, CreditsHistory) against a scratch
+database, with the exchange call left out. Worker threads pull messages
+concurrently, as Dramatiq's do.
+
+Run from the Backend directory (needs MongoDB at MONGO_URI):
+    python -m benchmarks.bench_worker_runtime --trades 500 --threads 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from beanie import init_beanie
+from dramatiq.asyncio import EventLoopThread
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from models import (
+    User, CryptoPair, Candle, Order, Transaction, Portfolio, Cart, CreditsHistory,
+    Cache, Transfer, CandleSyncTracker, CandleBucket, TransactionTypeEnum, CreditReasonEnum
+)
+
+DOCUMENT_MODELS = [
+    User, CryptoPair, Candle, Order, Transaction, Portfolio,
+    Cart, CreditsHistory, Cache, Transfer, CandleSyncTracker, CandleBucket
+]
+
+
+async def simulated_trade(user_id):
+    now = datetime.now(timezone.utc)
+    user = await User.get(user_id)
+    order = Order(user=str(user_id), symbol="BTCUSDT", side="BUY", order_type="MARKET",
+                  quantity=Decimal("0.001"), price=Decimal("50000"), status="FILLED",
+                  created_at=now, executed_at=now)
+    await order.save()
+    txn = Transaction(user=str(user_id), order=order.id, symbol="BTCUSDT",
+                      transaction_type=TransactionTypeEnum.buy, quantity=Decimal("0.001"),
+                      price=Decimal("50000"), total_amount=Decimal("50"), created_at=now)
+    await txn.save()
+    user.credits -= Decimal("50.05")
+    user.updated_at = now
+    await user.save()
+    await CreditsHistory(user=user, change_amount=Decimal("-50.05"), reason=CreditReasonEnum.trade,
+                         balance_after=user.credits, metadata={"symbol": "BTCUSDT"}).save()
+
+
+def run_threads(handle, trades: int, threads: int):
+    """
+    Returns (seconds, failed trades).
+    """
+    def safe(_):
+        try:
+            handle()
+            return 0
+        except Exception:
+            # Concurrent init_beanie calls swap collections under
+            # messages in flight on other threads
+            return 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        failed = sum(pool.map(safe, range(trades)))
+    return time.perf_counter() - started, failed
+
+
+async def create_user(db_name, client):
+    await init_beanie(database=client[db_name], document_models=DOCUMENT_MODELS)
+    user = User(username="bench", password_hash="x", credits=Decimal("1000000"))
+    await user.insert()
+    return user.id
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="worker_runtime_bench")
+    parser.add_argument("--trades", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8, help="Dramatiq worker threads")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongo_uri)
+    asyncio.run(client.drop_database(args.database))
+    user_id = asyncio.run(create_user(args.database, client))
+
+    # Before: a new loop per message, Beanie re-initialized every time
+    def handle_before():
+        async def message():
+            await init_beanie(database=client[args.database], document_models=DOCUMENT_MODELS)
+            await simulated_trade(user_id)
+        asyncio.run(message())
+
+    results = {}
+
+    def measure(name, handle):
+        run_threads(handle, min(20, args.trades), args.threads)  # warm up
+        elapsed, failed = run_threads(handle, args.trades, args.threads)
+        results[name] = (args.trades - failed) / elapsed
+        print(f"  {name:6}  {args.trades} trades  {elapsed:6.2f}s  {results[name]:8.1f} trades/s  "
+              f"{elapsed / args.trades * 1000:6.2f} ms/trade  {failed} failed  ({args.threads} threads)")
+
+    measure("before", handle_before)
+
+    # After: one loop thread per process, Beanie initialized once at boot
+    loop_thread = EventLoopThread(logging.getLogger("bench"))
+    loop_thread.start(timeout=1.0)
+    loop_client = {}
+
+    async def boot():
+        loop_client["client"] = AsyncIOMotorClient(args.mongo_uri)
+        await init_beanie(database=loop_client["client"][args.database], document_models=DOCUMENT_MODELS)
+
+    boot_started = time.perf_counter()
+    loop_thread.run_coroutine(boot())
+    boot_seconds = time.perf_counter() - boot_started
+
+    def handle_after():
+        loop_thread.run_coroutine(simulated_trade(user_id))
+
+    measure("after", handle_after)
+    print(f"  one-time boot {boot_seconds * 1000:.1f} ms, speedup {results['after'] / results['before']:.1f}x")
+
+    loop_thread.run_coroutine(loop_client["client"].drop_database(args.database))
+    loop_thread.stop()
+    loop_thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-from binance.client import Client
 from dotenv import load_dotenv
 import os
 
@@ -9,7 +8,8 @@ load_dotenv()
 BINANCE_API_KEY = os.getenv("BINANCE_API_KEY")
 BINANCE_SECRET_KEY = os.getenv("BINANCE_SECRET_KEY")
 
-# Initialize Binance client
-client = Client(api_key=BINANCE_API_KEY, api_secret=BINANCE_SECRET_KEY, testnet=True)
-client.API_URL = "https://testnet.binance.vision/api"
-
+# REST base URLs: orders, balances and klines go to the testnet, the
+# symbol sync reads exchange info from the live API. Point either at a
+# local stand-in (tools/fake_binance_rest.py) for tests.
+BINANCE_API_URL = os.getenv("BINANCE_API_URL", "https://testnet.binance.vision")
+BINANCE_MARKET_DATA_URL = os.getenv("BINANCE_MARKET_DATA_URL", "https://api.binance.com")
@@ -1,6 +1,14 @@
 # broker.py
 import dramatiq
 from dramatiq.brokers.redis import RedisBroker
+from dramatiq.middleware.asyncio import AsyncIO
+from services.worker_runtime import WorkerDatabase, WorkerExchange
 
 redis_broker = RedisBroker(url="redis://localhost:6379/0")
+# One long-lived event loop per worker process for async actors, with the
+# database initialized on it once at boot and the exchange sessions
+# closed on it at shutdown
+redis_broker.add_middleware(AsyncIO())
+redis_broker.add_middleware(WorkerDatabase())
+redis_broker.add_middleware(WorkerExchange())
 dramatiq.set_broker(redis_broker)
@@ -1,19 +1,18 @@
+from services.candle_store import read_candles
 
-from models import Candle
+# The chatbot answers questions about a day, so it reads daily bars
+CONTEXT_INTERVAL = "1d"
 
 async def get_candlestick_context(symbol, start_date, end_date):
-    query = {"symbol": symbol}
-    query["candle_time"] = {"$gte": start_date, "$lte": end_date}
+    series = await read_candles(symbol, CONTEXT_INTERVAL, start_date, end_date)
 
-    candles = await Candle.find(query).sort("candle_time").to_list()
-
-    if not candles:
+    if not len(series):
         return None
 
     lines = []
-    for c in candles:
+    for c in series.to_records():
         lines.append(
-            f"Symbol: {c.symbol}, Date: {c.candle_time.strftime('%Y-%m-%d')} - Open: {c.open}, High: {c.high}, Low: {c.low}, Close: {c.close}, Volume: {c.volume}"
+            f"Symbol: {c['symbol']}, Date: {c['time'].strftime('%Y-%m-%d')} - Open: {c['open']}, High: {c['high']}, Low: {c['low']}, Close: {c['close']}, Volume: {c['volume']}"
         )
 
     return "\n".join(lines)
@@ -7,10 +7,17 @@ from dotenv import load_dotenv
 import asyncio
 from fastapi.security import OAuth2PasswordBearer
 from auth import decode_access_token
-from models import User, CryptoPair, Candle, Order, Transaction, Portfolio, Cart, CreditsHistory, Cache, Transfer, CandleSyncTracker
+from models import User, CryptoPair, Candle, Order, Transaction, Portfolio, Cart, CreditsHistory, Cache, Transfer, CandleSyncTracker, CandleBucket
 from services.real_time_price import binance_stream  # ✅ import here
+from services.ticker_cache import ticker_table
+from services.price_writer import price_writer
+from services.candle_builder import candle_builder
+from services.backtest_jobs import shutdown_executor
+from services.symbol_registry import symbol_registry
+from services.exchange_gateway import close_gateways
+from services.feed_recorder import feed_recorder
 from beanie import PydanticObjectId
-from scheduler import cron_historical_job, cron_settle_limit_orders
+from scheduler import cron_historical_job, cron_settle_limit_orders, cron_archive_candles
 import json
 from services.session_store import get_session
 # from chatbot.symbol_extractor import load_symbols_from_db
@@ -27,19 +34,34 @@ async def lifespan(app: FastAPI):
 
     await init_beanie(
         database=db,
-        document_models=[User, CryptoPair, Candle, Order, Transaction, Portfolio, Cart, CreditsHistory, Cache, Transfer, CandleSyncTracker]
+        document_models=[User, CryptoPair, Candle, Order, Transaction, Portfolio, Cart, CreditsHistory, Cache, Transfer, CandleSyncTracker, CandleBucket]
     )
 
     # await load_symbols_from_db()
+    registry_task = asyncio.create_task(symbol_registry.run())
     binance_task = asyncio.create_task(binance_stream())
+    ticker_sync_task = asyncio.create_task(ticker_table.run_redis_sync())
+    price_writer_task = asyncio.create_task(price_writer.run())
+    candle_builder_task = asyncio.create_task(candle_builder.run())
     candle_cron_task = asyncio.create_task(cron_historical_job())
     settle_cron_task = asyncio.create_task(cron_settle_limit_orders())
+    archive_cron_task = asyncio.create_task(cron_archive_candles())
 
     yield
 
     binance_task.cancel()
+    if feed_recorder is not None:
+        # Flush the tail of the recording
+        feed_recorder.close()
+    ticker_sync_task.cancel()
+    price_writer_task.cancel()
+    candle_builder_task.cancel()
     candle_cron_task.cancel()
     settle_cron_task.cancel() 
+    archive_cron_task.cancel()
+    registry_task.cancel()
+    shutdown_executor()
+    await close_gateways()
     client.close()
 
 
@@ -66,9 +88,16 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
 from typing import Optional, Any
 
 client: Any = None
+_worker_db_ready = False
 
 async def init_db_for_worker():
-    global client
+    """
+    Connects and initializes Beanie once per process; later calls are
+    no-ops. Call it from the loop the process keeps for database work.
+    """
+    global client, _worker_db_ready
+    if _worker_db_ready:
+        return
     if not client:
         client = AsyncIOMotorClient(mongo_uri)
 
@@ -78,6 +107,7 @@ async def init_db_for_worker():
         database=db,
         document_models=[
             User, CryptoPair, Candle, Order, Transaction, Portfolio,
-            Cart, CreditsHistory, Cache, Transfer, CandleSyncTracker
+            Cart, CreditsHistory, Cache, Transfer, CandleSyncTracker, CandleBucket
         ]
-    )
\ No newline at end of file
+    )
+    _worker_db_ready = True
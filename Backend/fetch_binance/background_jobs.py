@@ -1,6 +1,6 @@
 from models import Order, User, Transaction, CreditsHistory, TransactionTypeEnum
 from services.portfolio import update_or_create_portfolio, update_portfolio_on_sell
-from binance_config import client
+from services.exchange_gateway import exchange_gateway
 from fastapi import Request
 from datetime import datetime, timezone
 from decimal import Decimal
@@ -23,7 +23,7 @@ async def settle_filled_limit_orders():
         try:
             await order.fetch_link(Order.user)
             user = order.user
-            binance_order = client.get_order(
+            binance_order = await exchange_gateway.get_order(
                 symbol=order.symbol,
                 orderId=order.order_id
             )
@@ -0,0 +1,192 @@
+from models import CryptoPair
+from fetch_binance.fetch_ohlc import fetch_kline_range, KLINE_PAGE_LIMIT, KLINE_SYNC_CONCURRENCY
+from services.candle_store import candle_store, get_coverage, upsert_candles
+from services.candle_archive import candle_archive, CANDLE_ARCHIVE
+from services.candle_series import INTERVAL_MS, bar_grid, bucket_keys, to_ms, from_ms
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import asyncio
+import time
+
+# Progress of the current (or last) backfill run
+backfill_progress = {}
+
+
+def missing_runs(times, grid):
+    """
+    Runs of consecutive expected bars that are not stored, as
+    (first index, last index) pairs into `grid`.
+    """
+    missing = np.flatnonzero(~np.isin(grid, times, assume_unique=True))
+    if not len(missing):
+        return []
+    breaks = np.flatnonzero(np.diff(missing) > 1)
+    starts = np.concatenate(([missing[0]], missing[breaks + 1]))
+    ends = np.concatenate((missing[breaks], [missing[-1]]))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def plan_windows(runs, page_limit: int = KLINE_PAGE_LIMIT):
+    """
+    Coalesces gap runs into fetch windows. Neighbouring runs share a
+    window when the whole span, stored bars in between included, still
+    fits in one klines page; longer runs keep their own window and are
+    paged through.
+    """
+    windows = []
+    for first, last in runs:
+        if windows and last - windows[-1][0] < page_limit:
+            windows[-1][1] = last
+        else:
+            windows.append([first, last])
+    return windows
+
+
+def window_requests(windows, page_limit: int = KLINE_PAGE_LIMIT) -> int:
+    return sum(-(-(last - first + 1) // page_limit) for first, last in windows)
+
+
+async def scan_symbol(symbol: str, interval: str, start_ms: int, end_ms: int) -> dict:
+    """
+    Compares stored bar times with the expected bar grid for one symbol.
+    The grid starts at the earliest stored bar when that is later than
+    start_ms, so bars from before a pair was listed are not gaps. Gaps
+    inside the archive cannot be refilled and are left out of the plan.
+    """
+    coverage = await get_coverage(symbol)
+    first_stored = coverage.get(interval)
+    if first_stored is not None:
+        start_ms = max(start_ms, first_stored)
+    grid = bar_grid(interval, start_ms, end_ms)
+    times = await candle_store.times(symbol, interval, start_ms, end_ms)
+
+    runs = missing_runs(times, grid) if first_stored is not None else ([(0, len(grid) - 1)] if len(grid) else [])
+    if CANDLE_ARCHIVE:
+        cold = candle_archive.series(symbol, interval)
+        if cold is not None and len(cold):
+            archived = int(np.searchsorted(grid, int(cold.time[-1]), side="right"))
+            runs = [(max(first, archived), last) for first, last in runs if last >= archived]
+    windows = plan_windows(runs)
+    missing = sum(last - first + 1 for first, last in runs)
+    return {
+        "symbol": symbol,
+        "expected": len(grid),
+        "stored": len(grid) - missing,
+        "missing": missing,
+        "coverage": round(1 - missing / len(grid), 6) if len(grid) else None,
+        "gaps": [[from_ms(int(grid[first])), from_ms(int(grid[last]))] for first, last in runs],
+        "windows": [[int(grid[first]), int(grid[last])] for first, last in windows],
+        "requests": window_requests(windows),
+    }
+
+
+def closed_range(interval: str, days_back: int, now: datetime):
+    """
+    [start_ms, end_ms] covering the closed bars of the last `days_back`
+    days; the bar still forming is left to the regular sync.
+    """
+    now_ms = to_ms(now)
+    forming = int(bucket_keys(np.array([now_ms], dtype=np.int64), interval)[0])
+    return to_ms(now - timedelta(days=days_back)), forming - 1
+
+
+async def gap_report(interval: str = "1d", days_back: int = 30, limit: int = 100) -> dict:
+    """
+    Coverage of every CryptoPair over the window, worst first.
+    """
+    pairs = await CryptoPair.find_all().to_list()
+    started = time.monotonic()
+    start_ms, end_ms = closed_range(interval, days_back, datetime.now(timezone.utc))
+    semaphore = asyncio.Semaphore(KLINE_SYNC_CONCURRENCY)
+
+    async def scan(symbol: str):
+        async with semaphore:
+            return await scan_symbol(symbol, interval, start_ms, end_ms)
+
+    scans = await asyncio.gather(*(scan(pair.symbol) for pair in pairs))
+    expected = sum(s["expected"] for s in scans)
+    missing = sum(s["missing"] for s in scans)
+    incomplete = sorted((s for s in scans if s["missing"]), key=lambda s: s["missing"], reverse=True)
+    return {
+        "interval": interval,
+        "start": from_ms(start_ms),
+        "end": from_ms(end_ms),
+        "symbols": len(scans),
+        "complete_symbols": len(scans) - len(incomplete),
+        "expected_bars": expected,
+        "missing_bars": missing,
+        "coverage": round(1 - missing / expected, 6) if expected else None,
+        "gaps": sum(len(s["gaps"]) for s in scans),
+        "fetch_windows": sum(len(s["windows"]) for s in scans),
+        "fetch_requests": sum(s["requests"] for s in scans),
+        "scan_seconds": round(time.monotonic() - started, 3),
+        "incomplete": [{k: v for k, v in s.items() if k != "windows"} for s in incomplete[:limit]],
+    }
+
+
+async def backfill_symbol(symbol: str, interval: str, start_ms: int, end_ms: int) -> dict:
+    plan = await scan_symbol(symbol, interval, start_ms, end_ms)
+    result = {"windows": len(plan["windows"]), "missing": plan["missing"], "inserted": 0, "updated": 0, "unchanged": 0}
+    for first, last in plan["windows"]:
+        klines = await fetch_kline_range(symbol, interval, first, last + INTERVAL_MS[interval] - 1)
+        # Pages can run past the window; only the window itself is needed
+        klines = [k for k in klines if first <= k[0] <= last]
+        if klines:
+            for key, count in (await upsert_candles(symbol, interval, klines)).items():
+                result[key] += count
+    return result
+
+
+async def backfill_gaps(interval: str = "1d", days_back: int = 30) -> dict:
+    """
+    Fetches only the missing bars of every CryptoPair over the window,
+    coalesced into as few klines requests as possible. Sync trackers are
+    left alone: this repairs holes behind them.
+    """
+    pairs = await CryptoPair.find_all().to_list()
+    now = datetime.now(timezone.utc)
+    started = time.monotonic()
+    start_ms, end_ms = closed_range(interval, days_back, now)
+
+    backfill_progress.clear()
+    backfill_progress.update({
+        "interval": interval,
+        "started_at": now,
+        "running": True,
+        "symbols": len(pairs),
+        "done": 0,
+        "failed": 0,
+        "missing": 0,
+        "windows": 0,
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+    })
+    semaphore = asyncio.Semaphore(KLINE_SYNC_CONCURRENCY)
+
+    async def run(symbol: str):
+        async with semaphore:
+            try:
+                result = await backfill_symbol(symbol, interval, start_ms, end_ms)
+                for key, count in result.items():
+                    backfill_progress[key] += count
+            except Exception as e:
+                backfill_progress["failed"] += 1
+                print(f"❌ Error backfilling {symbol}: {e}")
+            finally:
+                backfill_progress["done"] += 1
+
+    try:
+        await asyncio.gather(*(run(pair.symbol) for pair in pairs))
+    finally:
+        elapsed = time.monotonic() - started
+        # Bars Binance has no data for (exchange downtime) stay missing
+        backfill_progress.update({
+            "running": False,
+            "still_missing": backfill_progress["missing"] - backfill_progress["inserted"],
+            "elapsed_seconds": round(elapsed, 2),
+        })
+    if backfill_progress["windows"]:
+        print(f"🩹 Backfilled {interval}: {backfill_progress['inserted']} of {backfill_progress['missing']} "
+              f"missing candles in {backfill_progress['windows']} windows, {elapsed:.1f}s")
+    return dict(backfill_progress)
@@ -1,8 +1,13 @@
-from binance.client import Client
 from decimal import Decimal
 from datetime import datetime, timezone
 from bson.decimal128 import Decimal128
+from pymongo import UpdateOne
 from models import CryptoPair
+from services.ticker_cache import ticker_table
+from services.rate_limiter import weight_budget
+from services.exchange_gateway import market_data_gateway
+import asyncio
+import time
 
 def to_decimal128(val):
     if val is None:
@@ -11,58 +16,100 @@ def to_decimal128(val):
         return val
     return Decimal128(str(val)) 
 
-binance_client = Client()
+# Symbol sync tolerates older streamed prices than the trade path does
+SYNC_PRICE_MAX_AGE = 60
+EXCHANGE_INFO_WEIGHT = 20
+ALL_TICKERS_WEIGHT = 4
 
-async def fetch_and_store_binance_symbols():
-    exchange_info = binance_client.get_exchange_info()
-    symbols = exchange_info.get("symbols", [])
+# Fields compared against the stored pair to decide whether it changed
+PAIR_FIELDS = ("base_asset", "quote_asset", "status", "min_qty", "step_size", "tick_size")
 
-    for s in symbols:
-        if s["status"] != "TRADING" or not s["isSpotTradingAllowed"]:
-            continue
+def pair_fields(s: dict) -> dict:
+    """
+    The CryptoPair fields described by one exchangeInfo symbol entry.
+    """
+    filters = {f["filterType"]: f for f in s.get("filters", [])}
+    lot_size = filters.get("LOT_SIZE", {})
+    price_filter = filters.get("PRICE_FILTER", {})
+    return {
+        "base_asset": s["baseAsset"],
+        "quote_asset": s["quoteAsset"],
+        "status": s["status"],
+        "min_qty": to_decimal128(lot_size["minQty"]) if "minQty" in lot_size else None,
+        "step_size": to_decimal128(lot_size["stepSize"]) if "stepSize" in lot_size else None,
+        "tick_size": to_decimal128(price_filter["tickSize"]) if "tickSize" in price_filter else None,
+    }
 
-        symbol = s["symbol"]
-        base_asset = s["baseAsset"]
-        quote_asset = s["quoteAsset"]
-        status = s["status"]
+def is_listed(s: dict) -> bool:
+    return s["status"] == "TRADING" and s["isSpotTradingAllowed"] and s["symbol"].endswith("USDT")
 
-        if not symbol.endswith("USDT"):
-            continue
+async def fetch_and_store_binance_symbols():
+    """
+    Syncs CryptoPair with exchangeInfo using two REST calls in total: the
+    exchange info and one all-symbols price snapshot. Stored pairs are
+    loaded once and diffed in memory, and only new or changed pairs are
+    written, in one unordered bulk_write. Pairs that stopped trading keep
+    their document with the new status. Returns counts and timings.
+    """
+    started = time.monotonic()
+    await weight_budget.acquire(EXCHANGE_INFO_WEIGHT)
+    await weight_budget.acquire(ALL_TICKERS_WEIGHT)
+    exchange_info, tickers = await asyncio.gather(
+        market_data_gateway.get_exchange_info(),
+        market_data_gateway.get_all_tickers(),
+    )
+    snapshot = {t["symbol"]: t["price"] for t in tickers}
+    fetched = time.monotonic()
 
-        price_data = binance_client.get_symbol_ticker(symbol=symbol)
-        price = to_decimal128(price_data["price"]) if "price" in price_data else None
-        now = datetime.now(timezone.utc)
+    existing = {
+        doc["symbol"]: doc
+        async for doc in CryptoPair.get_motor_collection().find(
+            {}, {"_id": 0, "symbol": 1, **{f: 1 for f in PAIR_FIELDS}}
+        )
+    }
 
-        filters = {f["filterType"]: f for f in s.get("filters", [])}
-        lot_size = filters.get("LOT_SIZE", {})
-        price_filter = filters.get("PRICE_FILTER", {})
+    now = datetime.now(timezone.utc)
+    ops = []
+    added, changed, unchanged = [], [], 0
+    for s in exchange_info.get("symbols", []):
+        symbol = s["symbol"]
+        stored = existing.get(symbol)
+        if stored is None and not is_listed(s):
+            continue
 
-        min_qty = to_decimal128(lot_size.get("minQty", "0")) if "minQty" in lot_size else None
-        step_size = to_decimal128(lot_size.get("stepSize", "0")) if "stepSize" in lot_size else None
-        tick_size = to_decimal128(price_filter.get("tickSize", "0")) if "tickSize" in price_filter else None
+        fields = pair_fields(s)
+        if stored is None:
+            # Prefer the streamed price; the snapshot covers symbols not on the stream yet
+            price = ticker_table.get(symbol, max_age=SYNC_PRICE_MAX_AGE) or snapshot.get(symbol)
+            doc = {
+                "symbol": symbol,
+                **fields,
+                "last_price": to_decimal128(price),
+                "last_price_time": now if price is not None else None,
+                "created_at": now,
+                "updated_at": now,
+            }
+            # An upsert rather than an insert, so overlapping syncs cannot collide
+            ops.append(UpdateOne({"symbol": symbol}, {"$setOnInsert": doc}, upsert=True))
+            added.append(symbol)
+        elif any(stored.get(f) != fields[f] for f in PAIR_FIELDS):
+            ops.append(UpdateOne({"symbol": symbol}, {"$set": {**fields, "updated_at": now}}))
+            changed.append(symbol)
+        else:
+            unchanged += 1
 
-        existing = await CryptoPair.find_one(CryptoPair.symbol == symbol)
+    if ops:
+        await CryptoPair.get_motor_collection().bulk_write(ops, ordered=False)
 
-        if existing:
-            await existing.set({
-                CryptoPair.last_price: price,
-                CryptoPair.last_price_time: now,
-                CryptoPair.status: status,
-                CryptoPair.min_qty: min_qty,
-                CryptoPair.step_size: step_size,
-                CryptoPair.tick_size: tick_size,
-            })
-        else:
-            doc = CryptoPair(
-                symbol=symbol,
-                base_asset=base_asset,
-                quote_asset=quote_asset,
-                status=status,
-                last_price=price,
-                last_price_time=now,
-                min_qty=min_qty,
-                step_size=step_size,
-                tick_size=tick_size,
-                created_at=now
-            )
-            await doc.insert()
+    elapsed = time.monotonic() - started
+    report = {
+        "added": len(added),
+        "changed": len(changed),
+        "unchanged": unchanged,
+        "added_symbols": added,
+        "changed_symbols": changed,
+        "rest_seconds": round(fetched - started, 3),
+        "elapsed_seconds": round(elapsed, 3),
+    }
+    print(f"🔄 Symbol sync: {len(added)} added, {len(changed)} changed, {unchanged} unchanged in {elapsed:.2f}s")
+    return report
@@ -1,60 +1,132 @@
-from models import CryptoPair, Candle, CandleSyncTracker
-from binance_config import client
-from decimal import Decimal
+from models import CryptoPair
+from services.exchange_gateway import exchange_gateway
+from services.rate_limiter import weight_budget
+from services.candle_store import upsert_candles, get_last_fetched, mark_fetched
 from datetime import datetime, timedelta, timezone
 from binance.client import Client as BinanceClient
+import asyncio
+import os
+import time
 
 BINANCE_INTERVAL = BinanceClient.KLINE_INTERVAL_1DAY
+# Symbols synced at once; each holds at most one REST call in flight
+KLINE_SYNC_CONCURRENCY = int(os.getenv("KLINE_SYNC_CONCURRENCY", "8"))
+KLINE_PAGE_LIMIT = 1000
+KLINE_REQUEST_WEIGHT = 2
+
+# Progress of the current (or last) sync run, served by /fetch_historical_candles/status
+sync_progress = {}
+# One sync at a time: runs share sync_progress and the request-weight budget
+sync_lock = asyncio.Lock()
+
+def to_ms(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+async def fetch_klines_page(symbol: str, interval: str, start_ms: int, end_ms: int):
+    """
+    One /api/v3/klines call through the pooled exchange gateway, paced by
+    the request-weight budget.
+    """
+    await weight_budget.acquire(KLINE_REQUEST_WEIGHT)
+    sync_progress["requests"] = sync_progress.get("requests", 0) + 1
+    return await exchange_gateway.get_klines(
+        symbol=symbol,
+        interval=interval,
+        startTime=start_ms,
+        endTime=end_ms,
+        limit=KLINE_PAGE_LIMIT
+    )
+
+async def fetch_kline_range(symbol: str, interval: str, start_ms: int, end_ms: int):
+    """
+    Pages through [start_ms, end_ms] KLINE_PAGE_LIMIT bars at a time.
+    """
+    klines = []
+    while start_ms <= end_ms:
+        page = await fetch_klines_page(symbol, interval, start_ms, end_ms)
+        if not page:
+            break
+        klines.extend(page)
+        if len(page) < KLINE_PAGE_LIMIT:
+            break
+        start_ms = page[-1][0] + 1
+    return klines
+
+async def sync_symbol(symbol: str, interval: str, days_back: int, now: datetime) -> dict:
+    # Resume from the last stored bar, which may have still been forming
+    last_fetched = await get_last_fetched(symbol, interval)
+    if last_fetched:
+        start_ms = to_ms(last_fetched)
+    else:
+        start_ms = to_ms(now - timedelta(days=days_back))
+
+    klines = await fetch_kline_range(symbol, interval, start_ms, to_ms(now))
+    if not klines:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    result = await upsert_candles(symbol, interval, klines)
+    await mark_fetched(symbol, interval, datetime.fromtimestamp(klines[-1][0] / 1000, tz=timezone.utc))
+    return result
 
 async def fetch_historical_data(interval: str = BINANCE_INTERVAL, days_back: int = 30):
+    """
+    Syncs klines for every CryptoPair with bounded concurrency and returns
+    a report of the run (counts, elapsed time, throughput). A run started
+    while another is going waits for it to finish.
+    """
+    async with sync_lock:
+        return await _sync_all(interval, days_back)
+
+async def _sync_all(interval: str, days_back: int) -> dict:
     pairs = await CryptoPair.find_all().to_list()
     now = datetime.now(timezone.utc)
+    started = time.monotonic()
+
+    sync_progress.clear()
+    sync_progress.update({
+        "interval": interval,
+        "started_at": now,
+        "running": True,
+        "symbols": len(pairs),
+        "done": 0,
+        "failed": 0,
+        "candles": 0,
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "requests": 0,
+    })
+    semaphore = asyncio.Semaphore(KLINE_SYNC_CONCURRENCY)
+
+    async def run(symbol: str):
+        async with semaphore:
+            try:
+                result = await sync_symbol(symbol, interval, days_back, now)
+                for key, count in result.items():
+                    sync_progress[key] += count
+                sync_progress["candles"] += sum(result.values())
+            except Exception as e:
+                sync_progress["failed"] += 1
+                print(f"❌ Error syncing {symbol}: {e}")
+            finally:
+                sync_progress["done"] += 1
+                done = sync_progress["done"]
+                if done % 25 == 0 or done == len(pairs):
+                    elapsed = time.monotonic() - started
+                    print(f"📈 Kline sync {interval}: {done}/{len(pairs)} symbols, "
+                          f"{sync_progress['candles']} candles, {elapsed:.1f}s")
 
-    for pair in pairs:
-        try:
-            # Get last fetched time from tracker
-            tracker = await CandleSyncTracker.find_one({"symbol": pair.symbol})
-            start_time = tracker.last_fetched if tracker else now - timedelta(days=30)
-            end_time = now
-
-            # Fetch new klines
-            klines = client.get_historical_klines(
-                symbol=pair.symbol,
-                interval=interval,
-                start_str=start_time.strftime('%d %b, %Y'),
-                end_str=end_time.strftime('%d %b, %Y')
-            )
-            klines.sort(key=lambda k: k[0])
-            candles_to_insert = []
-            for kline in klines:
-                candle_time = datetime.fromtimestamp(kline[0] / 1000)
-
-                candle = Candle(
-                    symbol=pair.symbol,
-                    interval=interval,
-                    open=Decimal(kline[1]),
-                    high=Decimal(kline[2]),
-                    low=Decimal(kline[3]),
-                    close=Decimal(kline[4]),
-                    volume=Decimal(kline[5]),
-                    candle_time=candle_time
-                )
-                candles_to_insert.append(candle)
-
-            if candles_to_insert:
-                # Insert all new candles
-                await Candle.insert_many(candles_to_insert)
-
-                # Update tracker with latest candle time
-                latest_time = max(c.candle_time for c in candles_to_insert)
-
-                existing_tracker = await CandleSyncTracker.find_one({"symbol": pair.symbol})
-
-                if existing_tracker:
-                    existing_tracker.last_fetched = latest_time
-                    await existing_tracker.save()
-                else:
-                    await CandleSyncTracker(symbol=pair.symbol, last_fetched=latest_time).insert()
-
-        except Exception as e:
-            print(f"❌ Error syncing {pair.symbol}: {e}")
+    try:
+        await asyncio.gather(*(run(pair.symbol) for pair in pairs))
+    finally:
+        elapsed = time.monotonic() - started
+        sync_progress.update({
+            "running": False,
+            "elapsed_seconds": round(elapsed, 2),
+            "symbols_per_second": round(sync_progress["done"] / elapsed, 2) if elapsed else None,
+            "candles_per_second": round(sync_progress["candles"] / elapsed, 2) if elapsed else None,
+            "weight": weight_budget.stats(),
+        })
+    return dict(sync_progress)
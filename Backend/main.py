@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from db import lifespan 
-from routes import cryptoPair, ohlc, websocket_routes, trading, current_balance, portfolio, auth_routes, cart, credits, qa_chatbot
+from routes import cryptoPair, ohlc, websocket_routes, trading, current_balance, portfolio, auth_routes, cart, credits, qa_chatbot, backtest
 from fastapi.middleware.cors import CORSMiddleware
 
 
@@ -25,3 +25,4 @@ app.include_router(cart.router)
 app.include_router(credits.router)
 # app.include_router(web3_utils.router)
 app.include_router(qa_chatbot.router)
+app.include_router(backtest.router)
@@ -93,13 +93,16 @@ class CryptoPair(Document):
     tick_size: Optional[Decimal128] = None
 
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # Set by the symbol sync whenever the pair is added or its rules change
+    updated_at: Optional[datetime] = None
 
     class Settings:
         name = "crypto_pairs"
         indexes = [
             IndexModel([("symbol", 1)], unique=True),
             IndexModel([("base_asset", 1)]),
-            IndexModel([("status", 1)])
+            IndexModel([("status", 1)]),
+            IndexModel([("updated_at", 1)])
         ]
 
     class Config:
@@ -128,11 +131,41 @@ class Candle(Document):
         name = "candles"
         indexes = [
             IndexModel([("symbol", 1), ("candle_time", 1)]),
-            IndexModel([("symbol", 1), ("interval", 1), ("candle_time", -1)]),
+            IndexModel(
+                [("symbol", 1), ("interval", 1), ("candle_time", 1)],
+                unique=True,
+                name="symbol_interval_candle_time_unique"
+            ),
             IndexModel([("candle_time", -1)])
         ]
 
 
+class CandleBucket(Document):
+    """
+    A run of bars for one symbol and interval packed into little-endian
+    arrays: t is int64 open times in epoch ms, o/h/l/c/v are float64.
+    See services/candle_store.py (CANDLE_STORAGE=buckets).
+    """
+    symbol: str
+    interval: str
+    start: datetime
+    end: datetime
+    bars: int
+    rev: str
+    t: bytes
+    o: bytes
+    h: bytes
+    l: bytes
+    c: bytes
+    v: bytes
+
+    class Settings:
+        name = "candle_buckets"
+        indexes = [
+            IndexModel([("symbol", 1), ("interval", 1), ("start", 1)], unique=True),
+        ]
+
+
 class Order(Document):
     user: Link[User]
     symbol: str  
@@ -250,10 +283,14 @@ class Cart(Document):
 
 class CandleSyncTracker(Document):
     symbol: str
-    last_fetched: datetime = Field(default_factory=datetime.utcnow)
+    interval: str = "1d"
+    last_fetched: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     class Settings:
         name = "candle_sync_tracker"
+        indexes = [
+            IndexModel([("symbol", 1), ("interval", 1)], unique=True),
+        ]
 
 
 class CreditsHistory(Document):
@@ -333,6 +370,26 @@ class OrderRequest(BaseModel):
     order_type: str
     price: Optional[float] = None
 
+class BacktestRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=50)
+    strategy: str = Field("ma_crossover", description="ma_crossover or rsi")
+    interval: str = "1d"
+    days_back: int = Field(365, ge=1)
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    params: Dict[str, List[float]] = Field(default_factory=dict, description="Values to sweep per parameter")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "symbols": ["BTCUSDT", "ETHUSDT"],
+                "strategy": "ma_crossover",
+                "interval": "4h",
+                "days_back": 180,
+                "params": {"fast": [5, 10, 20], "slow": [50, 100]}
+            }
+        }
+
 class TransferRequest(BaseModel):
     to_username: str = Field(..., description="Receiver's username")
     symbol: str = Field(..., description="Cryptocurrency symbol (e.g., BTC)")
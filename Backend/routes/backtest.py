@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException, Depends
+
+from db import get_current_user
+from models import BacktestRequest
+from routes.ohlc import VALID_INTERVALS, request_range
+from services.backtest_jobs import backtest_jobs
+from trading_config import TRADING_FEE_RATE
+
+router = APIRouter(tags=["Backtest"])
+
+
+@router.post("/backtests")
+async def start_backtest(request: BacktestRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Starts a parameter sweep of a strategy over the stored candles of one
+    or more symbols. Poll GET /backtests/{id} for the results.
+    """
+    if request.interval not in VALID_INTERVALS:
+        raise HTTPException(status_code=400, detail="Invalid interval. Use one of: " + ", ".join(VALID_INTERVALS.keys()))
+
+    start, end = request_range(request.start, request.end, request.days_back)
+
+    symbols = sorted({s.upper() for s in request.symbols})
+    try:
+        job = backtest_jobs.submit(
+            symbols, request.interval, start, end,
+            request.strategy, request.params,
+            # Workers get a plain float; same fee as live trades
+            float(TRADING_FEE_RATE)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return backtest_jobs.public(job)
+
+
+@router.get("/backtests")
+async def list_backtests(current_user: dict = Depends(get_current_user)):
+    return backtest_jobs.list()
+
+
+@router.get("/backtests/{job_id}")
+async def get_backtest(job_id: str, current_user: dict = Depends(get_current_user)):
+    job = backtest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+    return job
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from datetime import datetime, timezone
 from decimal import Decimal
 from pydantic import BaseModel
-from binance_config import client
+from services.exchange_gateway import exchange_gateway
 from typing import Optional
 from models import (
     Cart, CartItemEmbed, StatusEnum, OrderStatusEnum, Order,
@@ -11,6 +11,8 @@ from models import (
 )
 from db import get_current_user
 from services.portfolio import update_or_create_portfolio, update_portfolio_on_sell
+from services.ticker_cache import get_live_price
+from services.symbol_registry import symbol_registry
 
 
 router = APIRouter(tags=["Cart"])
@@ -25,12 +27,18 @@ class AddToCartRequest(BaseModel):
 async def add_to_cart(item: AddToCartRequest, current_user=Depends(get_current_user)):
     full_symbol = item.symbol.upper()
 
+    # Round to the pair's step/tick sizes and reject what Binance would
+    try:
+        quantity, limit_price = symbol_registry.check_order(full_symbol, item.quantity, item.price)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    item.quantity, item.price = quantity, limit_price
+
     # Get market price per unit if not provided
     unit_price = item.price
     if unit_price is None:
         try:
-            ticker = client.get_symbol_ticker(symbol=full_symbol)
-            unit_price = Decimal(ticker["price"])
+            unit_price = await get_live_price(full_symbol)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Could not fetch market price: {str(e)}")
 
@@ -161,7 +169,7 @@ async def checkout_cart(current_user=Depends(get_current_user)):
                 order_payload["price"] = float(item.price)
                 order_payload["timeInForce"] = "GTC"
 
-            order_data = client.create_order(**order_payload)
+            order_data = await exchange_gateway.create_order(**order_payload)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Binance error on {item.symbol}: {str(e)}")
 
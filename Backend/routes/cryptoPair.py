@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, Response
 from fetch_binance.fetch_cryptoPair import fetch_and_store_binance_symbols
 from typing import Optional
 from models import CryptoPair
 from db import get_current_user
+from services.real_time_price import refresh_streams
+from services.symbol_registry import symbol_registry
+from services.symbol_search import symbol_search
 
 router = APIRouter(tags=["Cryptos"])
 
 @router.post("/sync_binance_symbols")
 async def sync_binance_symbols(current_user: dict = Depends(get_current_user)):
-    await fetch_and_store_binance_symbols()
-    return {"status": "sync complete"}
+    report = await fetch_and_store_binance_symbols()
+    if report["added"] or report["changed"]:
+        await symbol_registry.refresh()
+        await refresh_streams()
+    return {"status": "sync complete", "report": report}
 
 @router.get("/cryptos")
 async def get_cryptos(
@@ -17,6 +23,14 @@ async def get_cryptos(
     limit: int = 10,
     search: Optional[str] = Query(None, description="Search by symbol or base_asset")
 ):
+    if symbol_registry.loaded:
+        pairs, total = symbol_search.search(search, skip, limit)
+        return {
+            "items": [{"symbol": symbol, "base_asset": base_asset} for symbol, base_asset in pairs],
+            "total": total
+        }
+
+    # Registry not loaded yet: fall back to querying Mongo
     query = {}
     if search:
         query = {
@@ -35,7 +49,21 @@ async def get_cryptos(
     }
 
 @router.get("/cryptos/search")
-async def search_cryptos(query: str = Query(..., description="Search by symbol or base asset")):
+async def search_cryptos(
+    response: Response,
+    query: str = Query(..., description="Search by symbol or base asset"),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """
+    Matches ranked exact, then prefix, then substring. The full match
+    count is in the X-Total-Count header.
+    """
+    if symbol_registry.loaded:
+        pairs, total = symbol_search.search(query, skip, limit)
+        response.headers["X-Total-Count"] = str(total)
+        return [{"symbol": symbol, "base_asset": base_asset} for symbol, base_asset in pairs]
+
     search_filter = {
         "$or": [
             {"symbol": {"$regex": query, "$options": "i"}},
@@ -51,5 +79,7 @@ async def search_cryptos(query: str = Query(..., description="Search by symbol o
 
 @router.get("/cryptos/all")
 async def get_all_cryptos():
+    if symbol_registry.loaded:
+        return [symbol for symbol, _ in symbol_search.search()[0]]
     pairs = await CryptoPair.find_all().to_list()
     return [p.symbol for p in pairs]
\ No newline at end of file
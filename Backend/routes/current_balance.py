@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends
-from binance_config import client
+from services.exchange_gateway import exchange_gateway
 from db import get_current_user
 
 router = APIRouter(tags=["Testnet Balance"])
 
 @router.get("/balance")
 async def get_balance(current_user: dict = Depends(get_current_user)):
-    account_info = client.get_account()
+    account_info = await exchange_gateway.get_account()
     balances = []
 
     for balance in account_info["balances"]:
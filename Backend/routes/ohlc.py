@@ -1,9 +1,18 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
-from fetch_binance.fetch_ohlc import fetch_historical_data  
-from models import Candle
+from fetch_binance.fetch_ohlc import fetch_historical_data, sync_progress, sync_lock
+from fetch_binance.candle_gaps import gap_report, backfill_gaps, backfill_progress
+from services.candle_store import candle_store, resolve_source, archive_progress, STREAM_BATCH_SIZE
+from services.candle_archive import candle_archive, CANDLE_ARCHIVE, CANDLE_ARCHIVE_AFTER_DAYS
+from services.candle_series import CandleSeries, INTERVAL_MS, to_ms, from_ms, bucket_keys
+from services.indicators import indicator_engine, parse_spec, warmup_bars
+import numpy as np
+from services.candle_cache import CachedCandleStore
+from services.candle_formats import CANDLE_FORMATS, format_available
+from fastapi.responses import StreamingResponse
 from datetime import timedelta, datetime, timezone
-from typing import List
+from typing import List, Optional
 from db import get_current_user
+from services.candle_builder import candle_builder, BASE_INTERVAL, ROLLUP_INTERVALS
 router = APIRouter(tags=["Candles"])
 
 VALID_INTERVALS = {
@@ -23,6 +32,23 @@ VALID_INTERVALS = {
     "1w": "1w",
     "1M": "1M"
 }
+MAX_CANDLE_LIMIT = 100000
+
+def request_range(start: Optional[datetime], end: Optional[datetime], days_back: int):
+    """
+    The (start, end) of a candle request as UTC-aware datetimes. Query
+    values without an offset are taken as UTC; end defaults to now and
+    start to days_back before end.
+    """
+    if end is not None and end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start is not None and start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    end_time = end or datetime.now(timezone.utc)
+    start_time = start or end_time - timedelta(days=days_back)
+    if start_time >= end_time:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start_time, end_time
 
 @router.post("/fetch_historical_candles")
 async def trigger_candle_fetch(days_back: int = 30, interval: str = "1d", current_user: dict = Depends(get_current_user)):
@@ -32,35 +58,229 @@ async def trigger_candle_fetch(days_back: int = 30, interval: str = "1d", curren
     try:
         if interval not in VALID_INTERVALS:
             raise HTTPException(status_code=400, detail="Invalid interval. Use one of: " + ", ".join(VALID_INTERVALS.keys()))
+        if sync_lock.locked():
+            raise HTTPException(status_code=409, detail="A historical sync is already running")
 
-        await fetch_historical_data(interval=VALID_INTERVALS[interval], days_back=days_back)
-        return {"message": f"Historical candle data fetched for last {days_back} days using {interval} interval."}
+        report = await fetch_historical_data(interval=VALID_INTERVALS[interval], days_back=days_back)
+        return {
+            "message": f"Historical candle data fetched for last {days_back} days using {interval} interval.",
+            "report": report
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch data: {str(e)}")
 
+@router.get("/fetch_historical_candles/status")
+async def candle_fetch_status(current_user: dict = Depends(get_current_user)):
+    """
+    Progress of the running (or last finished) historical sync.
+    """
+    return sync_progress or {"running": False}
+
+@router.get("/fetch_historical_candles/gaps")
+async def candle_gap_report(
+    interval: str = Query("1d"),
+    days_back: int = Query(30, ge=1),
+    limit: int = Query(100, ge=0),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Coverage of closed bars across every pair, with the missing ranges of
+    the `limit` worst symbols and the fetch windows a backfill would use.
+    """
+    if interval not in VALID_INTERVALS:
+        raise HTTPException(status_code=400, detail="Invalid interval. Use one of: " + ", ".join(VALID_INTERVALS.keys()))
+    return await gap_report(interval, days_back, limit)
+
+@router.post("/fetch_historical_candles/backfill")
+async def trigger_candle_backfill(days_back: int = 30, interval: str = "1d", current_user: dict = Depends(get_current_user)):
+    """
+    Fetch only the candles missing from stored history.
+    """
+    if interval not in VALID_INTERVALS:
+        raise HTTPException(status_code=400, detail="Invalid interval. Use one of: " + ", ".join(VALID_INTERVALS.keys()))
+    if backfill_progress.get("running"):
+        raise HTTPException(status_code=409, detail="A backfill is already running")
+    return {"report": await backfill_gaps(interval, days_back)}
+
+async def with_live_bar(series: CandleSeries, start_ms: int, end_ms: int) -> CandleSeries:
+    """
+    Replaces the series' last bar with the live candle builder's forming
+    bar when that falls in the range. Intervals the builder does not
+    aggregate only get the open minute folded in.
+    """
+    live = await candle_builder.forming_series(series.symbol, series.interval)
+    if live is None:
+        minute = candle_builder.open_minute(series.symbol)
+        return series.fold(minute) if minute and start_ms <= minute["t"] <= end_ms else series
+    if not len(live) or not start_ms <= live.time[0] <= end_ms:
+        return series
+    stored = series.take(slice(0, int(np.searchsorted(series.time, live.time[0]))))
+    return CandleSeries.concat(series.symbol, series.interval, [stored, live])
+
+
+async def read_live(symbol: str, interval: str, source: Optional[str], start_ms: int, end_ms: int) -> CandleSeries:
+    """
+    Bars of any interval including the forming one: the source interval
+    gets its forming bar before it is resampled.
+    """
+    if source is None:
+        series = CandleSeries.empty(symbol, interval)
+    else:
+        series = await candle_store.read(symbol, source, start_ms, end_ms)
+    return (await with_live_bar(series, start_ms, end_ms)).resample(interval)
+
+
+async def candle_chunks(symbol: str, interval: str, start_time: datetime, end_time: datetime, limit: Optional[int]):
+    """
+    Yields the requested bars as CandleSeries chunks. When the interval is
+    stored as-is and no limit applies, chunks come straight off the store
+    cursor; otherwise the range is read, resampled and then chunked.
+    """
+    source, start_ms, end_ms = await resolve_source(symbol, interval, start_time, end_time)
+
+    if source == interval and limit is None:
+        # Hold one chunk back so the forming bar can replace its last bar
+        previous = None
+        async for chunk in candle_store.iter_batches(symbol, interval, start_ms, end_ms):
+            if previous is not None:
+                yield previous
+            previous = chunk
+        if previous is None:
+            previous = CandleSeries.empty(symbol, interval)
+        yield await with_live_bar(previous, start_ms, end_ms)
+        return
+
+    series = await read_live(symbol, interval, source, start_ms, end_ms)
+    if limit:
+        series = series.tail(limit)
+    for chunk in series.chunks(STREAM_BATCH_SIZE):
+        yield chunk
+
 @router.get("/candles/{symbol}")
-async def get_ohlc_data(symbol: str, days_back: int = Query(30, ge=1)):
+async def get_ohlc_data(
+    symbol: str,
+    days_back: int = Query(30, ge=1),
+    interval: str = Query("1d"),
+    start: Optional[datetime] = Query(None, description="Range start (UTC); defaults to end - days_back"),
+    end: Optional[datetime] = Query(None, description="Range end (UTC); defaults to now"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_CANDLE_LIMIT, description="Return only the latest N bars"),
+    format: str = Query("json", description="json, ndjson, arrow or packed")
+):
+    """
+    Bars for any interval in VALID_INTERVALS, resampled on the fly from the
+    finest stored interval that covers the range. Ranges reaching the
+    present include the forming bar. The response is streamed in the
+    requested format (see services/candle_formats.py).
+    """
+    if interval not in VALID_INTERVALS:
+        raise HTTPException(status_code=400, detail="Invalid interval. Use one of: " + ", ".join(VALID_INTERVALS.keys()))
+    if format not in CANDLE_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format. Use one of: " + ", ".join(CANDLE_FORMATS.keys()))
+    if not format_available(format):
+        raise HTTPException(status_code=406, detail=f"The {format} format needs pyarrow installed on the server")
+
+    symbol = symbol.upper()
+    start_time, end_time = request_range(start, end, days_back)
+
+    media_type, encode = CANDLE_FORMATS[format]
+    return StreamingResponse(
+        encode(candle_chunks(symbol, interval, start_time, end_time, limit)),
+        media_type=media_type,
+        headers={"X-Candle-Symbol": symbol, "X-Candle-Interval": interval}
+    )
+
+
+@router.get("/candles/{symbol}/live")
+async def get_live_candle(symbol: str, interval: str = Query(BASE_INTERVAL)):
+    """
+    The currently forming bar, served from memory (fed by @kline_1m).
+    """
+    if interval != BASE_INTERVAL and interval not in ROLLUP_INTERVALS:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid interval. Use one of: " + ", ".join([BASE_INTERVAL, *ROLLUP_INTERVALS])
+        )
+
+    bar = candle_builder.forming_bar(symbol.upper(), interval)
+    if bar is None:
+        raise HTTPException(status_code=404, detail=f"No live candle for {symbol.upper()}")
+    return bar
+
+
+@router.get("/candles/{symbol}/indicators")
+async def get_indicators(
+    symbol: str,
+    indicators: str = Query("sma:20,ema:50,rsi:14", description="e.g. sma:20,ema:50,rsi:14,macd:12:26:9,bb:20:2,atr:14"),
+    interval: str = Query("1d"),
+    days_back: int = Query(30, ge=1),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_CANDLE_LIMIT)
+):
+    """
+    Indicator values computed server-side over the candle series, one
+    column per output. Extra history before start is read so values are
+    settled from the first returned bar.
+    """
+    if interval not in VALID_INTERVALS:
+        raise HTTPException(status_code=400, detail="Invalid interval. Use one of: " + ", ".join(VALID_INTERVALS.keys()))
+    try:
+        parsed = parse_spec(indicators)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     symbol = symbol.upper()
-    end_time = datetime.now(timezone.utc)
-    start_time = end_time - timedelta(days=days_back)
+    start_time, end_time = request_range(start, end, days_back)
+
+    warmup = timedelta(milliseconds=warmup_bars(parsed) * INTERVAL_MS[interval])
+    series = await read_live(symbol, interval, *await resolve_source(symbol, interval, start_time - warmup, end_time))
 
-    candles = await Candle.find({
+    result = indicator_engine.compute(symbol, interval, parsed, series)
+    times = result["time"]
+    first_bar = bucket_keys(np.array([to_ms(start_time)], dtype=np.int64), interval)[0]
+    first = int(np.searchsorted(times, first_bar, side="left"))
+    if limit:
+        first = max(first, len(times) - limit)
+
+    def column(values):
+        values = values[first:]
+        return np.where(np.isnan(values), None, values).tolist()
+
+    return {
         "symbol": symbol,
-        "candle_time": {"$gte": start_time, "$lte": end_time}
-    }).sort("candle_time").to_list()
-
-    print(f"{symbol} → Found {len(candles)} candles")
-
-    return [
-        {
-            "symbol": c.symbol,
-            "interval": c.interval,
-            "time": c.candle_time,
-            "open": float(c.open),
-            "high": float(c.high),
-            "low": float(c.low),
-            "close": float(c.close),
-            "volume": float(c.volume)
-        }
-        for c in candles
-    ]
+        "interval": interval,
+        "time": [from_ms(t) for t in times[first:].tolist()],
+        "indicators": {
+            ind.key: column(result["values"][ind.key][0]) if ind.outputs == (None,) else {
+                name: column(values) for name, values in zip(ind.outputs, result["values"][ind.key])
+            }
+            for ind in parsed
+        },
+    }
+
+@router.get("/candles/cache/stats")
+async def candle_cache_stats():
+    """
+    Hit/miss counters of the Redis candle range cache, for this process
+    and across all processes, plus its current size.
+    """
+    if not isinstance(candle_store, CachedCandleStore):
+        return {"enabled": False}
+    return {"enabled": True, **await candle_store.stats()}
+
+@router.get("/candles/archive/stats")
+async def candle_archive_stats():
+    """
+    Size of the on-disk candle archive and the result of the last
+    archive run in this process.
+    """
+    if not CANDLE_ARCHIVE:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "after_days": CANDLE_ARCHIVE_AFTER_DAYS,
+        **candle_archive.stats(),
+        **archive_progress,
+    }
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from binance_config import client
 from datetime import datetime, timezone
 from decimal import Decimal, ROUND_DOWN
 from bson import Decimal128
@@ -12,6 +11,7 @@ from models import (
     CreditsHistory, CreditReasonEnum
 )
 from services.portfolio import update_or_create_portfolio, update_portfolio_on_sell
+from services.symbol_registry import symbol_registry
 from db import get_current_user
 
 router = APIRouter(tags=["Trade"])
@@ -49,7 +49,14 @@ async def place_trade(
         symbol = request.symbol.strip().upper()
         quantity = Decimal(str(request.quantity)).quantize(Decimal("0.00000001"))
         order_type = request.order_type.strip().upper()
-        price = str(request.price) if request.price else None
+        price = Decimal(str(request.price)) if request.price else None
+
+        # --- Lot / tick size: reject before the order costs a queue slot ---
+        try:
+            quantity, price = symbol_registry.check_order(symbol, quantity, price)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        price = str(price) if price is not None else None
 
         # --- SELL: Validate Portfolio ---
         if side == "SELL":
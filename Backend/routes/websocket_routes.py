@@ -1,22 +1,97 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Optional
 import asyncio
-from services.real_time_price import clients
+import json
+import math
+from services.price_broadcaster import broadcaster, CONFLATE_INTERVAL_MS
+from services.real_time_price import stream_manager
+from services.price_feed_relay import price_feed_relay
+from services.price_writer import price_writer
 
 router = APIRouter()
 
+def handle_client_message(websocket: WebSocket, data: str):
+    """
+    Protocol:
+      "ping"                                               -> "pong"
+      {"action": "subscribe", "symbols": ["BTCUSDT"]}      -> only those symbols
+      {"action": "unsubscribe", "symbols": ["BTCUSDT"]}    -> no prices once none are left
+      {"action": "subscribe", "symbols": ["*"]}            -> every symbol (default)
+      {"action": "conflate", "interval_ms": 250}           -> latest tick per symbol,
+                                                              batched as a JSON array
+      {"action": "conflate", "interval_ms": 0}             -> back to one frame per tick
+    """
+    if data == "ping":
+        broadcaster.send(websocket, "pong")
+        return
+
+    try:
+        message = json.loads(data)
+        action = message.get("action")
+        symbols = message.get("symbols") or []
+        if isinstance(symbols, str):
+            symbols = [symbols]
+    except (ValueError, AttributeError):
+        broadcaster.send(websocket, json.dumps({"error": "Invalid message"}))
+        return
+
+    if not isinstance(symbols, list) or not all(isinstance(s, str) for s in symbols):
+        broadcaster.send(websocket, json.dumps({"error": "symbols must be a list of strings"}))
+        return
+
+    if action == "conflate":
+        interval_ms = message.get("interval_ms", CONFLATE_INTERVAL_MS)
+        if interval_ms is not None and (
+            isinstance(interval_ms, bool) or not isinstance(interval_ms, (int, float))
+            or not math.isfinite(interval_ms) or interval_ms < 0
+        ):
+            broadcaster.send(websocket, json.dumps({"error": "interval_ms must be a non-negative number"}))
+            return
+        interval_ms = broadcaster.set_conflation(websocket, interval_ms)
+        broadcaster.send(websocket, json.dumps({"result": action, "interval_ms": interval_ms}))
+        return
+    elif action == "subscribe":
+        current = broadcaster.subscribe(websocket, symbols)
+    elif action == "unsubscribe":
+        current = broadcaster.unsubscribe(websocket, symbols)
+    else:
+        broadcaster.send(websocket, json.dumps({"error": f"Unknown action: {action}"}))
+        return
+
+    broadcaster.send(websocket, json.dumps({"result": action, "symbols": current}))
+
 @router.websocket("/ws/prices")
-async def websocket_price(websocket: WebSocket):
+async def websocket_price(websocket: WebSocket, symbols: Optional[str] = None, conflate_ms: Optional[int] = None):
     await websocket.accept()
     print("✅ Client connected")
-    clients.append(websocket)
+    broadcaster.register(websocket)
+    if symbols:
+        broadcaster.subscribe(websocket, symbols.split(","))
+    if conflate_ms:
+        broadcaster.set_conflation(websocket, conflate_ms)
     try:
         while True:
             try:
                 data = await asyncio.wait_for(websocket.receive_text(), timeout=30)
-                if data == "ping":
-                    await websocket.send_text("pong")
+                handle_client_message(websocket, data)
             except asyncio.TimeoutError:
                 pass
     except WebSocketDisconnect:
         print("⚠️ Client disconnected")
-        clients.remove(websocket)
+    except RuntimeError:
+        # Raised when the broadcaster closed the socket of an evicted client
+        print("⚠️ Client evicted")
+    finally:
+        await broadcaster.unregister(websocket)
+
+@router.get("/ws/prices/stats")
+async def websocket_price_stats():
+    return broadcaster.stats()
+
+@router.get("/ws/upstream/stats")
+async def upstream_stream_stats():
+    return {
+        **stream_manager.stats(),
+        "feed": price_feed_relay.stats(),
+        "price_writer": price_writer.stats(),
+    }
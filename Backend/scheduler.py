@@ -1,11 +1,16 @@
 from fetch_binance.fetch_ohlc import fetch_historical_data
 from fetch_binance.background_jobs import settle_filled_limit_orders
+from fetch_binance.candle_gaps import backfill_gaps
+from services.candle_store import archive_candles
+from services.candle_archive import CANDLE_ARCHIVE
 import asyncio
 
 async def cron_historical_job():
     while True:
         try:
             await fetch_historical_data("1d", 30)  
+            # Repair holes left by symbols that failed in earlier runs
+            await backfill_gaps("1d", 30)
         except Exception as e:
             print("Error in cron job:", e)
         await asyncio.sleep(3600 * 6) 
@@ -18,4 +23,12 @@ async def cron_settle_limit_orders():
             print("Error in settlement cron job:", e)
         await asyncio.sleep(300)  
 
-    
\ No newline at end of file
+async def cron_archive_candles():
+    if not CANDLE_ARCHIVE:
+        return
+    while True:
+        try:
+            await archive_candles()
+        except Exception as e:
+            print("Error in candle archive cron job:", e)
+        await asyncio.sleep(3600 * 6)
@@ -0,0 +1,145 @@
+"""
+Vectorized long-only backtests over candle arrays.
+
+A strategy turns closes into a target position per bar (1 long, 0 flat).
+The signal of bar i is acted on at the open of bar i + 1, so a strategy
+never trades on a close it could not have seen yet. Every change of
+position pays `fee_rate` on the notional traded, like real orders pay
+TRADING_FEE_RATE in trading_config.py.
+
+This module only depends on numpy so process-pool workers import it
+cheaply; the fee rate is passed in as a plain float.
+"""
+import itertools
+import time
+
+import numpy as np
+
+from services.indicators import sma, rsi
+
+STRATEGY_DEFAULTS = {
+    "ma_crossover": {"fast": [5, 10, 20], "slow": [50, 100, 200]},
+    "rsi": {"period": [14], "lower": [25, 30], "upper": [70, 75]},
+}
+# Parameters that are lookback lengths in bars
+PERIOD_PARAMS = {"fast", "slow", "period"}
+MAX_PERIOD = 1000
+
+
+def ffill_signal(enter, exit_):
+    """
+    1 from each entry bar until the next exit bar, else 0.
+    """
+    events = np.full(len(enter), np.nan)
+    events[exit_] = 0.0
+    events[enter] = 1.0
+    index = np.where(np.isnan(events), 0, np.arange(len(events)))
+    np.maximum.accumulate(index, out=index)
+    filled = events[index]
+    filled[np.isnan(filled)] = 0.0
+    return filled
+
+
+def ma_crossover_signal(fast_ma, slow_ma):
+    with np.errstate(invalid="ignore"):
+        return (fast_ma > slow_ma).astype(np.float64)
+
+
+def rsi_signal(rsi_values, lower: float, upper: float):
+    with np.errstate(invalid="ignore"):
+        return ffill_signal(rsi_values < lower, rsi_values > upper)
+
+
+def simulate(open_, close, signal, fee_rate: float, bars_per_year: float) -> dict:
+    n = len(close)
+    # Bar i runs from prices[i] to prices[i + 1]: opens, then the last close
+    prices = np.append(open_, close[-1])
+    position = np.zeros(n)
+    position[1:] = signal[:-1]
+    turnover = np.abs(np.diff(np.concatenate(([0.0], position))))
+    growth = (1.0 - fee_rate * turnover) * (1.0 + position * (prices[1:] / prices[:-1] - 1.0))
+    equity = np.cumprod(growth)
+    if position[-1]:
+        # Close the open position at the end so results are comparable
+        equity[-1] *= 1.0 - fee_rate * position[-1]
+
+    entries = np.flatnonzero((turnover > 0) & (position == 1))
+    exits = np.flatnonzero((turnover > 0) & (position == 0))
+    exits = exits[exits > entries[0]] if len(entries) else exits[:0]
+    exit_at = np.full(len(entries), n - 1)
+    exit_at[:len(exits)] = exits[:len(entries)]
+    before = np.concatenate(([1.0], equity))[entries]
+    trade_returns = equity[exit_at] / before - 1.0
+
+    bar_returns = growth - 1.0
+    std = bar_returns.std()
+    drawdown = 1.0 - equity / np.maximum.accumulate(equity)
+    return {
+        "total_return": float(equity[-1] - 1.0),
+        "buy_and_hold": float((1.0 - fee_rate) ** 2 * close[-1] / open_[0] - 1.0),
+        "max_drawdown": float(drawdown.max()),
+        "sharpe": float(bar_returns.mean() / std * np.sqrt(bars_per_year)) if std > 0 else None,
+        "trades": int(len(entries)),
+        "win_rate": float((trade_returns > 0).mean()) if len(entries) else None,
+        "exposure": float(position.mean()),
+    }
+
+
+def param_grid(strategy: str, params: dict):
+    """
+    Valid parameter combinations for a strategy. Raises ValueError for
+    unknown strategies, unknown parameters or out-of-range values.
+    """
+    if strategy not in STRATEGY_DEFAULTS:
+        raise ValueError(f"Unknown strategy '{strategy}'. Use one of: {', '.join(STRATEGY_DEFAULTS)}")
+    unknown = set(params or {}) - set(STRATEGY_DEFAULTS[strategy])
+    if unknown:
+        raise ValueError(f"Unknown parameters for {strategy}: {', '.join(sorted(unknown))}")
+    grid = {**STRATEGY_DEFAULTS[strategy], **(params or {})}
+    for name, values in grid.items():
+        if not values:
+            raise ValueError(f"No values given for {name}")
+        if name in PERIOD_PARAMS:
+            if any(v < 1 or v > MAX_PERIOD or v != int(v) for v in values):
+                raise ValueError(f"{name} must be whole numbers between 1 and {MAX_PERIOD}")
+            grid[name] = sorted({int(v) for v in values})
+        elif any(v < 0 or v > 100 for v in values):
+            raise ValueError(f"{name} must be between 0 and 100")
+    names = sorted(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        combo = dict(zip(names, values))
+        if strategy == "ma_crossover" and combo["fast"] >= combo["slow"]:
+            continue
+        if strategy == "rsi" and combo["lower"] >= combo["upper"]:
+            continue
+        yield combo
+
+
+def run_symbol_sweep(task: dict) -> dict:
+    """
+    Process-pool entry point: every parameter combination for one symbol.
+    Indicator arrays are computed once per distinct period and shared.
+    """
+    started = time.process_time()
+    open_, close = task["open"], task["close"]
+    strategy = task["strategy"]
+    cache = {}
+    results = []
+    for combo in task["combos"]:
+        if strategy == "ma_crossover":
+            for period in (combo["fast"], combo["slow"]):
+                if ("sma", period) not in cache:
+                    cache[("sma", period)] = sma(close, int(period))
+            signal = ma_crossover_signal(cache[("sma", combo["fast"])], cache[("sma", combo["slow"])])
+        else:
+            if ("rsi", combo["period"]) not in cache:
+                cache[("rsi", combo["period"])] = rsi(close, int(combo["period"]))
+            signal = rsi_signal(cache[("rsi", combo["period"])], combo["lower"], combo["upper"])
+        results.append({"params": combo, **simulate(open_, close, signal, task["fee_rate"], task["bars_per_year"])})
+    return {
+        "symbol": task["symbol"],
+        "bars": len(close),
+        "simulations": len(results),
+        "cpu_seconds": time.process_time() - started,
+        "results": results,
+    }
@@ -0,0 +1,150 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from services.backtest import run_symbol_sweep, param_grid
+from services.candle_series import INTERVAL_MS
+from services.candle_store import read_resampled
+
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+MAX_COMBINATIONS = 5000
+MAX_JOBS_KEPT = 50
+TOP_RESULTS = 20
+YEAR_MS = 365 * 24 * 60 * 60 * 1000
+
+_executor = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Spawned, not forked: the API process already runs Motor, Redis
+        # and event loop threads, whose locks a fork would copy mid-use
+        _executor = ProcessPoolExecutor(
+            max_workers=BACKTEST_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class BacktestJobs:
+    """
+    Runs parameter sweeps in the background: candles are read once per
+    symbol on the event loop, then each symbol's sweep runs in the
+    process pool. Finished jobs are kept in memory (newest MAX_JOBS_KEPT).
+    """
+
+    def __init__(self):
+        self.jobs = OrderedDict()
+
+    def submit(self, symbols, interval: str, start: datetime, end: datetime,
+               strategy: str, params: dict, fee_rate: float) -> dict:
+        combos = list(param_grid(strategy, params))
+        if not combos:
+            raise ValueError("Parameter grid has no valid combinations")
+        if len(combos) * len(symbols) > MAX_COMBINATIONS:
+            raise ValueError(f"Sweep too large: {len(combos) * len(symbols)} runs (max {MAX_COMBINATIONS})")
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "running",
+            "created_at": datetime.now(timezone.utc),
+            "symbols": symbols,
+            "interval": interval,
+            "start": start,
+            "end": end,
+            "strategy": strategy,
+            "combinations": len(combos),
+            "fee_rate": fee_rate,
+            "done": 0,
+        }
+        self.jobs[job["id"]] = job
+        while len(self.jobs) > MAX_JOBS_KEPT:
+            self.jobs.popitem(last=False)
+        job["task"] = asyncio.create_task(self._run(job, combos))
+        return job
+
+    async def _run(self, job: dict, combos):
+        started = time.monotonic()
+        try:
+            series = await asyncio.gather(*(
+                read_resampled(symbol, job["interval"], job["start"], job["end"])
+                for symbol in job["symbols"]
+            ))
+            loop = asyncio.get_running_loop()
+            futures = [
+                loop.run_in_executor(get_executor(), run_symbol_sweep, {
+                    "symbol": s.symbol,
+                    "strategy": job["strategy"],
+                    "combos": combos,
+                    "open": s.open,
+                    "close": s.close,
+                    "fee_rate": job["fee_rate"],
+                    "bars_per_year": YEAR_MS / INTERVAL_MS[job["interval"]],
+                })
+                for s in series if len(s) >= 2
+            ]
+            job["skipped"] = [s.symbol for s in series if len(s) < 2]
+
+            sweeps = []
+            for future in asyncio.as_completed(futures):
+                sweeps.append(await future)
+                job["done"] += 1
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            print(f"❌ Backtest {job['id']} failed: {e}")
+            return
+
+        wall = time.monotonic() - started
+        cpu = sum(sweep["cpu_seconds"] for sweep in sweeps)
+        bars_simulated = sum(sweep["bars"] * sweep["simulations"] for sweep in sweeps)
+        runs = [{"symbol": sweep["symbol"], **result} for sweep in sweeps for result in sweep["results"]]
+        runs.sort(key=lambda run: run["total_return"], reverse=True)
+        best = {}
+        for run in runs:
+            best.setdefault(run["symbol"], run)
+
+        job.update({
+            "status": "finished",
+            "report": {
+                "symbols": len(sweeps),
+                "simulations": len(runs),
+                "bars_simulated": bars_simulated,
+                "workers": BACKTEST_WORKERS,
+                "wall_seconds": round(wall, 3),
+                "cpu_seconds": round(cpu, 3),
+                "bars_per_second_per_core": round(bars_simulated / cpu) if cpu else None,
+                "bars_per_second": round(bars_simulated / wall) if wall else None,
+            },
+            "best_per_symbol": list(best.values()),
+            "top": runs[:TOP_RESULTS],
+        })
+
+    def get(self, job_id: str):
+        job = self.jobs.get(job_id)
+        return self.public(job) if job else None
+
+    def list(self):
+        return [
+            {k: job.get(k) for k in ("id", "status", "created_at", "strategy", "interval", "symbols", "combinations")}
+            for job in reversed(self.jobs.values())
+        ]
+
+    @staticmethod
+    def public(job: dict) -> dict:
+        return {k: v for k, v in job.items() if k != "task"}
+
+
+backtest_jobs = BacktestJobs()
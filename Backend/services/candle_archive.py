@@ -0,0 +1,244 @@
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from services.candle_series import CandleSeries, INTERVAL_MS, FIELDS
+
+# Closed bars older than CANDLE_ARCHIVE_AFTER_DAYS move from Mongo to
+# column files under CANDLE_ARCHIVE_DIR (see archive_candles in candle_store)
+CANDLE_ARCHIVE = os.getenv("CANDLE_ARCHIVE", "0") == "1"
+CANDLE_ARCHIVE_DIR = os.getenv("CANDLE_ARCHIVE_DIR", "candle_archive")
+CANDLE_ARCHIVE_AFTER_DAYS = int(os.getenv("CANDLE_ARCHIVE_AFTER_DAYS", "90"))
+
+COLUMNS = ("time", *FIELDS)
+MANIFEST = "manifest.json"
+LOCK = ".lock"
+ARCHIVE_VERSION = 1
+# Bars per chunk when streaming archived ranges
+ARCHIVE_BATCH_SIZE = 5000
+
+
+class CandleArchive:
+    """
+    Cold candle history on local disk, one directory per symbol and
+    interval holding a .npy file per column (int64 open times in epoch ms,
+    float64 prices and volume) plus a manifest.
+
+    Every write produces a new generation of column files next to the old
+    ones, then rewrites the manifest to point at it; the generation before
+    is kept for readers that loaded the previous manifest. Readers
+    memory-map the columns the manifest names and only trust the first
+    `manifest["bars"]` rows, so a reader racing a write sees either the
+    old or the new history, never a mix.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._series = {}
+
+    def _path(self, symbol: str, interval: str = None):
+        # Symbols come from request paths; never let them leave the root
+        if not symbol.isalnum() or (interval is not None and interval not in INTERVAL_MS):
+            return None
+        if interval is None:
+            return os.path.join(self.root, symbol)
+        return os.path.join(self.root, symbol, interval)
+
+    def manifest(self, symbol: str, interval: str):
+        path = self._path(symbol, interval)
+        if path is None:
+            return None
+        try:
+            with open(os.path.join(path, MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def series(self, symbol: str, interval: str):
+        """
+        The archived bars as a memory-mapped CandleSeries, or None. Mapped
+        files are reused until the manifest changes.
+        """
+        path = self._path(symbol, interval)
+        if path is None:
+            return None
+        try:
+            stamp = os.stat(os.path.join(path, MANIFEST)).st_mtime_ns
+        except FileNotFoundError:
+            self._series.pop((symbol, interval), None)
+            return None
+        cached = self._series.get((symbol, interval))
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        manifest = self.manifest(symbol, interval)
+        columns = self._load_columns(path, manifest)
+        series = CandleSeries(symbol, interval, *columns)
+        self._series[(symbol, interval)] = (stamp, series)
+        return series
+
+    def coverage(self, symbol: str) -> dict:
+        """
+        Earliest archived bar time (epoch ms) per interval for a symbol.
+        """
+        path = self._path(symbol)
+        if path is None or not os.path.isdir(path):
+            return {}
+        coverage = {}
+        for interval in os.listdir(path):
+            manifest = self.manifest(symbol, interval) if interval in INTERVAL_MS else None
+            if manifest and manifest["bars"]:
+                coverage[interval] = manifest["first"]
+        return coverage
+
+    def append(self, series: CandleSeries) -> int:
+        """
+        Merges bars into the archive; a bar replaces an archived bar with
+        the same open time. Returns how many bars were written.
+        """
+        path = self._path(series.symbol, series.interval)
+        if path is None:
+            raise ValueError(f"Cannot archive {series.symbol} {series.interval}")
+        if not len(series):
+            return 0
+        os.makedirs(path, exist_ok=True)
+        with self._locked(path):
+            manifest = self.manifest(series.symbol, series.interval)
+            new = [np.asarray(getattr(series, name)) for name in COLUMNS]
+            if manifest:
+                old = self._load_columns(path, manifest)
+                times = np.concatenate([old[0], new[0]])
+                # Stable sort puts the new copy of a duplicated bar last; keep that one
+                order = np.argsort(times, kind="stable")
+                ordered = times[order]
+                keep = order[np.append(ordered[1:] != ordered[:-1], True)]
+                columns = [np.concatenate([o, n])[keep] for o, n in zip(old, new)]
+            else:
+                columns = new
+
+            generation = (manifest.get("generation") or 0) + 1 if manifest else 1
+            for name, column in zip(COLUMNS, columns):
+                tmp = os.path.join(path, f"{name}.{os.getpid()}.tmp")
+                with open(tmp, "wb") as f:
+                    np.save(f, np.ascontiguousarray(column))
+                os.replace(tmp, os.path.join(path, self._column_file(name, generation)))
+
+            self._write_manifest(path, {
+                "version": ARCHIVE_VERSION,
+                "symbol": series.symbol,
+                "interval": series.interval,
+                "generation": generation,
+                "bars": len(columns[0]),
+                "first": int(columns[0][0]),
+                "last": int(columns[0][-1]),
+                "updated_at": int(time.time() * 1000),
+            })
+            previous = manifest.get("generation") if manifest else None
+            keep = {self._column_file(name, g) for name in COLUMNS for g in (generation, previous)}
+            for file in os.listdir(path):
+                if file.endswith(".npy") and file not in keep:
+                    os.remove(os.path.join(path, file))
+            return len(series)
+
+    @staticmethod
+    def _column_file(name: str, generation) -> str:
+        # Archives written before generations existed use plain names
+        return f"{name}.{generation}.npy" if generation else f"{name}.npy"
+
+    def _load_columns(self, path: str, manifest: dict):
+        generation = manifest.get("generation")
+        return [
+            np.load(os.path.join(path, self._column_file(name, generation)), mmap_mode="r")[:manifest["bars"]]
+            for name in COLUMNS
+        ]
+
+    @staticmethod
+    def _write_manifest(path: str, manifest: dict):
+        tmp = os.path.join(path, f"{MANIFEST}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(path, MANIFEST))
+
+    @staticmethod
+    @contextmanager
+    def _locked(path: str):
+        # Several API workers may run the archive job at once
+        with open(os.path.join(path, LOCK), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def stats(self) -> dict:
+        series = bars = size = 0
+        if os.path.isdir(self.root):
+            for symbol in os.listdir(self.root):
+                for interval in self.coverage(symbol):
+                    manifest = self.manifest(symbol, interval)
+                    series += 1
+                    bars += manifest["bars"]
+                    path = self._path(symbol, interval)
+                    size += sum(
+                        os.path.getsize(os.path.join(path, self._column_file(name, manifest.get("generation"))))
+                        for name in COLUMNS
+                    )
+        return {"dir": os.path.abspath(self.root), "series": series, "bars": bars, "bytes": size}
+
+
+class TieredCandleStore:
+    """
+    Serves archived bars from disk and everything after them from the hot
+    store, as one store. Bars at or before the archive's last bar always
+    come from the archive, so a late re-sync of an archived range cannot
+    show up twice; those hot copies are merged into the archive on the
+    next archive run.
+    Writes go to the hot store.
+    """
+
+    def __init__(self, store, archive: CandleArchive):
+        self.store = store
+        self.archive = archive
+        self.name = store.name
+
+    async def coverage(self, symbol: str) -> dict:
+        coverage = await self.store.coverage(symbol)
+        for interval, first in self.archive.coverage(symbol).items():
+            coverage[interval] = min(first, coverage.get(interval, first))
+        return coverage
+
+    async def times(self, symbol: str, interval: str, start_ms: int, end_ms: int):
+        cold = self.archive.series(symbol, interval)
+        if cold is None or not len(cold):
+            return await self.store.times(symbol, interval, start_ms, end_ms)
+        last = int(cold.time[-1])
+        parts = [cold.between(start_ms, min(end_ms, last)).time]
+        if end_ms > last:
+            parts.append(await self.store.times(symbol, interval, max(start_ms, last + 1), end_ms))
+        return np.concatenate(parts)
+
+    async def read(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> CandleSeries:
+        batches = [batch async for batch in self.iter_batches(symbol, interval, start_ms, end_ms)]
+        return CandleSeries.concat(symbol, interval, batches)
+
+    async def iter_batches(self, symbol: str, interval: str, start_ms: int, end_ms: int, batch_size=None):
+        cold = self.archive.series(symbol, interval)
+        if cold is not None and len(cold):
+            last = int(cold.time[-1])
+            if start_ms <= last:
+                for batch in cold.between(start_ms, min(end_ms, last)).chunks(batch_size or ARCHIVE_BATCH_SIZE):
+                    yield batch
+            start_ms = max(start_ms, last + 1)
+        if start_ms <= end_ms:
+            async for batch in self.store.iter_batches(symbol, interval, start_ms, end_ms):
+                yield batch
+
+    async def upsert_bars(self, rows) -> dict:
+        return await self.store.upsert_bars(rows)
+
+
+candle_archive = CandleArchive(CANDLE_ARCHIVE_DIR)
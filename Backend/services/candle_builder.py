@@ -0,0 +1,289 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from services.candle_series import CandleSeries, INTERVAL_MS
+from services.candle_store import candle_store, hot_store
+
+# Subscribe to <symbol>@kline_1m alongside the ticker streams
+LIVE_CANDLES = os.getenv("LIVE_CANDLES", "1") == "1"
+BASE_INTERVAL = "1m"
+BASE_INTERVAL_MS = 60_000
+# Higher intervals built from closed 1m bars, in milliseconds (UTC aligned like Binance)
+ROLLUP_INTERVALS = {
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "1h": 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+}
+CANDLE_FLUSH_INTERVAL = 1.0
+# Lease on persisting live candles when every process ingests the feed
+# itself (PRICE_FEED_MODE=local)
+CANDLE_WRITER_KEY = "candles:writer"
+CANDLE_WRITER_TTL = 15
+# Closed minutes other processes keep, so the next writer can persist any
+# its predecessor did not get to
+WRITER_HANDOVER_MS = 2 * CANDLE_WRITER_TTL * 1000
+ROLLUP_READ_CONCURRENCY = 16
+
+
+def bucket_start(ts_ms: int, size_ms: int) -> int:
+    return ts_ms - ts_ms % size_ms
+
+
+def parse_kline(k: dict) -> dict:
+    return {
+        "t": int(k["t"]),
+        "o": Decimal(k["o"]),
+        "h": Decimal(k["h"]),
+        "l": Decimal(k["l"]),
+        "c": Decimal(k["c"]),
+        "v": Decimal(k["v"]),
+        "x": bool(k.get("x")),
+    }
+
+
+def merge_bar(agg: dict, bar: dict) -> dict:
+    """
+    Folds a later bar into an aggregate covering an earlier time span.
+    """
+    if agg is None:
+        return dict(bar)
+    agg["h"] = max(agg["h"], bar["h"])
+    agg["l"] = min(agg["l"], bar["l"])
+    agg["c"] = bar["c"]
+    agg["v"] = agg["v"] + bar["v"]
+    return agg
+
+
+def bar_to_dict(symbol: str, interval: str, bar: dict, closed: bool) -> dict:
+    return {
+        "symbol": symbol,
+        "interval": interval,
+        "time": datetime.fromtimestamp(bar["t"] / 1000, tz=timezone.utc),
+        "open": float(bar["o"]),
+        "high": float(bar["h"]),
+        "low": float(bar["l"]),
+        "close": float(bar["c"]),
+        "volume": float(bar["v"]),
+        "closed": closed,
+    }
+
+
+class CandleBuilder:
+    """
+    Builds candles from the @kline_1m streams.
+
+    Every process keeps the forming 1m bar per symbol, plus running
+    aggregates of the closed minutes in the current higher-interval
+    buckets, so the forming bar of any rollup interval is served from
+    memory.
+
+    One process persists each closed 1m bar: the feed leader in redis
+    mode, or the holder of `lease` when every process ingests. Each 5m..1d
+    bar a flush touches is then recomputed from the stored bars of the
+    next finer interval, 1m first, and written whole with $set, so
+    repeated or overlapping flushes leave the same bars. A bucket with a
+    hole in its finer bars (streaming started mid-way, an outage) is not
+    written until the hole is filled.
+    """
+
+    def __init__(self):
+        self.forming = {}
+        self.rollups = {}
+        self.last_closed = {}
+        self.pending = []
+        self.lease = None
+        self.is_writer = None
+        self.persisted = 0
+        self.rollups_written = 0
+        self.rollups_incomplete = 0
+        self.flushes = 0
+
+    def update_forming(self, symbol: str, k: dict):
+        """
+        Applies a kline update to the in-memory bars (every process).
+        """
+        bar = parse_kline(k)
+        self.forming[symbol] = bar
+        if not bar["x"] or self.last_closed.get(symbol, -1) >= bar["t"]:
+            return
+        self.last_closed[symbol] = bar["t"]
+        for interval, size_ms in ROLLUP_INTERVALS.items():
+            start = bucket_start(bar["t"], size_ms)
+            agg = self.rollups.get((symbol, interval))
+            if agg is None or agg["t"] != start:
+                # "first": the earliest minute this process aggregated itself
+                agg = dict(bar, first=bar["t"])
+            else:
+                agg = merge_bar(agg, bar)
+            agg["t"] = start
+            self.rollups[(symbol, interval)] = agg
+
+    def record_kline(self, symbol: str, k: dict):
+        """
+        Queues a closed 1m bar for persistence (ingesting process only).
+        """
+        if k.get("x"):
+            self.pending.append((symbol, parse_kline(k)))
+
+    def open_minute(self, symbol: str):
+        """
+        The raw 1m bar still in progress, which is never persisted.
+        """
+        minute = self.forming.get(symbol)
+        return minute if minute and not minute["x"] else None
+
+    def forming_bar(self, symbol: str, interval: str = BASE_INTERVAL):
+        minute = self.forming.get(symbol)
+        if interval == BASE_INTERVAL:
+            return bar_to_dict(symbol, interval, minute, minute["x"]) if minute else None
+
+        size_ms = ROLLUP_INTERVALS.get(interval)
+        if size_ms is None:
+            return None
+        agg = self.rollups.get((symbol, interval))
+        current = bucket_start(minute["t"], size_ms) if minute else None
+        if agg is not None and agg["t"] != current:
+            agg = None
+        bar = dict(agg) if agg else None
+        if minute and not minute["x"]:
+            bar = merge_bar(bar, minute)
+            bar["t"] = current
+        return bar_to_dict(symbol, interval, bar, False) if bar else None
+
+    async def forming_series(self, symbol: str, interval: str):
+        """
+        The forming bar of a 1m or rollup interval as a one-bar
+        CandleSeries (empty if nothing is forming), or None for intervals
+        the builder does not aggregate. A rollup bar is built from the
+        stored 1m bars of its bucket before the first minute this process
+        aggregated, then the running aggregate and the open minute, so it
+        is whole even before a flush wrote the bucket or while a hole
+        keeps the stored bar from being written.
+        """
+        if interval != BASE_INTERVAL and interval not in ROLLUP_INTERVALS:
+            return None
+        minute = self.forming.get(symbol)
+        series = CandleSeries.empty(symbol, interval)
+        if minute is None:
+            return series
+        if interval == BASE_INTERVAL:
+            return series if minute["x"] else series.fold(minute)
+
+        start = bucket_start(minute["t"], ROLLUP_INTERVALS[interval])
+        agg = self.rollups.get((symbol, interval))
+        if agg is not None and agg["t"] != start:
+            agg = None
+        first = agg["first"] if agg else minute["t"]
+        series = (await candle_store.read(symbol, BASE_INTERVAL, start, first - 1)).resample(interval)
+        for bar in (agg, None if minute["x"] else minute):
+            if bar is not None:
+                series = series.fold(bar)
+        return series
+
+    async def _holds_lease(self) -> bool:
+        if self.lease is None:
+            return True
+        try:
+            self.is_writer = await self.lease.acquire()
+        except Exception as e:
+            # Writes are idempotent, so without Redis every process writes
+            print(f"⚠️ Candle writer lease unavailable, writing anyway: {e}")
+            self.is_writer = True
+        return self.is_writer
+
+    async def _recompute(self, interval: str, source: str, buckets: dict, skipped: dict):
+        """
+        Rows for the `interval` bars in `buckets` ({symbol: {bucket open:
+        latest new minute}}), aggregated from the stored `source` bars.
+        Buckets whose source bars do not run without a hole from the
+        bucket open through that minute, or that contain a source bucket
+        left out itself (`skipped`, {symbol: opens}), are left out and
+        added to `skipped`.
+        """
+        size_ms = ROLLUP_INTERVALS[interval]
+        step_ms = INTERVAL_MS[source]
+        semaphore = asyncio.Semaphore(ROLLUP_READ_CONCURRENCY)
+
+        async def rows_for(symbol: str, starts):
+            async with semaphore:
+                series = await hot_store.read(symbol, source, min(starts), max(starts) + size_ms - 1)
+            rows = []
+            left_out = skipped.get(symbol, set())
+            for start, minute in sorted(starts.items()):
+                bars = series.between(start, start + size_ms - 1)
+                if (not len(bars) or bars.time[0] != start or bars.time[-1] < bucket_start(minute, step_ms)
+                        or (bars.time[-1] - start) // step_ms + 1 != len(bars)
+                        or any(start <= t < start + size_ms for t in left_out)):
+                    skipped.setdefault(symbol, set()).add(start)
+                    self.rollups_incomplete += 1
+                    continue
+                rows.append((symbol, interval, {
+                    "t": start,
+                    "o": str(float(bars.open[0])),
+                    "h": str(float(bars.high.max())),
+                    "l": str(float(bars.low.min())),
+                    "c": str(float(bars.close[-1])),
+                    "v": str(float(bars.volume.sum())),
+                }))
+            return rows
+
+        results = await asyncio.gather(*(rows_for(symbol, starts) for symbol, starts in buckets.items()))
+        return [row for rows in results for row in rows]
+
+    async def flush(self):
+        if not await self._holds_lease():
+            # Another process writes the same minutes; keep only the recent
+            # ones in case this one takes over the lease
+            cutoff = int(time.time() * 1000) - WRITER_HANDOVER_MS - BASE_INTERVAL_MS
+            self.pending = [item for item in self.pending if item[1]["t"] >= cutoff]
+            return
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            await candle_store.upsert_bars([(symbol, BASE_INTERVAL, bar) for symbol, bar in batch])
+            source = BASE_INTERVAL
+            skipped = {}
+            for interval, size_ms in ROLLUP_INTERVALS.items():
+                buckets = {}
+                for symbol, bar in batch:
+                    starts = buckets.setdefault(symbol, {})
+                    start = bucket_start(bar["t"], size_ms)
+                    starts[start] = max(starts.get(start, bar["t"]), bar["t"])
+                rows = await self._recompute(interval, source, buckets, skipped)
+                await candle_store.upsert_bars(rows)
+                self.rollups_written += len(rows)
+                source = interval
+        except Exception:
+            # Safe to write again: the next flush retries the whole batch
+            self.pending = batch + self.pending
+            raise
+        self.persisted += len(batch)
+        self.flushes += 1
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(CANDLE_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Live candle flush failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self.forming),
+            "pending": len(self.pending),
+            "writer": self.is_writer,
+            "persisted": self.persisted,
+            "rollups_written": self.rollups_written,
+            "rollups_incomplete": self.rollups_incomplete,
+            "flushes": self.flushes,
+        }
+
+
+candle_builder = CandleBuilder()
@@ -0,0 +1,303 @@
+import os
+import time
+
+import numpy as np
+
+from services.candle_series import CandleSeries, INTERVAL_MS, FIELDS
+from services.redis_client import async_redis_binary
+
+CANDLE_CACHE = os.getenv("CANDLE_CACHE", "1") == "1"
+# Bars per cached window; windows are aligned to multiples of their span
+CACHE_WINDOW_BARS = 500
+# TTL for windows entirely in the past, and for the window still filling up
+CANDLE_CACHE_TTL = int(os.getenv("CANDLE_CACHE_TTL", "3600"))
+CANDLE_CACHE_OPEN_TTL = int(os.getenv("CANDLE_CACHE_OPEN_TTL", "30"))
+# Byte budget across all windows; least recently used windows go first
+CANDLE_CACHE_MAX_BYTES = int(os.getenv("CANDLE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Contiguous missing windows read from the store with one query
+MAX_WINDOWS_PER_READ = 20
+
+KEY_PREFIX = "candles:win"
+LRU_KEY = "candles:cache:lru"
+SIZES_KEY = "candles:cache:sizes"
+BYTES_KEY = "candles:cache:bytes"
+STATS_KEY = "candles:cache:stats"
+RECONCILE_KEY = "candles:cache:reconciled"
+GEN_PREFIX = "candles:gen:"
+# Seconds between recounts of the byte total while over budget
+RECONCILE_INTERVAL = 60
+# How long an invalidation is remembered; far longer than any fill takes
+GEN_TTL = 600
+
+# KEYS: window, lru, sizes, bytes, generation, reconciled
+# ARGV: value, ttl, now, budget, generation read before the fill, reconcile interval
+# Returns windows evicted, or -1 if the window was invalidated meanwhile.
+STORE_SCRIPT = """
+if (redis.call('GET', KEYS[5]) or '') ~= ARGV[5] then
+    return -1
+end
+local size = string.len(ARGV[1])
+local old = tonumber(redis.call('HGET', KEYS[3], KEYS[1]) or '0')
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], KEYS[1])
+redis.call('HSET', KEYS[3], KEYS[1], size)
+local total = redis.call('INCRBY', KEYS[4], size - old)
+local budget = tonumber(ARGV[4])
+if total > budget and redis.call('SET', KEYS[6], '1', 'NX', 'EX', ARGV[6]) then
+    -- Windows that expired by TTL are still counted; forget them and recount
+    total = 0
+    local sizes = redis.call('HGETALL', KEYS[3])
+    for i = 1, #sizes, 2 do
+        if redis.call('EXISTS', sizes[i]) == 1 then
+            total = total + tonumber(sizes[i + 1])
+        else
+            redis.call('ZREM', KEYS[2], sizes[i])
+            redis.call('HDEL', KEYS[3], sizes[i])
+        end
+    end
+    redis.call('SET', KEYS[4], total)
+end
+local evicted = 0
+while total > budget do
+    local oldest = redis.call('ZRANGE', KEYS[2], 0, 0)
+    if #oldest == 0 or oldest[1] == KEYS[1] then break end
+    local freed = tonumber(redis.call('HGET', KEYS[3], oldest[1]) or '0')
+    redis.call('ZREM', KEYS[2], oldest[1])
+    redis.call('HDEL', KEYS[3], oldest[1])
+    redis.call('DEL', oldest[1])
+    total = redis.call('INCRBY', KEYS[4], -freed)
+    evicted = evicted + 1
+end
+return evicted
+"""
+
+# KEYS: lru, sizes, bytes, windows...  ARGV: generation prefix, generation TTL
+DROP_SCRIPT = """
+local freed = 0
+for i = 4, #KEYS do
+    freed = freed + tonumber(redis.call('HGET', KEYS[2], KEYS[i]) or '0')
+    redis.call('ZREM', KEYS[1], KEYS[i])
+    redis.call('HDEL', KEYS[2], KEYS[i])
+    redis.call('DEL', KEYS[i])
+    -- Fills that read the store before this write must not store the window
+    local gen = ARGV[1] .. KEYS[i]
+    redis.call('INCR', gen)
+    redis.call('EXPIRE', gen, ARGV[2])
+end
+if freed > 0 then
+    redis.call('INCRBY', KEYS[3], -freed)
+end
+return freed
+"""
+
+BAR_BYTES = 8 * (1 + len(FIELDS))
+
+
+def window_span(interval: str) -> int:
+    return CACHE_WINDOW_BARS * INTERVAL_MS[interval]
+
+
+def window_start(interval: str, ts_ms: int) -> int:
+    return ts_ms - ts_ms % window_span(interval)
+
+
+def window_key(symbol: str, interval: str, start_ms: int) -> str:
+    return f"{KEY_PREFIX}:{symbol}:{interval}:{start_ms}"
+
+
+def encode_window(series: CandleSeries) -> bytes:
+    parts = [series.time.astype("<i8").tobytes()]
+    parts.extend(getattr(series, f).astype("<f8").tobytes() for f in FIELDS)
+    return b"".join(parts)
+
+
+def decode_window(symbol: str, interval: str, value: bytes) -> CandleSeries:
+    count = len(value) // BAR_BYTES
+    columns = [np.frombuffer(value, dtype="<i8", count=count)]
+    for i in range(len(FIELDS)):
+        columns.append(np.frombuffer(value, dtype="<f8", count=count, offset=8 * count * (i + 1)))
+    return CandleSeries(symbol, interval, *columns)
+
+
+class CachedCandleStore:
+    """
+    Read-through Redis cache in front of a candle store.
+
+    Ranges are split into fixed windows of CACHE_WINDOW_BARS bars per
+    (symbol, interval). Each window is cached whole as packed arrays, so
+    overlapping requests share entries. Windows still filling up get a
+    short TTL. Total size is kept under CANDLE_CACHE_MAX_BYTES by evicting
+    the least recently read windows; while over budget the byte total is
+    recounted now and then, so windows that expired by TTL stop counting.
+    Writes through this store drop the windows they touch for every
+    process, since the cache lives in Redis, and bump each window's
+    generation: a fill only stores a window if its generation is still
+    the one read before the store query.
+
+    Any Redis error falls back to the underlying store.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.name = store.name
+        self.hits = 0
+        self.misses = 0
+        self.store_reads = 0
+        self.bars_from_cache = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_fills = 0
+        self.errors = 0
+
+    async def coverage(self, symbol: str) -> dict:
+        return await self.store.coverage(symbol)
+
+    async def times(self, symbol: str, interval: str, start_ms: int, end_ms: int):
+        # Scans for gaps would only churn the cache
+        return await self.store.times(symbol, interval, start_ms, end_ms)
+
+    async def read(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> CandleSeries:
+        batches = [batch async for batch in self.iter_batches(symbol, interval, start_ms, end_ms)]
+        return CandleSeries.concat(symbol, interval, batches)
+
+    async def iter_batches(self, symbol: str, interval: str, start_ms: int, end_ms: int, batch_size=None):
+        if interval not in INTERVAL_MS:
+            async for batch in self.store.iter_batches(symbol, interval, start_ms, end_ms):
+                yield batch
+            return
+
+        span = window_span(interval)
+        starts = list(range(window_start(interval, start_ms), end_ms + 1, span))
+        keys = [window_key(symbol, interval, start) for start in starts]
+        try:
+            values = await async_redis_binary.mget(keys)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Candle cache read failed: {e}")
+            async for batch in self.store.iter_batches(symbol, interval, start_ms, end_ms):
+                yield batch
+            return
+
+        hit_keys = [key for key, value in zip(keys, values) if value is not None]
+        await self._record_lookup(hit_keys, len(keys) - len(hit_keys))
+
+        i = 0
+        while i < len(starts):
+            if values[i] is not None:
+                window = decode_window(symbol, interval, values[i])
+                self.bars_from_cache += len(window)
+                i += 1
+            else:
+                # Fill a run of missing windows with one store query
+                j = i
+                while j < len(starts) and values[j] is None and j - i < MAX_WINDOWS_PER_READ:
+                    j += 1
+                window = await self._fill(symbol, interval, starts[i:j], span)
+                i = j
+            window = window.between(start_ms, end_ms)
+            if len(window):
+                yield window
+
+    async def _fill(self, symbol: str, interval: str, starts, span: int) -> CandleSeries:
+        keys = [window_key(symbol, interval, start) for start in starts]
+        try:
+            generations = await async_redis_binary.mget([GEN_PREFIX + key for key in keys])
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Candle cache read failed: {e}")
+            generations = None
+        series = await self.store.read(symbol, interval, starts[0], starts[-1] + span - 1)
+        self.store_reads += 1
+        if generations is None:
+            return series
+        now_ms = int(time.time() * 1000)
+        for start, key, generation in zip(starts, keys, generations):
+            window = series.between(start, start + span - 1)
+            ttl = CANDLE_CACHE_OPEN_TTL if start + span > now_ms - INTERVAL_MS[interval] else CANDLE_CACHE_TTL
+            try:
+                evicted = await async_redis_binary.eval(
+                    STORE_SCRIPT, 6,
+                    key, LRU_KEY, SIZES_KEY, BYTES_KEY, GEN_PREFIX + key, RECONCILE_KEY,
+                    encode_window(window), ttl, time.time(), CANDLE_CACHE_MAX_BYTES,
+                    generation or b"", RECONCILE_INTERVAL,
+                )
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Candle cache write failed: {e}")
+                break
+            if evicted < 0:
+                self.stale_fills += 1
+            else:
+                self.evictions += evicted
+        return series
+
+    async def _record_lookup(self, hit_keys, misses: int):
+        self.hits += len(hit_keys)
+        self.misses += misses
+        try:
+            async with async_redis_binary.pipeline(transaction=False) as pipe:
+                if hit_keys:
+                    now = time.time()
+                    pipe.zadd(LRU_KEY, {key: now for key in hit_keys})
+                    pipe.hincrby(STATS_KEY, "hits", len(hit_keys))
+                if misses:
+                    pipe.hincrby(STATS_KEY, "misses", misses)
+                await pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Candle cache stats update failed: {e}")
+
+    async def upsert_bars(self, rows) -> dict:
+        result = await self.store.upsert_bars(rows)
+        await self.invalidate(rows)
+        return result
+
+    async def invalidate(self, rows):
+        keys = {
+            window_key(symbol, interval, window_start(interval, bar["t"]))
+            for symbol, interval, bar in rows
+            if interval in INTERVAL_MS
+        }
+        if not keys:
+            return
+        try:
+            await async_redis_binary.eval(
+                DROP_SCRIPT, 3 + len(keys), LRU_KEY, SIZES_KEY, BYTES_KEY, *keys, GEN_PREFIX, GEN_TTL
+            )
+            self.invalidations += len(keys)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Candle cache invalidation failed: {e}")
+
+    async def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        local = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "store_reads": self.store_reads,
+            "bars_from_cache": self.bars_from_cache,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_fills": self.stale_fills,
+            "errors": self.errors,
+        }
+        try:
+            shared = await async_redis_binary.hgetall(STATS_KEY)
+            total_bytes = await async_redis_binary.get(BYTES_KEY)
+            windows = await async_redis_binary.zcard(LRU_KEY)
+        except Exception as e:
+            return {"process": local, "error": str(e)}
+        hits = int(shared.get(b"hits", 0))
+        misses = int(shared.get(b"misses", 0))
+        return {
+            "process": local,
+            "all_processes": {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            },
+            "windows": windows,
+            "bytes": int(total_bytes or 0),
+            "max_bytes": CANDLE_CACHE_MAX_BYTES,
+        }
@@ -0,0 +1,121 @@
+"""
+Streaming encoders for /candles responses. Each encoder turns an async
+iterable of CandleSeries chunks into response bytes as they arrive, so a
+large range starts flowing before the whole result is read.
+
+packed layout (little-endian, every array 8-byte aligned so a browser can
+wrap it in typed arrays without copying):
+    b"CCPK\\x01\\x00\\x00\\x00"              magic + version, once
+    then per chunk:
+        uint32 count, uint32 reserved
+        int64[count]   open time, epoch ms   (BigInt64Array)
+        float64[count] open, high, low, close, volume, one array each
+"""
+import io
+import json
+import math
+import struct
+
+import numpy as np
+
+from services.candle_series import FIELDS
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+PACKED_MAGIC = b"CCPK\x01\x00\x00\x00"
+PACKED_CHUNK_HEADER = struct.Struct("<II")
+
+
+def _iso_times(chunk):
+    # Same text FastAPI's encoder produces for aware UTC datetimes
+    return [t + "+00:00" for t in np.datetime_as_string(chunk.time.astype("datetime64[ms]"), unit="s")]
+
+
+def _json_number(x: float) -> str:
+    # NaN and infinities are not valid JSON
+    return repr(x) if math.isfinite(x) else "null"
+
+
+def _json_rows(chunk):
+    prefix = '{"symbol":%s,"interval":%s,"time":"' % (json.dumps(chunk.symbol), json.dumps(chunk.interval))
+    columns = []
+    for f in FIELDS:
+        column = getattr(chunk, f)
+        # str() of a finite float is its repr; only convert when needed
+        columns.append(column.tolist() if np.isfinite(column).all() else [_json_number(x) for x in column.tolist()])
+    for t, o, h, l, c, v in zip(_iso_times(chunk), *columns):
+        yield f'{prefix}{t}","open":{o},"high":{h},"low":{l},"close":{c},"volume":{v}}}'
+
+
+async def encode_json(chunks):
+    yield b"["
+    first = True
+    async for chunk in chunks:
+        if not len(chunk):
+            continue
+        body = ",".join(_json_rows(chunk))
+        yield (body if first else "," + body).encode()
+        first = False
+    yield b"]"
+
+
+async def encode_ndjson(chunks):
+    async for chunk in chunks:
+        if len(chunk):
+            yield ("\n".join(_json_rows(chunk)) + "\n").encode()
+
+
+async def encode_packed(chunks):
+    yield PACKED_MAGIC
+    async for chunk in chunks:
+        if not len(chunk):
+            continue
+        parts = [PACKED_CHUNK_HEADER.pack(len(chunk), 0), chunk.time.astype("<i8").tobytes()]
+        parts.extend(getattr(chunk, f).astype("<f8").tobytes() for f in FIELDS)
+        yield b"".join(parts)
+
+
+async def encode_arrow(chunks):
+    """
+    Arrow IPC stream: one record batch per chunk.
+    """
+    schema = pa.schema(
+        [("time", pa.timestamp("ms", tz="UTC"))] + [(f, pa.float64()) for f in FIELDS],
+        metadata={"symbol": "", "interval": ""},
+    )
+    sink = io.BytesIO()
+    writer = None
+    async for chunk in chunks:
+        if writer is None:
+            schema = schema.with_metadata({"symbol": chunk.symbol, "interval": chunk.interval})
+            writer = pa.ipc.new_stream(sink, schema)
+        if len(chunk):
+            writer.write_batch(pa.record_batch(
+                [pa.array(chunk.time, type=pa.timestamp("ms", tz="UTC"))]
+                + [pa.array(getattr(chunk, f)) for f in FIELDS],
+                schema=schema,
+            ))
+        data = sink.getvalue()
+        if data:
+            yield data
+            sink.seek(0)
+            sink.truncate()
+    if writer is None:
+        writer = pa.ipc.new_stream(sink, schema)
+    writer.close()
+    yield sink.getvalue()
+
+
+CANDLE_FORMATS = {
+    "json": ("application/json", encode_json),
+    "ndjson": ("application/x-ndjson", encode_ndjson),
+    "arrow": ("application/vnd.apache.arrow.stream", encode_arrow),
+    "packed": ("application/octet-stream", encode_packed),
+}
+
+
+def format_available(name: str) -> bool:
+    return name in CANDLE_FORMATS and (name != "arrow" or pa is not None)
@@ -0,0 +1,195 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+# Nominal bar length per Binance interval, in milliseconds. 1M is
+# calendar-aligned upstream; the nominal value is only used for sizing.
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 60 * 60_000,
+    "2h": 2 * 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "6h": 6 * 60 * 60_000,
+    "8h": 8 * 60 * 60_000,
+    "12h": 12 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+    "3d": 3 * 24 * 60 * 60_000,
+    "1w": 7 * 24 * 60 * 60_000,
+    "1M": 30 * 24 * 60 * 60_000,
+}
+
+
+DAY_MS = INTERVAL_MS["1d"]
+# Binance weeks open on Monday 00:00 UTC; the epoch fell on a Thursday
+WEEK_OFFSET_MS = 4 * DAY_MS
+
+
+def to_ms(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def from_ms(ts_ms: int) -> datetime:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
+
+
+def bucket_keys(time, interval: str):
+    """
+    Open time of the `interval` bar each timestamp falls in.
+    """
+    if interval == "1M":
+        months = time.astype("datetime64[ms]").astype("datetime64[M]")
+        return months.astype("datetime64[ms]").astype(np.int64)
+    size = INTERVAL_MS[interval]
+    offset = WEEK_OFFSET_MS if interval == "1w" else 0
+    return time - (time - offset) % size
+
+
+def bar_grid(interval: str, start_ms: int, end_ms: int):
+    """
+    Open times of every `interval` bar that opens within [start_ms, end_ms].
+    """
+    if interval == "1M":
+        first = np.array([start_ms], dtype="datetime64[ms]").astype("datetime64[M]")[0]
+        last = np.array([end_ms], dtype="datetime64[ms]").astype("datetime64[M]")[0]
+        grid = np.arange(first, last + 1).astype("datetime64[ms]").astype(np.int64)
+    else:
+        first = int(bucket_keys(np.array([start_ms], dtype=np.int64), interval)[0])
+        grid = np.arange(first, end_ms + 1, INTERVAL_MS[interval], dtype=np.int64)
+    return grid[(grid >= start_ms) & (grid <= end_ms)]
+
+
+def can_resample(source: str, target: str) -> bool:
+    """
+    True when every `target` bar is an exact union of `source` bars.
+    """
+    if source == target:
+        return True
+    if source in ("1w", "1M"):
+        return False
+    if target in ("1w", "1M"):
+        return DAY_MS % INTERVAL_MS[source] == 0
+    return INTERVAL_MS[target] % INTERVAL_MS[source] == 0
+
+
+class CandleSeries:
+    """
+    Columnar OHLCV bars for one symbol and interval: `time` holds bar open
+    times in epoch milliseconds (int64), the price and volume columns are
+    float64, all sorted by time.
+    """
+
+    def __init__(self, symbol: str, interval: str, time=None, open=None, high=None,
+                 low=None, close=None, volume=None):
+        self.symbol = symbol
+        self.interval = interval
+        self.time = np.asarray(time if time is not None else [], dtype=np.int64)
+        self.open = np.asarray(open if open is not None else [], dtype=np.float64)
+        self.high = np.asarray(high if high is not None else [], dtype=np.float64)
+        self.low = np.asarray(low if low is not None else [], dtype=np.float64)
+        self.close = np.asarray(close if close is not None else [], dtype=np.float64)
+        self.volume = np.asarray(volume if volume is not None else [], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.time)
+
+    @classmethod
+    def empty(cls, symbol: str, interval: str):
+        return cls(symbol, interval)
+
+    @classmethod
+    def concat(cls, symbol: str, interval: str, parts):
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty(symbol, interval)
+        return cls(
+            symbol, interval,
+            np.concatenate([p.time for p in parts]),
+            *(np.concatenate([getattr(p, f) for p in parts]) for f in FIELDS)
+        )
+
+    def take(self, index):
+        return CandleSeries(
+            self.symbol, self.interval, self.time[index],
+            *(getattr(self, f)[index] for f in FIELDS)
+        )
+
+    def between(self, start_ms: int, end_ms: int):
+        lo = np.searchsorted(self.time, start_ms, side="left")
+        hi = np.searchsorted(self.time, end_ms, side="right")
+        return self.take(slice(lo, hi))
+
+    def chunks(self, size: int):
+        for i in range(0, len(self), size):
+            yield self.take(slice(i, i + size))
+
+    def tail(self, n: int):
+        return self.take(slice(max(len(self) - n, 0), None))
+
+    def resample(self, interval: str):
+        """
+        Aggregates into a coarser interval: first open, max high, min low,
+        last close and summed volume per bucket, in one pass of reduceat.
+        """
+        if interval == self.interval or not len(self):
+            return CandleSeries(self.symbol, interval, self.time, *(getattr(self, f) for f in FIELDS))
+        keys = bucket_keys(self.time, interval)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+        ends = np.append(starts[1:], len(keys)) - 1
+        return CandleSeries(
+            self.symbol, interval,
+            keys[starts],
+            self.open[starts],
+            np.maximum.reduceat(self.high, starts),
+            np.minimum.reduceat(self.low, starts),
+            self.close[ends],
+            np.add.reduceat(self.volume, starts),
+        )
+
+    def fold(self, bar: dict):
+        """
+        Merges a newer partial bar (keys t/o/h/l/c/v) into the series,
+        extending the last bucket or opening a new one.
+        """
+        key = int(bucket_keys(np.array([bar["t"]], dtype=np.int64), self.interval)[0])
+        o, h, l, c, v = (float(bar[k]) for k in ("o", "h", "l", "c", "v"))
+        if len(self) and self.time[-1] == key:
+            # Fancy indexing copies, so the original series is untouched
+            series = self.take(np.arange(len(self)))
+            series.high[-1] = max(series.high[-1], h)
+            series.low[-1] = min(series.low[-1], l)
+            series.close[-1] = c
+            series.volume[-1] += v
+            return series
+        if len(self) and self.time[-1] > key:
+            return self
+        return CandleSeries.concat(self.symbol, self.interval, [
+            self, CandleSeries(self.symbol, self.interval, [key], [o], [h], [l], [c], [v])
+        ])
+
+    def to_records(self) -> list:
+        """
+        The row format served by /candles: one dict per bar with floats
+        and a UTC datetime.
+        """
+        columns = [getattr(self, f).tolist() for f in FIELDS]
+        return [
+            {
+                "symbol": self.symbol,
+                "interval": self.interval,
+                "time": from_ms(t),
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+                "volume": v,
+            }
+            for t, o, h, l, c, v in zip(self.time.tolist(), *columns)
+        ]
@@ -0,0 +1,552 @@
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import numpy as np
+from bson.binary import Binary
+from bson.decimal128 import Decimal128
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from models import Candle, CandleBucket, CandleSyncTracker
+from services.candle_archive import TieredCandleStore, candle_archive, CANDLE_ARCHIVE, CANDLE_ARCHIVE_AFTER_DAYS
+from services.candle_cache import CachedCandleStore, CANDLE_CACHE, window_start
+from services.candle_series import CandleSeries, INTERVAL_MS, FIELDS, to_ms, from_ms, can_resample, bucket_keys
+
+# "documents": one Candle document per bar (default)
+# "buckets": CandleBucket documents holding packed arrays of bars
+CANDLE_STORAGE = os.getenv("CANDLE_STORAGE", "documents")
+# One UTC day of 1m bars per bucket; other intervals keep the same bar count
+BARS_PER_BUCKET = 1440
+BUCKET_WRITE_RETRIES = 5
+# Upper bound on source bars read to resample one request
+RESAMPLE_MAX_SOURCE_BARS = int(os.getenv("RESAMPLE_MAX_SOURCE_BARS", "500000"))
+COVERAGE_TTL = 60
+# Bars per chunk when streaming a range
+STREAM_BATCH_SIZE = 5000
+
+# Trackers written before intervals were tracked separately belong to 1d
+LEGACY_TRACKER_INTERVAL = "1d"
+
+BAR_KEYS = ("o", "h", "l", "c", "v")
+
+
+def kline_time(kline) -> datetime:
+    return datetime.fromtimestamp(kline[0] / 1000, tz=timezone.utc)
+
+
+def kline_bar(kline) -> dict:
+    return {"t": int(kline[0]), "o": kline[1], "h": kline[2], "l": kline[3], "c": kline[4], "v": kline[5]}
+
+
+def _number(value) -> float:
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    return float(value)
+
+
+def _counts(inserted=0, updated=0, unchanged=0) -> dict:
+    return {"inserted": inserted, "updated": updated, "unchanged": unchanged}
+
+
+class DocumentCandleStore:
+    """
+    One Candle document per bar, keyed by the unique
+    (symbol, interval, candle_time) index.
+    """
+
+    name = "documents"
+
+    async def read(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> CandleSeries:
+        batches = [batch async for batch in self.iter_batches(symbol, interval, start_ms, end_ms)]
+        return CandleSeries.concat(symbol, interval, batches)
+
+    async def iter_batches(self, symbol: str, interval: str, start_ms: int, end_ms: int,
+                           batch_size: int = STREAM_BATCH_SIZE):
+        """
+        Yields the range as CandleSeries chunks straight off a projected
+        raw cursor, skipping Beanie model construction and validators.
+        """
+        cursor = Candle.get_motor_collection().find(
+            {
+                "symbol": symbol,
+                "interval": interval,
+                "candle_time": {"$gte": from_ms(start_ms), "$lte": from_ms(end_ms)},
+            },
+            {"_id": 0, "candle_time": 1, **{f: 1 for f in FIELDS}},
+        ).sort("candle_time", 1).batch_size(batch_size)
+        while True:
+            rows = await cursor.to_list(batch_size)
+            if not rows:
+                break
+            yield CandleSeries(
+                symbol, interval,
+                np.fromiter((to_ms(r["candle_time"]) for r in rows), np.int64, len(rows)),
+                *(np.fromiter((_number(r[f]) for r in rows), np.float64, len(rows)) for f in FIELDS)
+            )
+
+    async def times(self, symbol: str, interval: str, start_ms: int, end_ms: int):
+        """
+        Stored bar open times in the range, answered from the unique
+        (symbol, interval, candle_time) index alone.
+        """
+        cursor = Candle.get_motor_collection().find(
+            {
+                "symbol": symbol,
+                "interval": interval,
+                "candle_time": {"$gte": from_ms(start_ms), "$lte": from_ms(end_ms)},
+            },
+            {"_id": 0, "candle_time": 1},
+        ).sort("candle_time", 1).batch_size(STREAM_BATCH_SIZE)
+        parts = []
+        while True:
+            rows = await cursor.to_list(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+            parts.append(np.fromiter((to_ms(r["candle_time"]) for r in rows), np.int64, len(rows)))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    async def coverage(self, symbol: str) -> dict:
+        """
+        Earliest stored bar time (epoch ms) per interval for a symbol.
+        """
+        collection = Candle.get_motor_collection()
+        coverage = {}
+        for interval in await collection.distinct("interval", {"symbol": symbol}):
+            first = await collection.find_one(
+                {"symbol": symbol, "interval": interval},
+                {"_id": 0, "candle_time": 1},
+                sort=[("candle_time", 1)],
+            )
+            if first:
+                coverage[interval] = to_ms(first["candle_time"])
+        return coverage
+
+    async def symbols(self):
+        return await Candle.get_motor_collection().distinct("symbol")
+
+    def prune_boundary(self, interval: str, ts_ms: int) -> int:
+        return ts_ms
+
+    async def prune(self, symbol: str, interval: str, before_ms: int) -> int:
+        """
+        Deletes bars opened before `before_ms`; returns documents removed.
+        """
+        result = await Candle.get_motor_collection().delete_many({
+            "symbol": symbol,
+            "interval": interval,
+            "candle_time": {"$lt": from_ms(before_ms)},
+        })
+        return result.deleted_count
+
+    async def upsert_bars(self, rows) -> dict:
+        """
+        Writes complete bars, replacing any stored bar with the same key.
+        `rows` is a list of (symbol, interval, bar) with bar keys t/o/h/l/c/v.
+        """
+        if not rows:
+            return _counts()
+        ops = [
+            UpdateOne(
+                {"symbol": symbol, "interval": interval, "candle_time": from_ms(bar["t"])},
+                {"$set": {f: Decimal128(Decimal(bar[k])) for f, k in zip(FIELDS, BAR_KEYS)}},
+                upsert=True,
+            )
+            for symbol, interval, bar in rows
+        ]
+        result = await Candle.get_motor_collection().bulk_write(ops, ordered=False)
+        return _counts(
+            result.upserted_count,
+            result.modified_count,
+            result.matched_count - result.modified_count,
+        )
+
+
+def _pack(array, dtype) -> Binary:
+    return Binary(np.ascontiguousarray(array, dtype=dtype).tobytes())
+
+
+def _unpack(doc) -> dict:
+    arrays = {"t": np.frombuffer(doc["t"], dtype="<i8")}
+    for k in BAR_KEYS:
+        arrays[k] = np.frombuffer(doc[k], dtype="<f8")
+    return arrays
+
+
+def _bars_to_arrays(bars) -> dict:
+    bars = sorted(bars, key=lambda bar: bar["t"])
+    arrays = {"t": np.array([bar["t"] for bar in bars], dtype=np.int64)}
+    for k in BAR_KEYS:
+        arrays[k] = np.array([float(bar[k]) for bar in bars], dtype=np.float64)
+    return arrays
+
+
+def _combine(old: dict, new: dict) -> dict:
+    """
+    Union of two sorted bar sets; on equal times the bar from `new` wins.
+    """
+    t = np.concatenate([old["t"], new["t"]])
+    order = np.argsort(t, kind="stable")
+    t = t[order]
+    keep = np.append(t[1:] != t[:-1], True)
+    merged = {"t": t[keep]}
+    for k in BAR_KEYS:
+        merged[k] = np.concatenate([old[k], new[k]])[order][keep]
+    return merged
+
+
+def upsert_arrays(old, new: dict):
+    if old is None:
+        empty = {k: new[k][:0] for k in ("t", *BAR_KEYS)}
+        merged = _combine(empty, new)
+        return merged, _counts(inserted=len(merged["t"]))
+
+    pos = np.searchsorted(old["t"], new["t"])
+    found = pos < len(old["t"])
+    found[found] = old["t"][pos[found]] == new["t"][found]
+    changed = np.zeros(int(found.sum()), dtype=bool)
+    for k in BAR_KEYS:
+        changed |= old[k][pos[found]] != new[k][found]
+    updated = int(changed.sum())
+    return _combine(old, new), _counts(
+        inserted=int((~found).sum()),
+        updated=updated,
+        unchanged=int(found.sum()) - updated,
+    )
+
+
+class BucketCandleStore:
+    """
+    CandleBucket documents, each holding up to BARS_PER_BUCKET bars of one
+    symbol and interval as packed little-endian arrays. A year of 1m bars
+    is 365 documents instead of 525,600, and reads decode straight into
+    numpy without per-bar objects. Prices are stored as float64.
+
+    Writes are read-modify-write on whole buckets. Every write stamps a
+    fresh `rev` and is conditional on the rev it read, so concurrent
+    writers (the live candle builder, the historical sync in another
+    worker) retry instead of overwriting each other.
+    """
+
+    name = "buckets"
+
+    def bucket_span(self, interval: str) -> int:
+        return BARS_PER_BUCKET * INTERVAL_MS[interval]
+
+    def bucket_start(self, interval: str, ts_ms: int) -> int:
+        span = self.bucket_span(interval)
+        return ts_ms - ts_ms % span
+
+    async def read(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> CandleSeries:
+        batches = [batch async for batch in self.iter_batches(symbol, interval, start_ms, end_ms)]
+        return CandleSeries.concat(symbol, interval, batches)
+
+    async def iter_batches(self, symbol: str, interval: str, start_ms: int, end_ms: int,
+                           batch_size: int = STREAM_BATCH_SIZE):
+        """
+        Yields one decoded bucket at a time, trimmed to the range.
+        """
+        cursor = CandleBucket.get_motor_collection().find(
+            {
+                "symbol": symbol,
+                "interval": interval,
+                "start": {
+                    "$gte": from_ms(self.bucket_start(interval, start_ms)),
+                    "$lte": from_ms(end_ms),
+                },
+            },
+            {"_id": 0, "t": 1, **{k: 1 for k in BAR_KEYS}},
+        ).sort("start", 1)
+        async for doc in cursor:
+            arrays = _unpack(doc)
+            batch = CandleSeries(symbol, interval, arrays["t"], *(arrays[k] for k in BAR_KEYS))
+            batch = batch.between(start_ms, end_ms)
+            if len(batch):
+                yield batch
+
+    async def times(self, symbol: str, interval: str, start_ms: int, end_ms: int):
+        cursor = CandleBucket.get_motor_collection().find(
+            {
+                "symbol": symbol,
+                "interval": interval,
+                "start": {
+                    "$gte": from_ms(self.bucket_start(interval, start_ms)),
+                    "$lte": from_ms(end_ms),
+                },
+            },
+            {"_id": 0, "t": 1},
+        ).sort("start", 1)
+        parts = [np.frombuffer(doc["t"], dtype="<i8") async for doc in cursor]
+        times = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        return times[(times >= start_ms) & (times <= end_ms)]
+
+    async def coverage(self, symbol: str) -> dict:
+        collection = CandleBucket.get_motor_collection()
+        coverage = {}
+        for interval in await collection.distinct("interval", {"symbol": symbol}):
+            first = await collection.find_one(
+                {"symbol": symbol, "interval": interval},
+                {"_id": 0, "t": 1},
+                sort=[("start", 1)],
+            )
+            if first:
+                coverage[interval] = int(np.frombuffer(first["t"], dtype="<i8")[0])
+        return coverage
+
+    async def symbols(self):
+        return await CandleBucket.get_motor_collection().distinct("symbol")
+
+    def prune_boundary(self, interval: str, ts_ms: int) -> int:
+        # Only whole buckets are removed
+        return self.bucket_start(interval, ts_ms)
+
+    async def prune(self, symbol: str, interval: str, before_ms: int) -> int:
+        """
+        Deletes buckets that end before `before_ms`; returns documents removed.
+        """
+        result = await CandleBucket.get_motor_collection().delete_many({
+            "symbol": symbol,
+            "interval": interval,
+            "start": {"$lte": from_ms(self.prune_boundary(interval, before_ms) - self.bucket_span(interval))},
+        })
+        return result.deleted_count
+
+    async def upsert_bars(self, rows) -> dict:
+        return await self._write(rows, upsert_arrays)
+
+    async def _write(self, rows, combine) -> dict:
+        groups = {}
+        for symbol, interval, bar in rows:
+            key = (symbol, interval, self.bucket_start(interval, bar["t"]))
+            groups.setdefault(key, []).append(bar)
+        new_arrays = {key: _bars_to_arrays(bars) for key, bars in groups.items()}
+
+        totals = _counts()
+        pending = set(new_arrays)
+        for _ in range(BUCKET_WRITE_RETRIES):
+            if not pending:
+                break
+            existing = await self._load(pending)
+            token = uuid.uuid4().hex
+            ops = []
+            counts = {}
+            for key in pending:
+                doc = existing.get(key)
+                arrays, counts[key] = combine(_unpack(doc) if doc else None, new_arrays[key])
+                ops.append(self._write_op(key, doc, arrays, token))
+            try:
+                result = await CandleBucket.get_motor_collection().bulk_write(ops, ordered=False)
+                complete = result.modified_count + result.upserted_count == len(ops)
+            except BulkWriteError:
+                # Two writers inserted the same new bucket; the loser retries
+                complete = False
+            if complete:
+                written = pending
+            else:
+                stamped = await self._load(pending, {"symbol": 1, "interval": 1, "start": 1, "rev": 1})
+                written = {key for key in pending if stamped.get(key, {}).get("rev") == token}
+            for key in written:
+                for name, count in counts[key].items():
+                    totals[name] += count
+            pending -= written
+
+        if pending:
+            raise RuntimeError(f"Candle bucket write conflicted {BUCKET_WRITE_RETRIES} times: {sorted(pending)[:5]}")
+        return totals
+
+    async def _load(self, keys, projection=None) -> dict:
+        by_series = {}
+        for symbol, interval, start in keys:
+            by_series.setdefault((symbol, interval), []).append(from_ms(start))
+        query = {"$or": [
+            {"symbol": symbol, "interval": interval, "start": {"$in": starts}}
+            for (symbol, interval), starts in by_series.items()
+        ]}
+        docs = {}
+        cursor = CandleBucket.get_motor_collection().find(query, projection)
+        async for doc in cursor:
+            docs[(doc["symbol"], doc["interval"], to_ms(doc["start"]))] = doc
+        return docs
+
+    def _write_op(self, key, doc, arrays, token) -> UpdateOne:
+        symbol, interval, start = key
+        fields = {
+            "end": from_ms(int(arrays["t"][-1])),
+            "bars": len(arrays["t"]),
+            "rev": token,
+            "t": _pack(arrays["t"], "<i8"),
+            **{k: _pack(arrays[k], "<f8") for k in BAR_KEYS},
+        }
+        if doc is None:
+            # Matches (and is left untouched) if another writer got there
+            # first; the rev check then sends this bucket round again.
+            return UpdateOne(
+                {"symbol": symbol, "interval": interval, "start": from_ms(start)},
+                {"$setOnInsert": fields},
+                upsert=True,
+            )
+        return UpdateOne({"_id": doc["_id"], "rev": doc["rev"]}, {"$set": fields})
+
+
+hot_store = BucketCandleStore() if CANDLE_STORAGE == "buckets" else DocumentCandleStore()
+candle_store = hot_store
+if CANDLE_ARCHIVE:
+    candle_store = TieredCandleStore(candle_store, candle_archive)
+if CANDLE_CACHE:
+    candle_store = CachedCandleStore(candle_store)
+
+
+async def read_candles(symbol: str, interval: str, start: datetime, end: datetime) -> CandleSeries:
+    return await candle_store.read(symbol, interval, to_ms(start), to_ms(end))
+
+
+_coverage_cache = {}
+
+
+async def get_coverage(symbol: str) -> dict:
+    cached = _coverage_cache.get(symbol)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    coverage = await candle_store.coverage(symbol)
+    _coverage_cache[symbol] = (time.monotonic() + COVERAGE_TTL, coverage)
+    return coverage
+
+
+def pick_source(coverage: dict, interval: str, start_ms: int, end_ms: int):
+    """
+    The finest stored interval that reaches back to start_ms within the
+    source bar budget. Live candles only go back to when streaming started,
+    so a finer interval that misses the start loses to a coarser one that
+    covers it. Falls back to the best-covering candidate within budget.
+    """
+    candidates = sorted(
+        (source for source in coverage if source in INTERVAL_MS and can_resample(source, interval)),
+        key=lambda source: INTERVAL_MS[source],
+    )
+    affordable = [
+        source for source in candidates
+        if (end_ms - start_ms) / INTERVAL_MS[source] <= RESAMPLE_MAX_SOURCE_BARS
+    ]
+    for source in affordable:
+        if coverage[source] <= start_ms:
+            return source
+    if affordable:
+        return min(affordable, key=lambda source: (coverage[source], INTERVAL_MS[source]))
+    return candidates[-1] if candidates else None
+
+
+async def resolve_source(symbol: str, interval: str, start: datetime, end: datetime):
+    """
+    Returns (source interval or None, start_ms, end_ms) for a request, with
+    the start widened to the open of the first target bar so it is not
+    cut short.
+    """
+    start_ms = int(bucket_keys(np.array([to_ms(start)], dtype=np.int64), interval)[0])
+    end_ms = to_ms(end)
+    return pick_source(await get_coverage(symbol), interval, start_ms, end_ms), start_ms, end_ms
+
+
+async def read_resampled(symbol: str, interval: str, start: datetime, end: datetime) -> CandleSeries:
+    """
+    Bars of any interval, resampled on the fly from a stored interval.
+    """
+    source, start_ms, end_ms = await resolve_source(symbol, interval, start, end)
+    if source is None:
+        return CandleSeries.empty(symbol, interval)
+    series = await candle_store.read(symbol, source, start_ms, end_ms)
+    return series.resample(interval)
+
+
+async def upsert_candles(symbol: str, interval: str, klines) -> dict:
+    """
+    Writes Binance kline rows through the configured store. Overlapping or
+    repeated ranges overwrite bars instead of duplicating them.
+    """
+    return await candle_store.upsert_bars([(symbol, interval, kline_bar(k)) for k in klines])
+
+
+async def invalidate_cached(series: CandleSeries):
+    """
+    Drops cached windows covering `series`, for writes that bypass the
+    store chain (straight into the disk archive).
+    """
+    if not CANDLE_CACHE or not len(series) or series.interval not in INTERVAL_MS:
+        return
+    starts = {window_start(series.interval, int(t)) for t in series.time}
+    await candle_store.invalidate([(series.symbol, series.interval, {"t": start}) for start in starts])
+
+
+archive_progress = {}
+
+
+async def archive_candles(after_days: int = CANDLE_ARCHIVE_AFTER_DAYS) -> dict:
+    """
+    Moves bars older than `after_days` from the hot store into the disk
+    archive: closed bars never change, so they no longer need to sit in
+    Mongo's working set. Bars are merged into the archive before they are
+    deleted, so reads through the tiered store never see a gap and late
+    re-syncs of archived ranges are kept rather than dropped.
+    """
+    started = time.monotonic()
+    cutoff_ms = to_ms(datetime.now(timezone.utc)) - after_days * INTERVAL_MS["1d"]
+    report = {"series": 0, "archived": 0, "documents_removed": 0, "errors": 0}
+    archive_progress.update({"running": True, "started_at": datetime.now(timezone.utc)})
+
+    for symbol in await hot_store.symbols():
+        for interval, first_ms in (await hot_store.coverage(symbol)).items():
+            if interval not in INTERVAL_MS:
+                continue
+            boundary = hot_store.prune_boundary(interval, cutoff_ms)
+            if first_ms >= boundary:
+                continue
+            try:
+                series = await hot_store.read(symbol, interval, first_ms, boundary - 1)
+                # Rewrites whole column files; keep it off the event loop
+                report["archived"] += await asyncio.to_thread(candle_archive.append, series)
+                # Late re-syncs just merged may sit behind windows filled from the old archive
+                await invalidate_cached(series)
+                report["documents_removed"] += await hot_store.prune(symbol, interval, boundary)
+                report["series"] += 1
+            except Exception as e:
+                report["errors"] += 1
+                print(f"❌ Archiving {symbol} {interval} failed: {e}")
+
+    _coverage_cache.clear()
+    report["elapsed_seconds"] = round(time.monotonic() - started, 3)
+    archive_progress.update({"running": False, "last_run": report})
+    print(f"🧊 Archived {report['archived']} candles from {report['series']} series "
+          f"({report['documents_removed']} documents removed) in {report['elapsed_seconds']}s")
+    return report
+
+
+def _tracker_filter(symbol: str, interval: str) -> dict:
+    if interval == LEGACY_TRACKER_INTERVAL:
+        # None also matches documents without the field
+        return {"symbol": symbol, "interval": {"$in": [interval, None]}}
+    return {"symbol": symbol, "interval": interval}
+
+
+async def get_last_fetched(symbol: str, interval: str):
+    doc = await CandleSyncTracker.get_motor_collection().find_one(_tracker_filter(symbol, interval))
+    if not doc:
+        return None
+    last = doc["last_fetched"]
+    return last if last.tzinfo else last.replace(tzinfo=timezone.utc)
+
+
+async def mark_fetched(symbol: str, interval: str, last_fetched: datetime):
+    """
+    Moves the tracker forward (never back) and tags legacy trackers with
+    their interval on the way.
+    """
+    await CandleSyncTracker.get_motor_collection().update_one(
+        _tracker_filter(symbol, interval),
+        {
+            "$set": {"symbol": symbol, "interval": interval},
+            "$max": {"last_fetched": last_fetched},
+        },
+        upsert=True,
+    )
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import time
+from decimal import Decimal
+from typing import Optional
+from urllib.parse import urlencode
+
+import aiohttp
+from yarl import URL
+
+from binance_config import BINANCE_API_KEY, BINANCE_SECRET_KEY, BINANCE_API_URL, BINANCE_MARKET_DATA_URL
+from services.rate_limiter import weight_budget
+
+# Seconds for a whole request, and for opening a connection
+BINANCE_HTTP_TIMEOUT = float(os.getenv("BINANCE_HTTP_TIMEOUT", "10"))
+BINANCE_CONNECT_TIMEOUT = float(os.getenv("BINANCE_CONNECT_TIMEOUT", "3"))
+# Requests in flight per gateway and process; also the connection pool size
+BINANCE_MAX_CONCURRENCY = int(os.getenv("BINANCE_MAX_CONCURRENCY", "16"))
+# How long idle pooled connections are kept open for reuse
+BINANCE_KEEPALIVE = float(os.getenv("BINANCE_KEEPALIVE", "30"))
+BINANCE_RECV_WINDOW = int(os.getenv("BINANCE_RECV_WINDOW", "5000"))
+
+
+class ExchangeError(Exception):
+    """
+    A Binance error response. str() reads like python-binance's
+    BinanceAPIException, which callers used to surface to users.
+    """
+
+    def __init__(self, status: int, code: Optional[int], message: str):
+        super().__init__(f"APIError(code={code}): {message}")
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def _param(value) -> str:
+    # Plain decimal notation: Binance rejects quantities like 1e-05
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        value = Decimal(repr(value))
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    return str(value)
+
+
+class ExchangeGateway:
+    """
+    Async client for the Binance spot REST API, shared by the API process
+    and the Dramatiq workers in place of the blocking python-binance
+    client.
+
+    All calls go through one aiohttp session per event loop, so TCP and
+    TLS connections are pooled and kept alive between requests. A
+    semaphore caps requests in flight; callers queue on it rather than on
+    the connection pool, so waiting for a free slot does not count
+    against the request timeout. Idempotent GETs are retried once when a
+    pooled connection turns out to have been closed by the server or
+    Binance answers with a 5xx; other methods never are, since the
+    order may have gone through. Every
+    response's X-MBX-USED-WEIGHT-1M header is passed on to the request
+    weight budget.
+
+    Methods return the decoded JSON, shaped as python-binance returned it.
+    """
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, api_secret: Optional[str] = None,
+                 timeout: float = BINANCE_HTTP_TIMEOUT, max_concurrency: int = BINANCE_MAX_CONCURRENCY):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=BINANCE_CONNECT_TIMEOUT)
+        self.max_concurrency = max_concurrency
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        # A session is bound to the loop it was created on
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                keepalive_timeout=BINANCE_KEEPALIVE,
+                ttl_dns_cache=300,
+            )
+            headers = {"X-MBX-APIKEY": self.api_key} if self.api_key else None
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, headers=headers)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._session
+
+    def _query(self, params: dict, signed: bool) -> str:
+        params = {k: _param(v) for k, v in params.items() if v is not None}
+        if signed:
+            if not self.api_key or not self.api_secret:
+                raise ExchangeError(0, None, "BINANCE_API_KEY and BINANCE_SECRET_KEY are required for signed endpoints")
+            params["recvWindow"] = str(BINANCE_RECV_WINDOW)
+            params["timestamp"] = str(int(time.time() * 1000))
+        query = urlencode(params)
+        if signed:
+            signature = hmac.new(self.api_secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+            query = f"{query}&signature={signature}" if query else f"signature={signature}"
+        return query
+
+    async def request(self, method: str, path: str, params: Optional[dict] = None, signed: bool = False):
+        session = self._get_session()
+        attempts = 2 if method == "GET" else 1
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                for attempt in range(attempts):
+                    # Signed per attempt: the timestamp has to be fresh
+                    query = self._query(params or {}, signed)
+                    url = URL(f"{self.base_url}{path}" + (f"?{query}" if query else ""), encoded=True)
+                    self.requests += 1
+                    try:
+                        async with session.request(method, url) as resp:
+                            used_weight = resp.headers.get("X-MBX-USED-WEIGHT-1M")
+                            if used_weight and used_weight.isdigit():
+                                weight_budget.observe_used_weight(int(used_weight))
+                            try:
+                                body = await resp.json(content_type=None)
+                            except ValueError:
+                                body = None
+                            if resp.status >= 500 and attempt + 1 < attempts:
+                                self.retries += 1
+                                continue
+                            if resp.status >= 400 or body is None:
+                                self.errors += 1
+                                error = body if isinstance(body, dict) else {}
+                                raise ExchangeError(resp.status, error.get("code"),
+                                                    error.get("msg") or f"HTTP {resp.status} from {path}")
+                            return body
+                    except aiohttp.ServerDisconnectedError:
+                        if attempt + 1 == attempts:
+                            self.errors += 1
+                            raise
+                        self.retries += 1
+            finally:
+                self.in_flight -= 1
+
+    async def ping(self) -> dict:
+        return await self.request("GET", "/api/v3/ping")
+
+    async def get_account(self) -> dict:
+        return await self.request("GET", "/api/v3/account", signed=True)
+
+    async def create_order(self, **params) -> dict:
+        return await self.request("POST", "/api/v3/order", params, signed=True)
+
+    async def get_order(self, **params) -> dict:
+        return await self.request("GET", "/api/v3/order", params, signed=True)
+
+    async def get_klines(self, **params) -> list:
+        return await self.request("GET", "/api/v3/klines", params)
+
+    async def get_symbol_ticker(self, **params):
+        return await self.request("GET", "/api/v3/ticker/price", params)
+
+    async def get_all_tickers(self) -> list:
+        return await self.request("GET", "/api/v3/ticker/price")
+
+    async def get_exchange_info(self) -> dict:
+        return await self.request("GET", "/api/v3/exchangeInfo")
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+        }
+
+
+# Testnet account: orders, balances, order status, klines and ticker fallbacks
+exchange_gateway = ExchangeGateway(BINANCE_API_URL, BINANCE_API_KEY, BINANCE_SECRET_KEY)
+# Live public market data for the symbol sync, which never signs requests
+market_data_gateway = ExchangeGateway(BINANCE_MARKET_DATA_URL)
+
+
+async def close_gateways():
+    await exchange_gateway.close()
+    await market_data_gateway.close()
@@ -0,0 +1,91 @@
+import os
+import struct
+import time
+import zlib
+
+# File layout: MAGIC, then records of RECORD_HEADER + body.
+# RECORD_HEADER = receive time (ns since epoch), flags, body length.
+MAGIC = b"CCFEED1\n"
+RECORD_HEADER = struct.Struct("<QBI")
+FLAG_ZLIB = 0x01
+# Frames shorter than this are stored raw; zlib does not pay off on them
+COMPRESS_MIN_BYTES = 256
+
+FEED_RECORD_PATH = os.getenv("FEED_RECORD_PATH")
+FEED_RECORD_COMPRESS = os.getenv("FEED_RECORD_COMPRESS", "1") == "1"
+
+
+class FeedRecorder:
+    """
+    Appends raw combined-stream frames to a length-prefixed log so a feed
+    can be replayed offline (see tools/replay_feed.py).
+    """
+
+    def __init__(self, path: str, compress: bool = True, flush_interval: float = 1.0):
+        self.path = path
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "ab", buffering=1024 * 1024)
+        if new_file:
+            self.file.write(MAGIC)
+        self.last_flush = time.monotonic()
+
+    def record(self, frame):
+        if self.file.closed:
+            return  # a frame read while the stream shuts down
+        body = frame.encode() if isinstance(frame, str) else frame
+        flags = 0
+        self.raw_bytes += len(body)
+        if self.compress and len(body) >= COMPRESS_MIN_BYTES:
+            body = zlib.compress(body, 1)
+            flags |= FLAG_ZLIB
+        self.file.write(RECORD_HEADER.pack(time.time_ns(), flags, len(body)))
+        self.file.write(body)
+        self.records += 1
+        self.stored_bytes += RECORD_HEADER.size + len(body)
+
+        now = time.monotonic()
+        if now - self.last_flush >= self.flush_interval:
+            self.file.flush()
+            self.last_flush = now
+
+    def close(self):
+        if not self.file.closed:
+            self.file.flush()
+            self.file.close()
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "records": self.records,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+        }
+
+
+def read_feed(path: str):
+    """
+    Yields (timestamp_ns, frame) for every record in a feed log. A record
+    cut short by a crash at the end of the file is ignored.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a feed log")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            ts_ns, flags, length = RECORD_HEADER.unpack(header)
+            body = f.read(length)
+            if len(body) < length:
+                return
+            if flags & FLAG_ZLIB:
+                body = zlib.decompress(body)
+            yield ts_ns, body.decode()
+
+
+feed_recorder = FeedRecorder(FEED_RECORD_PATH, FEED_RECORD_COMPRESS) if FEED_RECORD_PATH else None
@@ -0,0 +1,484 @@
+"""
+Technical indicators over columnar candle series.
+
+Every indicator comes in two forms that produce the same numbers:
+- a vectorized numpy function for a whole history (sma, ema, rsi, macd,
+  bollinger, atr);
+- a small state object whose step() consumes one more closed bar in O(1),
+  primed from the vectorized result. Live intervals only step the bars
+  that closed since the last request instead of recomputing everything.
+
+Conventions follow TA-Lib: EMAs are seeded with the SMA of their first
+`period` values, RSI and ATR use Wilder smoothing (alpha = 1/period),
+Bollinger bands use the population standard deviation. Values before an
+indicator has enough history are NaN (None in JSON).
+"""
+import copy
+import os
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from services.candle_series import bucket_keys
+
+# (name -> default parameters); a spec entry looks like "macd:12:26:9"
+INDICATOR_DEFAULTS = {
+    "sma": (20,),
+    "ema": (20,),
+    "rsi": (14,),
+    "macd": (12, 26, 9),
+    "bb": (20, 2),
+    "atr": (14,),
+}
+MAX_PERIOD = 1000
+# Extra bars read before the requested start so EMA-style values settle
+WARMUP_FACTOR = 10
+MAX_WARMUP_BARS = 5000
+INDICATOR_CACHE_SIZE = int(os.getenv("INDICATOR_CACHE_SIZE", "256"))
+
+
+def _ema_tail(x, alpha: float, seed: float):
+    """
+    y[i] = alpha * x[i] + (1 - alpha) * y[i - 1] with y[-1] = seed.
+
+    Solved in closed form per block, y[k] = d^(k+1) * seed + alpha * d^k *
+    cumsum(x[i] / d^i), with blocks short enough that d^-k stays finite.
+    """
+    out = np.empty(len(x))
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[:] = x
+        return out
+    block = int(min(4096, max(1, np.floor(-300 / np.log(decay)))))
+    powers = decay ** np.arange(block + 1)
+    prev = seed
+    for start in range(0, len(x), block):
+        chunk = x[start:start + block]
+        n = len(chunk)
+        y = powers[1:n + 1] * prev + alpha * powers[:n] * np.cumsum(chunk / powers[:n])
+        out[start:start + n] = y
+        prev = y[-1]
+    return out
+
+
+def sma(x, period: int):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        # Centre first so the running sum keeps its precision
+        base = x[0]
+        csum = np.concatenate(([0.0], np.cumsum(x - base)))
+        out[period - 1:] = (csum[period:] - csum[:-period]) / period + base
+    return out
+
+
+def ema(x, period: int, alpha: float = None):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        alpha = 2.0 / (period + 1) if alpha is None else alpha
+        seed = x[:period].mean()
+        out[period - 1] = seed
+        out[period:] = _ema_tail(x[period:], alpha, seed)
+    return out
+
+
+def wilder(x, period: int):
+    return ema(x, period, alpha=1.0 / period)
+
+
+def rsi(close, period: int = 14):
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    diff = np.diff(close)
+    avg_gain = wilder(np.maximum(diff, 0.0), period)
+    avg_loss = wilder(np.maximum(-diff, 0.0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    value[avg_loss == 0] = 100.0
+    out[1:] = value
+    out[:period] = np.nan
+    return out
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9):
+    close = np.asarray(close, dtype=np.float64)
+    line = ema(close, fast) - ema(close, slow)
+    sig = np.full(len(close), np.nan)
+    first = max(fast, slow) - 1
+    if len(close) > first:
+        sig[first:] = ema(line[first:], signal)
+    return line, sig, line - sig
+
+
+def bollinger(close, period: int = 20, k: float = 2.0):
+    close = np.asarray(close, dtype=np.float64)
+    mid = sma(close, period)
+    std = np.full(len(close), np.nan)
+    if len(close) >= period:
+        std[period - 1:] = sliding_window_view(close, period).std(axis=1)
+    return mid, mid + k * std, mid - k * std
+
+
+def true_range(high, low, close):
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    tr = high - low
+    if len(close) > 1:
+        prev = close[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - prev), np.abs(low[1:] - prev)))
+    return tr
+
+
+def atr(high, low, close, period: int = 14):
+    return wilder(true_range(high, low, close), period)
+
+
+class EmaState:
+    """
+    One EMA stepped bar by bar, seeded with the SMA of the first `period`
+    values like ema().
+    """
+
+    def __init__(self, period: int, alpha: float = None):
+        self.period = period
+        self.alpha = 2.0 / (period + 1) if alpha is None else alpha
+        self.count = 0
+        self.total = 0.0
+        self.value = np.nan
+
+    def prime(self, x, values):
+        self.count = len(x)
+        if self.count >= self.period:
+            self.value = float(values[-1])
+        else:
+            self.total = float(np.sum(x))
+        return self
+
+    def step(self, x: float) -> float:
+        self.count += 1
+        if self.count < self.period:
+            self.total += x
+        elif self.count == self.period:
+            self.value = (self.total + x) / self.period
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class SmaState:
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque(maxlen=period)
+
+    def prime(self, close):
+        self.window.extend(close[-self.period:].tolist())
+        return self
+
+    def step(self, x: float) -> float:
+        self.window.append(x)
+        return sum(self.window) / self.period if len(self.window) == self.period else np.nan
+
+
+class RsiState:
+    def __init__(self, period: int):
+        self.period = period
+        self.prev = None
+        self.gain = EmaState(period, 1.0 / period)
+        self.loss = EmaState(period, 1.0 / period)
+
+    def prime(self, close):
+        if len(close):
+            self.prev = float(close[-1])
+        if len(close) > 1:
+            diff = np.diff(close)
+            gains, losses = np.maximum(diff, 0.0), np.maximum(-diff, 0.0)
+            self.gain.prime(gains, wilder(gains, self.period))
+            self.loss.prime(losses, wilder(losses, self.period))
+        return self
+
+    def step(self, x: float) -> float:
+        if self.prev is None:
+            self.prev = x
+            return np.nan
+        diff, self.prev = x - self.prev, x
+        gain = self.gain.step(max(diff, 0.0))
+        loss = self.loss.step(max(-diff, 0.0))
+        if np.isnan(gain):
+            return np.nan
+        return 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+class MacdState:
+    def __init__(self, fast: int, slow: int, signal: int):
+        self.fast = EmaState(fast)
+        self.slow = EmaState(slow)
+        self.signal = EmaState(signal)
+
+    def prime(self, close):
+        line, _, _ = macd(close, self.fast.period, self.slow.period, self.signal.period)
+        self.fast.prime(close, ema(close, self.fast.period))
+        self.slow.prime(close, ema(close, self.slow.period))
+        first = max(self.fast.period, self.slow.period) - 1
+        if len(close) > first:
+            valid = line[first:]
+            self.signal.prime(valid, ema(valid, self.signal.period))
+        return self
+
+    def step(self, x: float):
+        line = self.fast.step(x) - self.slow.step(x)
+        if np.isnan(line):
+            return np.nan, np.nan, np.nan
+        sig = self.signal.step(line)
+        return line, sig, line - sig
+
+
+class BollingerState:
+    def __init__(self, period: int, k: float):
+        self.period = period
+        self.k = k
+        self.window = deque(maxlen=period)
+
+    def prime(self, close):
+        self.window.extend(close[-self.period:].tolist())
+        return self
+
+    def step(self, x: float):
+        self.window.append(x)
+        if len(self.window) < self.period:
+            return np.nan, np.nan, np.nan
+        values = np.fromiter(self.window, np.float64, self.period)
+        mid, std = values.mean(), values.std()
+        return mid, mid + self.k * std, mid - self.k * std
+
+
+class AtrState:
+    def __init__(self, period: int):
+        self.prev_close = None
+        self.tr = EmaState(period, 1.0 / period)
+
+    def prime(self, high, low, close):
+        if len(close):
+            self.prev_close = float(close[-1])
+            tr = true_range(high, low, close)
+            self.tr.prime(tr, wilder(tr, self.tr.period))
+        return self
+
+    def step(self, high: float, low: float, close: float) -> float:
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        return self.tr.step(tr)
+
+
+class Indicator:
+    """
+    One parsed spec entry: the vectorized computation, its output names
+    and the matching incremental state.
+    """
+
+    def __init__(self, name: str, params: tuple):
+        self.name = name
+        self.params = params
+        self.key = "_".join([name, *(f"{p:g}" for p in params)])
+
+    @property
+    def lookback(self) -> int:
+        return int(max(self.params[:3] if self.name == "macd" else self.params[:1]))
+
+    @property
+    def outputs(self):
+        if self.name == "macd":
+            return ("macd", "signal", "hist")
+        if self.name == "bb":
+            return ("mid", "upper", "lower")
+        return (None,)
+
+    def compute(self, series) -> tuple:
+        p = self.params
+        if self.name == "sma":
+            return (sma(series.close, int(p[0])),)
+        if self.name == "ema":
+            return (ema(series.close, int(p[0])),)
+        if self.name == "rsi":
+            return (rsi(series.close, int(p[0])),)
+        if self.name == "macd":
+            return macd(series.close, int(p[0]), int(p[1]), int(p[2]))
+        if self.name == "bb":
+            return bollinger(series.close, int(p[0]), p[1])
+        return (atr(series.high, series.low, series.close, int(p[0])),)
+
+    def state(self, series):
+        p = self.params
+        if self.name == "sma":
+            return SmaState(int(p[0])).prime(series.close)
+        if self.name == "ema":
+            period = int(p[0])
+            return EmaState(period).prime(series.close, ema(series.close, period))
+        if self.name == "rsi":
+            return RsiState(int(p[0])).prime(series.close)
+        if self.name == "macd":
+            return MacdState(int(p[0]), int(p[1]), int(p[2])).prime(series.close)
+        if self.name == "bb":
+            return BollingerState(int(p[0]), p[1]).prime(series.close)
+        return AtrState(int(p[0])).prime(series.high, series.low, series.close)
+
+    def step(self, state, high: float, low: float, close: float) -> tuple:
+        if self.name == "atr":
+            return (state.step(high, low, close),)
+        value = state.step(close)
+        return value if isinstance(value, tuple) else (value,)
+
+
+def parse_spec(spec: str):
+    """
+    Parses "sma:20,ema:50,rsi,macd:12:26:9,bb:20:2,atr:14"; missing
+    parameters take INDICATOR_DEFAULTS. Raises ValueError on bad input.
+    """
+    indicators = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, *raw = entry.lower().split(":")
+        if name not in INDICATOR_DEFAULTS:
+            raise ValueError(f"Unknown indicator '{name}'. Use one of: {', '.join(INDICATOR_DEFAULTS)}")
+        defaults = INDICATOR_DEFAULTS[name]
+        if len(raw) > len(defaults):
+            raise ValueError(f"Too many parameters for {name}")
+        try:
+            params = tuple(float(v) for v in raw) + defaults[len(raw):]
+        except ValueError:
+            raise ValueError(f"Invalid parameters for {name}")
+        periods = params[:3] if name == "macd" else params[:1]
+        if any(p < 1 or p > MAX_PERIOD or p != int(p) for p in periods):
+            raise ValueError(f"{name} periods must be whole numbers between 1 and {MAX_PERIOD}")
+        if name == "bb" and params[1] <= 0:
+            raise ValueError("bb band width must be positive")
+        indicators.append(Indicator(name, params))
+    if not indicators:
+        raise ValueError("No indicators requested")
+    return indicators
+
+
+def warmup_bars(indicators) -> int:
+    return min(MAX_WARMUP_BARS, WARMUP_FACTOR * max(ind.lookback for ind in indicators))
+
+
+class IndicatorResult:
+    """
+    Indicator values over closed bars for one (symbol, interval, spec),
+    plus the states needed to extend them.
+    """
+
+    def __init__(self, indicators, series):
+        self.indicators = indicators
+        self.time = series.time.copy()
+        self.values = {ind.key: [np.asarray(v) for v in ind.compute(series)] for ind in indicators}
+        self.states = {ind.key: ind.state(series) for ind in indicators}
+        self.last_close = float(series.close[-1]) if len(series) else None
+
+    def extend(self, series):
+        """
+        Steps the states over bars newer than the last one held.
+        """
+        new_values = {ind.key: [[] for _ in ind.outputs] for ind in self.indicators}
+        for t, h, l, c in zip(series.time.tolist(), series.high.tolist(), series.low.tolist(), series.close.tolist()):
+            for ind in self.indicators:
+                for column, value in zip(new_values[ind.key], ind.step(self.states[ind.key], h, l, c)):
+                    column.append(value)
+            self.last_close = c
+        self.time = np.concatenate([self.time, series.time])
+        for key, columns in new_values.items():
+            self.values[key] = [np.concatenate([old, np.asarray(new, dtype=np.float64)])
+                                for old, new in zip(self.values[key], columns)]
+
+    def peek(self, series) -> dict:
+        """
+        Values for provisional (still forming) bars, leaving states untouched.
+        """
+        states = copy.deepcopy(self.states)
+        out = {ind.key: [[] for _ in ind.outputs] for ind in self.indicators}
+        for h, l, c in zip(series.high.tolist(), series.low.tolist(), series.close.tolist()):
+            for ind in self.indicators:
+                for column, value in zip(out[ind.key], ind.step(states[ind.key], h, l, c)):
+                    column.append(value)
+        return out
+
+
+class IndicatorEngine:
+    """
+    Keeps recent IndicatorResults (LRU) so repeated requests for a live
+    interval only step the bars that closed since the previous one.
+    """
+
+    def __init__(self, max_entries: int = INDICATOR_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.results = OrderedDict()
+        self.full_computes = 0
+        self.incremental_updates = 0
+        self.bars_stepped = 0
+
+    def compute(self, symbol: str, interval: str, indicators, series, now_ms: int = None) -> dict:
+        """
+        Returns {"time": int64 ms array, "values": {key: [arrays]}} for the
+        bars of `series`. Bars whose interval has not ended by now_ms are
+        treated as provisional and never stored.
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        current = int(bucket_keys(np.array([now_ms], dtype=np.int64), interval)[0])
+        closed_count = int(np.searchsorted(series.time, current, side="left"))
+        closed, provisional = series.take(slice(0, closed_count)), series.take(slice(closed_count, None))
+
+        cache_key = (symbol, interval, ",".join(ind.key for ind in indicators))
+        result = self.results.get(cache_key)
+        if result is not None and self._can_extend(result, closed):
+            newer = closed.take(slice(int(np.searchsorted(closed.time, result.time[-1], side="right")), None))
+            if len(newer):
+                result.extend(newer)
+                self.bars_stepped += len(newer)
+            self.incremental_updates += 1
+            self.results.move_to_end(cache_key)
+        else:
+            result = IndicatorResult(indicators, closed)
+            self.full_computes += 1
+            if len(closed):
+                self.results[cache_key] = result
+                self.results.move_to_end(cache_key)
+                while len(self.results) > self.max_entries:
+                    self.results.popitem(last=False)
+
+        lo = int(np.searchsorted(result.time, series.time[0], side="left")) if len(series) else len(result.time)
+        values = {key: [column[lo:] for column in columns] for key, columns in result.values.items()}
+        times = result.time[lo:]
+        if len(provisional):
+            extra = result.peek(provisional)
+            values = {
+                key: [np.concatenate([column, np.asarray(more, dtype=np.float64)])
+                      for column, more in zip(columns, extra[key])]
+                for key, columns in values.items()
+            }
+            times = np.concatenate([times, provisional.time])
+        return {"time": times, "values": values}
+
+    def _can_extend(self, result, closed) -> bool:
+        # The held result must start no later than the new series and end
+        # on a bar the new series still has with the same close.
+        if not len(result.time) or not len(closed):
+            return False
+        if result.time[0] > closed.time[0]:
+            return False
+        at = int(np.searchsorted(closed.time, result.time[-1]))
+        return at < len(closed) and closed.time[at] == result.time[-1] and closed.close[at] == result.last_close
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.results),
+            "full_computes": self.full_computes,
+            "incremental_updates": self.incremental_updates,
+            "bars_stepped": self.bars_stepped,
+        }
+
+
+indicator_engine = IndicatorEngine()
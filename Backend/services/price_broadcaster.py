@@ -0,0 +1,325 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+
+# Frames a client may fall behind before it is treated as a slow consumer
+SEND_QUEUE_SIZE = 256
+# Seconds a single send may take before the client is evicted
+SEND_TIMEOUT = 5.0
+# Number of recent delivery latencies kept for percentile reporting
+LATENCY_SAMPLES = 10000
+# Default and minimum flush interval for clients in conflation mode
+CONFLATE_INTERVAL_MS = int(os.getenv("PRICE_CONFLATE_MS", "250"))
+MIN_CONFLATE_INTERVAL_MS = 50
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ClientConnection:
+    """
+    One registered WebSocket with its own bounded send queue and writer task.
+    """
+
+    def __init__(self, websocket, queue_size: int):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.writer_task = None
+        self.connected_at = time.time()
+        self.sent = 0
+        self.max_queue_depth = 0
+        self.max_send_time = 0.0
+        self.send_started = None
+        self.symbols = set()
+        self.wildcard = True
+        self.ticks_in = 0
+        self.conflate_interval = None
+        self.pending = {}
+        self.pending_since = None
+        self.flusher_task = None
+        self.batches = 0
+        self.conflated = 0
+        self.closed = False
+
+    def enqueue(self, frame: str, published_at: float) -> bool:
+        """
+        Queues a frame without waiting. Returns False when the queue is full.
+        """
+        try:
+            self.queue.put_nowait((frame, published_at))
+        except asyncio.QueueFull:
+            return False
+        depth = self.queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "client": str(getattr(self.websocket, "client", None)),
+            "connected_at": self.connected_at,
+            "symbols": ["*"] if self.wildcard else sorted(self.symbols),
+            "conflate_ms": int(self.conflate_interval * 1000) if self.conflate_interval else None,
+            "messages_in": self.ticks_in,
+            "messages_out": self.sent,
+            "batches": self.batches,
+            "conflated": self.conflated,
+            "pending": len(self.pending),
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "max_send_time_ms": round(self.max_send_time * 1000, 3),
+        }
+
+
+class PriceBroadcaster:
+    """
+    Fans price frames out to WebSocket clients without letting one slow
+    client hold up the others. Each frame is encoded once per tick and
+    handed to every client's queue; clients that cannot keep up are evicted.
+
+    Clients that never subscribe receive every symbol. Once a client
+    subscribes it only receives frames for its symbols, looked up through
+    the symbol -> subscribers index so uninterested clients are not touched.
+
+    Clients in conflation mode keep only the latest frame per symbol and
+    receive them as one JSON array every flush interval instead.
+    """
+
+    def __init__(self, queue_size: int = SEND_QUEUE_SIZE, send_timeout: float = SEND_TIMEOUT):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.connections = {}
+        self.topics = {}
+        self.wildcard = set()
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.published = 0
+        self.evicted = 0
+        self.evictions = deque(maxlen=100)
+        self.watchdog_task = None
+
+    def register(self, websocket) -> ClientConnection:
+        conn = ClientConnection(websocket, self.queue_size)
+        conn.writer_task = asyncio.create_task(self._writer(conn))
+        self.connections[websocket] = conn
+        self._set_wildcard(conn)
+        if self.watchdog_task is None or self.watchdog_task.done():
+            self.watchdog_task = asyncio.create_task(self._watchdog())
+        return conn
+
+    async def unregister(self, websocket):
+        conn = self.connections.pop(websocket, None)
+        if conn is None:
+            return
+        self._drop_topics(conn)
+        self._stop_writer(conn)
+
+    def subscribe(self, websocket, symbols) -> list:
+        conn = self.connections.get(websocket)
+        if conn is None:
+            return []
+        symbols = {s.upper() for s in symbols if s}
+        if "*" in symbols:
+            self._drop_topics(conn)
+            self._set_wildcard(conn)
+            return ["*"]
+        self.wildcard.discard(conn)
+        conn.wildcard = False
+        for symbol in symbols - conn.symbols:
+            self.topics.setdefault(symbol, set()).add(conn)
+        conn.symbols |= symbols
+        return sorted(conn.symbols)
+
+    def unsubscribe(self, websocket, symbols) -> list:
+        """
+        Removing the last symbol (or "*") leaves the client subscribed to
+        nothing; it receives no prices until it subscribes again.
+        """
+        conn = self.connections.get(websocket)
+        if conn is None:
+            return []
+        symbols = {s.upper() for s in symbols if s}
+        if "*" in symbols:
+            self._drop_topics(conn)
+            return []
+        for symbol in symbols & conn.symbols:
+            self._remove_from_topic(symbol, conn)
+        conn.symbols -= symbols
+        return sorted(conn.symbols)
+
+    def set_conflation(self, websocket, interval_ms=CONFLATE_INTERVAL_MS):
+        """
+        Turns conflation on for a client (interval_ms > 0) or off (0/None).
+        Returns the interval in effect.
+        """
+        conn = self.connections.get(websocket)
+        if conn is None:
+            return None
+        if conn.flusher_task:
+            conn.flusher_task.cancel()
+            conn.flusher_task = None
+        if not interval_ms:
+            conn.conflate_interval = None
+            self._flush(conn)
+            return None
+        interval_ms = max(int(interval_ms), MIN_CONFLATE_INTERVAL_MS)
+        conn.conflate_interval = interval_ms / 1000
+        conn.flusher_task = asyncio.create_task(self._flusher(conn))
+        return interval_ms
+
+    def _remove_from_topic(self, symbol: str, conn: ClientConnection):
+        subscribers = self.topics.get(symbol)
+        if subscribers is not None:
+            subscribers.discard(conn)
+            if not subscribers:
+                del self.topics[symbol]
+
+    def _drop_topics(self, conn: ClientConnection):
+        for symbol in conn.symbols:
+            self._remove_from_topic(symbol, conn)
+        conn.symbols = set()
+        self.wildcard.discard(conn)
+        conn.wildcard = False
+
+    def _set_wildcard(self, conn: ClientConnection):
+        self.wildcard.add(conn)
+        conn.wildcard = True
+
+    def send(self, websocket, text: str):
+        """
+        Queues a frame for a single client (e.g. a "pong" reply).
+        """
+        conn = self.connections.get(websocket)
+        if conn and not conn.enqueue(text, time.perf_counter()):
+            self._evict(conn, "send queue full")
+
+    def subscribers(self, symbol: str):
+        topic = self.topics.get(symbol)
+        if not topic:
+            return list(self.wildcard)
+        if not self.wildcard:
+            return list(topic)
+        return list(topic | self.wildcard)
+
+    def publish(self, payload: dict):
+        """
+        Encodes a payload once and queues it for every interested client.
+        Never awaits, so the upstream reader is never blocked by clients.
+        """
+        symbol = payload.get("s")
+        targets = self.subscribers(symbol)
+        if targets:
+            self._deliver(json.dumps(payload), symbol, targets)
+
+    def publish_frame(self, frame: str, symbol: str = None):
+        targets = self.subscribers(symbol) if symbol else list(self.connections.values())
+        if targets:
+            self._deliver(frame, symbol, targets)
+
+    def _deliver(self, frame: str, symbol, targets):
+        self.published += 1
+        published_at = time.perf_counter()
+        for conn in targets:
+            conn.ticks_in += 1
+            if conn.conflate_interval:
+                if symbol in conn.pending:
+                    conn.conflated += 1
+                elif not conn.pending:
+                    conn.pending_since = published_at
+                conn.pending[symbol] = frame
+            elif not conn.enqueue(frame, published_at):
+                self._evict(conn, "send queue full")
+
+    def _flush(self, conn: ClientConnection):
+        if not conn.pending:
+            return
+        batch = "[" + ",".join(conn.pending.values()) + "]"
+        conn.pending = {}
+        conn.batches += 1
+        if not conn.enqueue(batch, conn.pending_since):
+            self._evict(conn, "send queue full")
+
+    async def _flusher(self, conn: ClientConnection):
+        while not conn.closed:
+            await asyncio.sleep(conn.conflate_interval)
+            # Keep merging while the previous batch is still being written,
+            # so a slow link gets fresher prices rather than a backlog.
+            if conn.queue.empty():
+                self._flush(conn)
+
+    def _stop_writer(self, conn: ClientConnection):
+        conn.closed = True
+        if conn.writer_task and conn.writer_task is not asyncio.current_task():
+            conn.writer_task.cancel()
+        if conn.flusher_task and conn.flusher_task is not asyncio.current_task():
+            conn.flusher_task.cancel()
+
+    async def _writer(self, conn: ClientConnection):
+        while True:
+            frame, published_at = await conn.queue.get()
+            conn.send_started = time.perf_counter()
+            try:
+                await conn.websocket.send_text(frame)
+            except Exception as e:
+                self._evict(conn, f"send failed: {e}")
+                return
+            finished = time.perf_counter()
+            conn.sent += 1
+            conn.max_send_time = max(conn.max_send_time, finished - conn.send_started)
+            conn.send_started = None
+            self.latencies.append(finished - published_at)
+
+    async def _watchdog(self):
+        """
+        Evicts clients stuck in a single send for longer than send_timeout.
+        One sweep for all clients is much cheaper than a wait_for() per frame.
+        """
+        while self.connections:
+            await asyncio.sleep(self.send_timeout / 2)
+            now = time.perf_counter()
+            for conn in list(self.connections.values()):
+                if conn.send_started is not None and now - conn.send_started > self.send_timeout:
+                    self._evict(conn, f"send exceeded {self.send_timeout}s")
+
+    def _evict(self, conn: ClientConnection, reason: str):
+        if self.connections.get(conn.websocket) is not conn:
+            return
+        del self.connections[conn.websocket]
+        self._drop_topics(conn)
+        self.evicted += 1
+        self.evictions.append({"reason": reason, "at": time.time(), **conn.stats()})
+        print(f"⚠️ Evicting slow price client {getattr(conn.websocket, 'client', '')}: {reason}")
+
+        self._stop_writer(conn)
+        asyncio.create_task(self._close(conn.websocket))
+
+    async def _close(self, websocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1013), self.send_timeout)
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        samples = list(self.latencies)
+        p50 = percentile(samples, 50)
+        p99 = percentile(samples, 99)
+        return {
+            "clients": len(self.connections),
+            "wildcard_clients": len(self.wildcard),
+            "topics": {symbol: len(subscribers) for symbol, subscribers in self.topics.items()},
+            "published": self.published,
+            "evicted": self.evicted,
+            "latency_p50_ms": round(p50 * 1000, 3) if p50 is not None else None,
+            "latency_p99_ms": round(p99 * 1000, 3) if p99 is not None else None,
+            "recent_evictions": list(self.evictions),
+            "connections": [conn.stats() for conn in self.connections.values()],
+        }
+
+
+broadcaster = PriceBroadcaster()
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+
+from services.redis_client import async_redis_client
+from services.redis_lease import RedisLease
+from services.price_broadcaster import broadcaster
+from services.ticker_cache import ticker_table
+from services.real_time_price import stream_manager, run_stream_manager, record_upstream_tick
+from services.candle_builder import candle_builder
+
+# "local": every API process connects to Binance itself (default)
+# "redis": one elected process ingests and republishes over Redis pub/sub
+PRICE_FEED_MODE = os.getenv("PRICE_FEED_MODE", "local")
+PRICE_CHANNEL = "prices:ticks"
+KLINE_CHANNEL = "prices:klines"
+LEADER_KEY = "prices:leader"
+LEADER_TTL = 15
+LEADER_RENEW_INTERVAL = 5
+OUTBOX_SIZE = 10000
+
+
+def encode_frame(payload: dict) -> str:
+    """
+    "SYMBOL|price|json": subscribers route and update the ticker table from
+    the prefix and forward the JSON part untouched, so each tick is encoded
+    once for the whole cluster.
+    """
+    return f"{payload.get('s', '')}|{payload.get('c', '')}|{json.dumps(payload, separators=(',', ':'))}"
+
+
+def decode_frame(frame: str):
+    symbol, price, body = frame.split("|", 2)
+    return symbol, price, body
+
+
+class PriceFeedRelay:
+    """
+    Shares one upstream Binance feed between all uvicorn workers.
+
+    Every worker competes for a Redis lease (see RedisLease). The holder runs the stream manager and
+    publishes compact frames to PRICE_CHANNEL; every worker, the leader
+    included, subscribes and fans frames out to its own WebSocket clients.
+    """
+
+    def __init__(self):
+        self.lease = RedisLease(LEADER_KEY, LEADER_TTL)
+        self.node_id = self.lease.node_id
+        self.is_leader = False
+        self.ingest_task = None
+        self.outbox = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self.published = 0
+        self.dropped = 0
+        self.received = 0
+
+    async def run(self):
+        stream_manager.on_message = self.publish_upstream
+        listener = asyncio.create_task(self.listen())
+        publisher = asyncio.create_task(self.publish_loop())
+        try:
+            while True:
+                try:
+                    leader = await self.elect()
+                except Exception as e:
+                    print(f"❌ Price feed election error: {e}")
+                    leader = False
+
+                if leader and self.ingest_task is None:
+                    print(f"👑 {self.node_id} is now the price feed leader")
+                    self.ingest_task = asyncio.create_task(run_stream_manager())
+                elif not leader and self.ingest_task is not None:
+                    print(f"⚠️ {self.node_id} lost price feed leadership")
+                    await self._stop_ingest()
+                self.is_leader = leader
+                await asyncio.sleep(LEADER_RENEW_INTERVAL)
+        finally:
+            await self._stop_ingest()
+            listener.cancel()
+            publisher.cancel()
+            try:
+                await self.lease.release()
+            except Exception:
+                pass
+
+    async def elect(self) -> bool:
+        return await self.lease.acquire()
+
+    async def _stop_ingest(self):
+        if self.ingest_task is None:
+            return
+        self.ingest_task.cancel()
+        try:
+            await self.ingest_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        self.ingest_task = None
+
+    def publish_upstream(self, data: dict):
+        """
+        Stream manager handler on the leader: queue the frame for Redis.
+        """
+        payload = data.get("data")
+        if not payload:
+            return
+        record_upstream_tick(payload)
+        if payload.get("e") == "kline":
+            item = (KLINE_CHANNEL, json.dumps(payload, separators=(",", ":")))
+        else:
+            item = (PRICE_CHANNEL, encode_frame(payload))
+        try:
+            self.outbox.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def publish_loop(self):
+        while True:
+            frames = [await self.outbox.get()]
+            while not self.outbox.empty():
+                frames.append(self.outbox.get_nowait())
+            try:
+                pipe = async_redis_client.pipeline(transaction=False)
+                for channel, frame in frames:
+                    pipe.publish(channel, frame)
+                await pipe.execute()
+                self.published += len(frames)
+            except Exception as e:
+                self.dropped += len(frames)
+                print(f"❌ Price feed publish error: {e}")
+
+    async def listen(self):
+        while True:
+            pubsub = async_redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(PRICE_CHANNEL, KLINE_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    self.received += 1
+                    if message["channel"] == KLINE_CHANNEL:
+                        payload = json.loads(message["data"])
+                        candle_builder.update_forming(payload["s"], payload["k"])
+                        continue
+                    symbol, price, body = decode_frame(message["data"])
+                    if price:
+                        ticker_table.update(symbol, price)
+                    broadcaster.publish_frame(body, symbol)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Price feed subscriber error: {e}. Resubscribing in 2s...")
+                await asyncio.sleep(2)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "mode": PRICE_FEED_MODE,
+            "node_id": self.node_id,
+            "is_leader": self.is_leader,
+            "published": self.published,
+            "dropped": self.dropped,
+            "received": self.received,
+        }
+
+
+price_feed_relay = PriceFeedRelay()
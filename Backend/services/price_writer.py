@@ -0,0 +1,84 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+from bson.decimal128 import Decimal128
+from pymongo import UpdateOne
+
+from models import CryptoPair
+
+# Seconds between flushes of streamed prices into CryptoPair.last_price
+PRICE_WRITE_INTERVAL = float(os.getenv("PRICE_WRITE_INTERVAL", "5"))
+
+
+class PriceWriteBehind:
+    """
+    Coalesces streamed ticker prices per symbol and periodically writes the
+    latest one to CryptoPair as a single unordered bulk_write, so the
+    stored price stays fresh at a bounded write rate.
+    """
+
+    def __init__(self, interval: float = PRICE_WRITE_INTERVAL):
+        self.interval = interval
+        self.pending = {}
+        self.received = 0
+        self.written = 0
+        self.flushes = 0
+        self.last_flush_ms = None
+
+    def record(self, symbol: str, price: str, event_time_ms=None):
+        self.received += 1
+        if event_time_ms:
+            ts = datetime.fromtimestamp(event_time_ms / 1000, tz=timezone.utc)
+        else:
+            ts = datetime.now(timezone.utc)
+        self.pending[symbol] = (price, ts)
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        ops = [
+            UpdateOne(
+                {"symbol": symbol},
+                {"$set": {"last_price": Decimal128(price), "last_price_time": ts}},
+            )
+            for symbol, (price, ts) in batch.items()
+        ]
+        started = asyncio.get_running_loop().time()
+        try:
+            await CryptoPair.get_motor_collection().bulk_write(ops, ordered=False)
+        except Exception:
+            # Retry with the next flush; prices recorded since then are newer
+            self.pending = {**batch, **self.pending}
+            raise
+        self.last_flush_ms = round((asyncio.get_running_loop().time() - started) * 1000, 2)
+        self.written += len(ops)
+        self.flushes += 1
+
+    async def run(self):
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    await self.flush()
+                except Exception as e:
+                    print(f"❌ Price write-behind flush failed: {e}")
+        finally:
+            try:
+                await self.flush()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "received": self.received,
+            "written": self.written,
+            "flushes": self.flushes,
+            "pending": len(self.pending),
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+price_writer = PriceWriteBehind()
@@ -0,0 +1,59 @@
+import asyncio
+import os
+import time
+
+# Binance spot allows 6000 request weight per minute per IP; keep headroom
+# for the trade and balance endpoints that share the same limit.
+BINANCE_WEIGHT_PER_MINUTE = int(os.getenv("BINANCE_WEIGHT_PER_MINUTE", "3000"))
+
+
+class WeightBudget:
+    """
+    Token bucket over Binance request weight. Callers await acquire(weight)
+    before each REST call; the bucket refills continuously at
+    weight_per_minute / 60 per second.
+    """
+
+    def __init__(self, weight_per_minute: int = BINANCE_WEIGHT_PER_MINUTE):
+        self.capacity = weight_per_minute
+        self.tokens = float(weight_per_minute)
+        self.rate = weight_per_minute / 60
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.used = 0
+        self.waited = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, weight: int = 1):
+        async with self.lock:
+            self._refill()
+            if self.tokens < weight:
+                delay = (weight - self.tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self.tokens -= weight
+            self.used += weight
+
+    def observe_used_weight(self, used_weight_1m: int):
+        """
+        Aligns the bucket with Binance's X-MBX-USED-WEIGHT-1M header when a
+        caller has it, e.g. after other processes spent weight.
+        """
+        self._refill()
+        self.tokens = min(self.tokens, max(0.0, self.capacity - used_weight_1m))
+
+    def stats(self) -> dict:
+        return {
+            "weight_per_minute": self.capacity,
+            "available": round(self.tokens, 1),
+            "used": self.used,
+            "waited_seconds": round(self.waited, 2),
+        }
+
+
+weight_budget = WeightBudget()
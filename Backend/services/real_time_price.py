@@ -1,45 +1,90 @@
 import asyncio
-import json
-import websockets
 from models import CryptoPair
-from beanie import PydanticObjectId
+from services.price_broadcaster import broadcaster
+from services.ticker_cache import ticker_table
+from services.stream_manager import StreamManager
+from services.price_writer import price_writer
+from services.feed_recorder import feed_recorder
+from services.candle_builder import candle_builder, LIVE_CANDLES, CANDLE_WRITER_KEY, CANDLE_WRITER_TTL
+from services.redis_lease import RedisLease
 
-clients = []
+# How often the stream set is re-read from CryptoPair
+STREAM_REFRESH_INTERVAL = 60
 
-async def build_stream_url():
+def record_upstream_tick(payload: dict):
+    """
+    Work done once per tick by the process that ingests the upstream feed.
+    """
+    if payload.get("e") == "kline":
+        candle_builder.record_kline(payload["s"], payload["k"])
+    elif "s" in payload and "c" in payload:
+        price_writer.record(payload["s"], payload["c"], payload.get("E"))
+
+def deliver_tick(payload: dict):
+    """
+    Work done once per tick by every API process.
+    """
+    if payload.get("e") == "kline":
+        candle_builder.update_forming(payload["s"], payload["k"])
+        return
+    if "s" in payload and "c" in payload:
+        ticker_table.update(payload["s"], payload["c"])
+    # Non-blocking: each client has its own queue and writer task
+    broadcaster.publish(payload)
+
+def handle_stream_message(data: dict):
+    payload = data.get("data")
+    if not payload:
+        return
+    record_upstream_tick(payload)
+    deliver_tick(payload)
+
+stream_manager = StreamManager(handle_stream_message)
+if feed_recorder is not None:
+    stream_manager.on_raw = feed_recorder.record
+
+async def load_stream_names():
     crypto_pairs = await CryptoPair.find_all().to_list()
-    symbols = [pair.symbol.lower() for pair in crypto_pairs]
-    if not symbols:
-        return None
-    stream_path = "/".join([f"{s}@ticker" for s in symbols])
-    return f"wss://stream.binance.com:9443/stream?streams={stream_path}"
+    streams = {f"{pair.symbol.lower()}@ticker" for pair in crypto_pairs}
+    if LIVE_CANDLES:
+        streams |= {f"{pair.symbol.lower()}@kline_1m" for pair in crypto_pairs}
+    return streams
+
+async def refresh_streams():
+    """
+    Applies the current CryptoPair set to the upstream connections via
+    SUBSCRIBE / UNSUBSCRIBE; existing streams stay connected.
+    """
+    if not stream_manager.started:
+        return
+    streams = await load_stream_names()
+    if not streams:
+        print("⚠️ No symbols found in DB to stream.")
+    await stream_manager.set_streams(streams)
+
+async def run_stream_manager():
+    print("🌐 Binance stream manager starting...")
+    stream_manager.start()
+    try:
+        while True:
+            try:
+                await refresh_streams()
+            except Exception as e:
+                print(f"❌ Binance stream refresh error: {e}")
+            await asyncio.sleep(STREAM_REFRESH_INTERVAL)
+    finally:
+        await stream_manager.stop()
 
 async def binance_stream():
-    while True:
-        try:
-            print("🌐 Binance stream connecting...")
-            url = await build_stream_url()
-            if not url:
-                print("⚠️ No symbols found in DB to stream. Retrying in 30s.")
-                await asyncio.sleep(30)
-                continue
-
-            async with websockets.connect(url) as websocket:
-                print(f" Connected to Binance (stream established).")
-                while True:
-                    message = await websocket.recv()
-                    data = json.loads(message)
-                    payload = data.get("data")
-
-                    if payload:
-                        for client in clients.copy():
-                            try:
-                                await client.send_text(json.dumps(payload))
-                            except Exception as e:
-                                print("❌ Error sending to client:", e)
-                                clients.remove(client)
-
-        except Exception as e:
-            print(f"❌ Binance stream error: {e}")
-            print("🔁 Reconnecting in 10 seconds...")
-            await asyncio.sleep(10)
+    """
+    Ingests the upstream feed. In "redis" feed mode only the elected
+    process connects to Binance and the others receive ticks over pub/sub.
+    """
+    from services.price_feed_relay import PRICE_FEED_MODE, price_feed_relay
+
+    if PRICE_FEED_MODE == "redis":
+        await price_feed_relay.run()
+    else:
+        # Every process ingests the feed; one of them persists the candles
+        candle_builder.lease = RedisLease(CANDLE_WRITER_KEY, CANDLE_WRITER_TTL)
+        await run_stream_manager()
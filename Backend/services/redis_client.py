@@ -1,4 +1,5 @@
 import redis
+import redis.asyncio
 
 redis_client = redis.Redis(
     host='localhost',  # or your Redis server
@@ -6,3 +7,19 @@ redis_client = redis.Redis(
     db=0,
     decode_responses=True
 )
+
+# For pub/sub and other awaited calls made on the event loop
+async_redis_client = redis.asyncio.Redis(
+    host='localhost',
+    port=6379,
+    db=0,
+    decode_responses=True
+)
+
+# Same server without response decoding, for binary values (candle cache)
+async_redis_binary = redis.asyncio.Redis(
+    host='localhost',
+    port=6379,
+    db=0,
+    decode_responses=False
+)
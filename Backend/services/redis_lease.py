@@ -0,0 +1,43 @@
+import os
+import socket
+
+from services.redis_client import async_redis_client
+
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLease:
+    """
+    A lease one process of the cluster holds at a time: SET NX EX to take
+    it, a compare-and-expire script to renew it. Holders must renew more
+    often than `ttl`; if one dies, another takes over once it expires.
+    """
+
+    def __init__(self, key: str, ttl: int):
+        self.key = key
+        self.ttl = ttl
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def acquire(self) -> bool:
+        """
+        Takes the lease if it is free or renews it if held; True if held.
+        """
+        if await async_redis_client.set(self.key, self.node_id, nx=True, ex=self.ttl):
+            return True
+        renewed = await async_redis_client.eval(RENEW_SCRIPT, 1, self.key, self.node_id, self.ttl)
+        return bool(renewed)
+
+    async def release(self):
+        await async_redis_client.eval(RELEASE_SCRIPT, 1, self.key, self.node_id)
@@ -0,0 +1,253 @@
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+
+import websockets
+
+BINANCE_WS_BASE = os.getenv("BINANCE_WS_BASE", "wss://stream.binance.com:9443")
+# Binance allows 1024 streams per connection; stay well below it so a
+# reconnect only has to resubscribe a modest batch.
+MAX_STREAMS_PER_SHARD = int(os.getenv("BINANCE_STREAMS_PER_SHARD", "200"))
+# Binance accepts at most 5 control messages per second per connection
+CONTROL_MESSAGE_INTERVAL = 0.25
+MAX_PARAMS_PER_MESSAGE = 100
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 60
+
+
+class StreamShard:
+    """
+    One upstream combined-stream connection carrying a subset of streams.
+    Streams are added and removed on the live socket with the JSON
+    SUBSCRIBE / UNSUBSCRIBE methods, so changes never force a reconnect.
+    """
+
+    def __init__(self, shard_id: int, base_url: str, on_message, on_raw=None):
+        self.shard_id = shard_id
+        self.base_url = base_url
+        self.on_message = on_message
+        self.on_raw = on_raw
+        self.streams = set()
+        self.subscribed = set()
+        self.websocket = None
+        self.task = None
+        self.lock = asyncio.Lock()
+        self.request_ids = itertools.count(1)
+        self.last_control_at = 0.0
+        self.messages = 0
+        self.reconnects = 0
+        self.last_error = None
+        self.connected_since = None
+        self.last_message_at = None
+        self.rate = 0.0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    async def add(self, streams):
+        self.streams |= set(streams)
+        await self._sync()
+
+    async def remove(self, streams):
+        self.streams -= set(streams)
+        await self._sync()
+
+    async def run(self):
+        backoff = RECONNECT_BACKOFF_MIN
+        while True:
+            try:
+                async with websockets.connect(f"{self.base_url}/stream") as websocket:
+                    self.websocket = websocket
+                    self.subscribed = set()
+                    self.connected_since = time.time()
+                    print(f"🌐 Stream shard {self.shard_id} connected ({len(self.streams)} streams)")
+                    await self._sync()
+                    backoff = RECONNECT_BACKOFF_MIN
+                    async for message in websocket:
+                        self._handle(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Stream shard {self.shard_id} error: {e}")
+            finally:
+                self.websocket = None
+                self.connected_since = None
+
+            self.reconnects += 1
+            delay = backoff + random.uniform(0, backoff / 2)
+            print(f"🔁 Stream shard {self.shard_id} reconnecting in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+
+    def _handle(self, message):
+        data = json.loads(message)
+        if "stream" not in data:
+            # Reply to one of our SUBSCRIBE / UNSUBSCRIBE requests
+            if data.get("error"):
+                print(f"⚠️ Stream shard {self.shard_id} control error: {data['error']}")
+            return
+
+        if self.on_raw is not None:
+            try:
+                self.on_raw(message)
+            except Exception as e:
+                print(f"❌ Stream shard {self.shard_id} raw hook error: {e}")
+
+        now = time.monotonic()
+        self.messages += 1
+        self._window_count += 1
+        self.last_message_at = time.time()
+        elapsed = now - self._window_start
+        if elapsed >= 1:
+            self.rate = self._window_count / elapsed
+            self._window_start = now
+            self._window_count = 0
+
+        try:
+            self.on_message(data)
+        except Exception as e:
+            print(f"❌ Stream shard {self.shard_id} handler error: {e}")
+
+    async def _sync(self):
+        """
+        Brings the live connection in line with the wanted stream set.
+        """
+        async with self.lock:
+            if self.websocket is None:
+                return
+            to_remove = sorted(self.subscribed - self.streams)
+            to_add = sorted(self.streams - self.subscribed)
+            try:
+                await self._send_method("UNSUBSCRIBE", to_remove)
+                self.subscribed -= set(to_remove)
+                await self._send_method("SUBSCRIBE", to_add)
+                self.subscribed |= set(to_add)
+            except Exception as e:
+                # The read loop sees the broken socket too; it reconnects
+                # and resubscribes the full set from scratch.
+                print(f"⚠️ Stream shard {self.shard_id} subscription update failed: {e}")
+
+    async def _send_method(self, method: str, params):
+        for i in range(0, len(params), MAX_PARAMS_PER_MESSAGE):
+            wait = self.last_control_at + CONTROL_MESSAGE_INTERVAL - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self.websocket.send(json.dumps({
+                "method": method,
+                "params": params[i:i + MAX_PARAMS_PER_MESSAGE],
+                "id": next(self.request_ids),
+            }))
+            self.last_control_at = time.monotonic()
+
+    def stats(self) -> dict:
+        idle = time.monotonic() - self._window_start
+        return {
+            "shard": self.shard_id,
+            "connected": self.websocket is not None,
+            "connected_since": self.connected_since,
+            "streams": len(self.streams),
+            "subscribed": len(self.subscribed),
+            "messages": self.messages,
+            "messages_per_sec": round(self.rate if idle < 2 else 0.0, 2),
+            "last_message_at": self.last_message_at,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+        }
+
+
+class StreamManager:
+    """
+    Spreads Binance streams over as many shard connections as needed and
+    applies stream set changes incrementally. `base_url` can point at a
+    local fake server (see tools/fake_binance_stream.py) for testing.
+    """
+
+    def __init__(self, on_message, base_url: str = BINANCE_WS_BASE,
+                 max_streams_per_shard: int = MAX_STREAMS_PER_SHARD):
+        self.on_message = on_message
+        self.on_raw = None
+        self.base_url = base_url
+        self.max_streams_per_shard = max_streams_per_shard
+        self.shards = []
+        self.assignments = {}
+        self.started = False
+
+    def start(self):
+        self.started = True
+        for shard in self.shards:
+            if shard.task is None:
+                shard.start()
+
+    async def stop(self):
+        self.started = False
+        for shard in self.shards:
+            await shard.stop()
+
+    async def set_streams(self, streams):
+        """
+        Makes `streams` the complete set of upstream streams.
+        """
+        streams = set(streams)
+        current = set(self.assignments)
+        await self.remove_streams(current - streams)
+        await self.add_streams(streams - current)
+
+    async def add_streams(self, streams):
+        by_shard = {}
+        for stream in sorted(set(streams) - set(self.assignments)):
+            shard = self._shard_with_room(by_shard)
+            self.assignments[stream] = shard
+            by_shard.setdefault(shard, []).append(stream)
+        for shard, added in by_shard.items():
+            await shard.add(added)
+
+    async def remove_streams(self, streams):
+        by_shard = {}
+        for stream in streams:
+            shard = self.assignments.pop(stream, None)
+            if shard is not None:
+                by_shard.setdefault(shard, []).append(stream)
+        for shard, removed in by_shard.items():
+            await shard.remove(removed)
+
+    def _dispatch(self, data: dict):
+        # Looked up per message so the handler can be swapped at runtime
+        self.on_message(data)
+
+    def _dispatch_raw(self, message):
+        # Raw frame hook, e.g. for the feed recorder
+        if self.on_raw is not None:
+            self.on_raw(message)
+
+    def _shard_with_room(self, pending):
+        for shard in self.shards:
+            if len(shard.streams) + len(pending.get(shard, ())) < self.max_streams_per_shard:
+                return shard
+        shard = StreamShard(len(self.shards), self.base_url, self._dispatch, self._dispatch_raw)
+        self.shards.append(shard)
+        if self.started:
+            shard.start()
+        return shard
+
+    def stats(self) -> dict:
+        shards = [shard.stats() for shard in self.shards]
+        return {
+            "streams": len(self.assignments),
+            "shards": shards,
+            "messages_per_sec": round(sum(s["messages_per_sec"] for s in shards), 2),
+        }
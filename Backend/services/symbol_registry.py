@@ -0,0 +1,184 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, ROUND_DOWN
+from typing import NamedTuple, Optional
+
+from models import CryptoPair
+from services.symbol_search import symbol_search
+
+# How often other processes pick up pairs changed by a symbol sync
+SYMBOL_REGISTRY_REFRESH_INTERVAL = 60
+# A sync stamps every pair of its bulk write with the time it started;
+# stamps older than this are taken to be fully written
+SYMBOL_SYNC_SETTLE_SECONDS = 300
+
+RULE_FIELDS = ("symbol", "base_asset", "status", "min_qty", "step_size", "tick_size", "updated_at")
+
+
+class SymbolRules(NamedTuple):
+    status: str
+    min_qty: Optional[Decimal]
+    step_size: Optional[Decimal]
+    tick_size: Optional[Decimal]
+
+
+def _decimal(value) -> Optional[Decimal]:
+    if value is None:
+        return None
+    value = value.to_decimal() if hasattr(value, "to_decimal") else Decimal(str(value))
+    return value if value > 0 else None
+
+
+def quantize_step(value: Decimal, step: Optional[Decimal]) -> Decimal:
+    """
+    Rounds down to a whole multiple of `step` (Binance LOT_SIZE stepSize /
+    PRICE_FILTER tickSize), keeping the step's number of decimals.
+    """
+    if step is None:
+        return value
+    return ((value / step).to_integral_value(rounding=ROUND_DOWN) * step).quantize(step)
+
+
+class SymbolRegistry:
+    """
+    Trading rules of every CryptoPair, held in memory so orders can be
+    checked against LOT_SIZE and PRICE_FILTER without a DB round trip.
+
+    Loaded in full at startup, then refreshed incrementally: each poll
+    only reads pairs whose updated_at is past the watermark, the newest
+    stamp old enough that the sync which wrote it has finished. Recently
+    changed pairs are therefore read a few times over, unchanged ones
+    never. The symbol sync stamps updated_at whenever it adds or changes
+    a pair; pairs from before that have none and are only read by full
+    loads.
+    A load builds a new table and swaps it in whole, so orders checked
+    meanwhile see the old rules. Every loaded pair document is also
+    passed to `listeners`.
+    """
+
+    def __init__(self):
+        self.rules = {}
+        self.listeners = []
+        self.loaded = False
+        self.watermark = None
+        self.refreshes = 0
+        self.rejected = 0
+
+    def _apply(self, rules: dict, doc: dict, watermark, settled: datetime):
+        """
+        Adds the pair to `rules`; returns the watermark moved up to its
+        updated_at if that is at or before `settled`.
+        """
+        rules[doc["symbol"]] = SymbolRules(
+            doc.get("status", ""),
+            _decimal(doc.get("min_qty")),
+            _decimal(doc.get("step_size")),
+            _decimal(doc.get("tick_size")),
+        )
+        for listener in self.listeners:
+            listener(doc)
+        updated_at = doc.get("updated_at")
+        if updated_at is not None:
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            if updated_at <= settled and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+        return watermark
+
+    async def load(self):
+        cursor = CryptoPair.get_motor_collection().find({}, {"_id": 0, **{f: 1 for f in RULE_FIELDS}})
+        rules, watermark, settled = {}, None, self._settled()
+        async for doc in cursor:
+            watermark = self._apply(rules, doc, watermark, settled)
+        self.rules, self.watermark = rules, watermark
+        self.loaded = True
+        print(f"📘 Symbol registry loaded {len(rules)} pairs")
+
+    async def refresh(self) -> int:
+        """
+        Applies pairs changed since the last load or refresh.
+        """
+        if not self.loaded:
+            await self.load()
+            return len(self.rules)
+        # Without a watermark no stamp has settled yet: read every stamped pair
+        if self.watermark is None:
+            query = {"updated_at": {"$ne": None}}
+        else:
+            query = {"updated_at": {"$gt": self.watermark}}
+        cursor = CryptoPair.get_motor_collection().find(query, {"_id": 0, **{f: 1 for f in RULE_FIELDS}})
+        changed = 0
+        settled = self._settled()
+        async for doc in cursor:
+            self.watermark = self._apply(self.rules, doc, self.watermark, settled)
+            changed += 1
+        self.refreshes += 1
+        return changed
+
+    @staticmethod
+    def _settled() -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=SYMBOL_SYNC_SETTLE_SECONDS)
+
+    async def run(self):
+        while True:
+            try:
+                if self.loaded:
+                    await self.refresh()
+                else:
+                    await self.load()
+            except Exception as e:
+                print(f"⚠️ Symbol registry refresh failed: {e}")
+            await asyncio.sleep(SYMBOL_REGISTRY_REFRESH_INTERVAL)
+
+    def get(self, symbol: str) -> Optional[SymbolRules]:
+        return self.rules.get(symbol)
+
+    def check_order(self, symbol: str, quantity: Decimal, price: Optional[Decimal] = None):
+        """
+        Returns (quantity, price) rounded down to the pair's step and tick
+        sizes, or raises ValueError for orders Binance would reject.
+        Until the registry has loaded, orders pass through unchanged.
+        """
+        if not self.loaded:
+            return quantity, price
+        rules = self.rules.get(symbol)
+        try:
+            if rules is None:
+                raise ValueError(f"Unknown symbol {symbol}")
+            if rules.status != "TRADING":
+                raise ValueError(f"{symbol} is not trading (status {rules.status})")
+            if quantity <= 0:
+                raise ValueError("Quantity must be positive")
+
+            quantity = quantize_step(quantity, rules.step_size)
+            if rules.min_qty is not None and quantity < rules.min_qty:
+                raise ValueError(
+                    f"Quantity below the minimum of {rules.min_qty.normalize()} for {symbol}"
+                    + (f" (step {rules.step_size.normalize()})" if rules.step_size else "")
+                )
+            if quantity <= 0:
+                raise ValueError(f"Quantity is smaller than one step ({rules.step_size.normalize()}) for {symbol}")
+
+            if price is not None:
+                if price <= 0:
+                    raise ValueError("Price must be positive")
+                price = quantize_step(price, rules.tick_size)
+                if price <= 0:
+                    raise ValueError(f"Price is smaller than one tick ({rules.tick_size.normalize()}) for {symbol}")
+        except ValueError:
+            self.rejected += 1
+            raise
+        return quantity, price
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "symbols": len(self.rules),
+            "watermark": self.watermark,
+            "refreshes": self.refreshes,
+            "rejected": self.rejected,
+        }
+
+
+symbol_registry = SymbolRegistry()
+symbol_registry.listeners.append(symbol_search.apply)
@@ -0,0 +1,100 @@
+from bisect import bisect_left
+
+# Longest n-gram indexed; longer queries intersect their n-grams
+NGRAM = 3
+
+
+def _ngrams(text: str, n: int):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class SymbolSearchIndex:
+    """
+    Case-insensitive search over pair symbols and base assets, served from
+    memory instead of unanchored $regex scans of crypto_pairs.
+
+    Prefix matches come from a sorted key list via bisect; substring
+    matches from an index of all 1- to NGRAM-character n-grams, verified
+    against the text for longer queries. Results rank exact matches
+    first, then prefix matches, then other substring matches, each by
+    symbol.
+
+    Pairs are fed in by the symbol registry as it loads and refreshes;
+    the lookup structures are rebuilt lazily on the next query after a
+    change.
+    """
+
+    def __init__(self):
+        self.pairs = {}
+        self.dirty = True
+        self.symbols = []
+        self.keys = []
+        self.grams = {}
+        self.queries = 0
+
+    def apply(self, doc: dict):
+        pair = (doc["symbol"], doc.get("base_asset") or "")
+        if self.pairs.get(doc["symbol"]) != pair:
+            self.pairs[doc["symbol"]] = pair
+            self.dirty = True
+
+    def _rebuild(self):
+        self.symbols = sorted(self.pairs)
+        keys = []
+        grams = {}
+        for i, symbol in enumerate(self.symbols):
+            for text in {t.lower() for t in self.pairs[symbol] if t}:
+                keys.append((text, i))
+                for n in range(1, NGRAM + 1):
+                    for gram in _ngrams(text, n):
+                        grams.setdefault(gram, set()).add(i)
+        keys.sort()
+        self.keys = keys
+        self.grams = grams
+        self.dirty = False
+
+    def _rank(self, query: str):
+        if self.dirty:
+            self._rebuild()
+        exact, prefix = set(), set()
+        at = bisect_left(self.keys, (query, -1))
+        while at < len(self.keys) and self.keys[at][0].startswith(query):
+            text, i = self.keys[at]
+            (exact if text == query else prefix).add(i)
+            at += 1
+        prefix -= exact
+
+        if len(query) <= NGRAM:
+            contains = self.grams.get(query, set())
+        else:
+            grams = sorted((self.grams.get(g, set()) for g in _ngrams(query, NGRAM)), key=len)
+            candidates = set.intersection(*grams) if grams else set()
+            contains = {
+                i for i in candidates
+                if any(query in t.lower() for t in self.pairs[self.symbols[i]])
+            }
+        substring = contains - exact - prefix
+        return sorted(exact) + sorted(prefix) + sorted(substring)
+
+    def search(self, query=None, skip: int = 0, limit=None):
+        """
+        Returns ([(symbol, base_asset), ...], total) for one page. Without
+        a query every pair matches, in symbol order.
+        """
+        self.queries += 1
+        query = (query or "").strip().lower()
+        if query:
+            ranked = self._rank(query)
+        else:
+            if self.dirty:
+                self._rebuild()
+            ranked = range(len(self.symbols))
+        end = None if limit is None else skip + limit
+        page = [self.pairs[self.symbols[i]] for i in ranked[skip:end]]
+        return page, len(ranked)
+
+    def stats(self) -> dict:
+        return {"pairs": len(self.pairs), "ngrams": len(self.grams), "queries": self.queries}
+
+
+symbol_search = SymbolSearchIndex()
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import time
+from decimal import Decimal
+from typing import Optional
+
+from services.redis_client import redis_client, async_redis_client
+from services.exchange_gateway import exchange_gateway
+
+# Prices older than this (seconds) are treated as stale and re-fetched
+TICKER_MAX_AGE = float(os.getenv("TICKER_MAX_AGE", "5"))
+# How often the API process mirrors fresh prices into Redis for workers
+TICKER_REDIS_FLUSH_INTERVAL = 1.0
+TICKER_REDIS_KEY = "ticker:last"
+
+
+class TickerTable:
+    """
+    Last traded price per symbol, fed by the Binance @ticker stream.
+
+    The API process holds the table in memory and mirrors it into a Redis
+    hash ("price|unix_ts" per symbol) so Dramatiq workers can read it too.
+    """
+
+    def __init__(self):
+        self.prices = {}
+        self.dirty = {}
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def update(self, symbol: str, price: str, ts: Optional[float] = None):
+        ts = ts or time.time()
+        self.prices[symbol] = (price, ts)
+        self.dirty[symbol] = f"{price}|{ts}"
+
+    def get(self, symbol: str, max_age: float = TICKER_MAX_AGE) -> Optional[Decimal]:
+        entry = self.prices.get(symbol)
+        if entry and time.time() - entry[1] <= max_age:
+            return Decimal(entry[0])
+        return None
+
+    async def get_from_redis(self, symbol: str, max_age: float = TICKER_MAX_AGE) -> Optional[Decimal]:
+        try:
+            value = await async_redis_client.hget(TICKER_REDIS_KEY, symbol)
+        except Exception as e:
+            print(f"⚠️ Ticker Redis read failed: {e}")
+            return None
+        if not value:
+            return None
+        price, ts = value.split("|")
+        if time.time() - float(ts) > max_age:
+            return None
+        self.prices[symbol] = (price, float(ts))
+        return Decimal(price)
+
+    def flush_to_redis(self):
+        if not self.dirty:
+            return
+        batch, self.dirty = self.dirty, {}
+        redis_client.hset(TICKER_REDIS_KEY, mapping=batch)
+
+    async def run_redis_sync(self):
+        while True:
+            await asyncio.sleep(TICKER_REDIS_FLUSH_INTERVAL)
+            try:
+                await asyncio.to_thread(self.flush_to_redis)
+            except Exception as e:
+                print(f"⚠️ Ticker Redis flush failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self.prices),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+        }
+
+
+ticker_table = TickerTable()
+
+
+async def fetch_ticker_price(symbol: str) -> Decimal:
+    ticker = await exchange_gateway.get_symbol_ticker(symbol=symbol)
+    return Decimal(ticker["price"])
+
+
+async def get_live_price(symbol: str, max_age: float = TICKER_MAX_AGE) -> Decimal:
+    """
+    Returns the last price for a symbol: from memory, then Redis, then a
+    REST ticker call through the exchange gateway if both are missing or stale.
+    """
+    symbol = symbol.upper()
+
+    price = ticker_table.get(symbol, max_age)
+    if price is not None:
+        ticker_table.hits += 1
+        return price
+
+    price = await ticker_table.get_from_redis(symbol, max_age)
+    if price is not None:
+        ticker_table.redis_hits += 1
+        return price
+
+    ticker_table.misses += 1
+    price = await fetch_ticker_price(symbol)
+    ticker_table.update(symbol, str(price))
+    return price
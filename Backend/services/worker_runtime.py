@@ -0,0 +1,43 @@
+"""
+Runtime for Dramatiq worker processes.
+
+Async actors run on the single event loop thread started by Dramatiq's
+AsyncIO middleware, instead of a fresh asyncio.run() loop per message.
+WorkerDatabase connects Motor and runs init_beanie once on that loop at
+worker boot, so every message reuses the same client and connection pool.
+
+Beanie binds collections to the Document classes process-wide, so there
+is one client and one loop per worker process, shared by all Dramatiq
+worker threads. Blocking calls inside actors must go through
+asyncio.to_thread so they do not stall the other messages on the loop;
+Binance calls use the async exchange gateway, whose pooled session lives
+on the same loop and is closed by WorkerExchange at shutdown.
+"""
+from dramatiq.asyncio import get_event_loop_thread
+from dramatiq.middleware import Middleware
+
+
+class WorkerDatabase(Middleware):
+    """
+    Initializes the database on the worker's event loop once, after the
+    AsyncIO middleware has started it.
+    """
+
+    def after_worker_boot(self, broker, worker):
+        from db import init_db_for_worker
+
+        get_event_loop_thread().run_coroutine(init_db_for_worker())
+        print("✅ Worker DB initialized")
+
+
+class WorkerExchange(Middleware):
+    """
+    Closes the exchange gateway sessions on the worker's event loop at
+    shutdown. Runs before AsyncIO stops the loop, since after_* hooks are
+    called in reverse order of registration.
+    """
+
+    def after_worker_shutdown(self, broker, worker):
+        from services.exchange_gateway import close_gateways
+
+        get_event_loop_thread().run_coroutine(close_gateways())
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from services.exchange_gateway import ExchangeGateway, ExchangeError
+from tools.fake_binance_rest import make_app
+
+
+async def serve(app: web.Application) -> TestServer:
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_signed_requests_are_accepted_by_the_stand_in():
+    async def main():
+        server = await serve(make_app("key", "secret", latency=0, fill_after=0))
+        gateway = ExchangeGateway(str(server.make_url("")), "key", "secret")
+        try:
+            account = await gateway.get_account()
+            # Floats go out in plain notation; the stand-in rejects 1e-05
+            order = await gateway.create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=0.00001)
+            status = await gateway.get_order(symbol="BTCUSDT", orderId=order["orderId"])
+        finally:
+            await gateway.close()
+            await server.close()
+        return account, order, status
+
+    account, order, status = run(main())
+    assert account["canTrade"]
+    assert order["origQty"] == "0.00001"
+    assert status["status"] == "FILLED"
+
+
+def test_bad_signature_raises_exchange_error():
+    async def main():
+        server = await serve(make_app("key", "secret", latency=0, fill_after=0))
+        gateway = ExchangeGateway(str(server.make_url("")), "key", "wrong")
+        try:
+            with pytest.raises(ExchangeError) as error:
+                await gateway.get_account()
+        finally:
+            await gateway.close()
+            await server.close()
+        return error.value
+
+    error = run(main())
+    assert error.status == 400
+    assert error.code == -1022
+    assert str(error).startswith("APIError(code=-1022)")
+
+
+def flaky_app(failures: int):
+    """
+    Answers 503 to the first `failures` requests, then succeeds.
+    """
+    hits = {"count": 0}
+
+    async def handler(request):
+        hits["count"] += 1
+        if hits["count"] <= failures:
+            return web.json_response({"code": -1001, "msg": "Internal error"}, status=503)
+        return web.json_response({"orderId": 1} if request.method == "POST" else {})
+
+    app = web.Application()
+    app.router.add_get("/api/v3/ping", handler)
+    app.router.add_post("/api/v3/order", handler)
+    return app, hits
+
+
+def test_get_is_retried_once_on_5xx():
+    async def main():
+        app, hits = flaky_app(failures=1)
+        server = await serve(app)
+        gateway = ExchangeGateway(str(server.make_url("")))
+        try:
+            result = await gateway.ping()
+        finally:
+            await gateway.close()
+            await server.close()
+        return result, hits["count"], gateway.stats()
+
+    result, hits, stats = run(main())
+    assert result == {}
+    assert hits == 2
+    assert stats["retries"] == 1
+    assert stats["errors"] == 0
+
+
+def test_get_gives_up_after_one_retry():
+    async def main():
+        app, hits = flaky_app(failures=5)
+        server = await serve(app)
+        gateway = ExchangeGateway(str(server.make_url("")))
+        try:
+            with pytest.raises(ExchangeError) as error:
+                await gateway.ping()
+        finally:
+            await gateway.close()
+            await server.close()
+        return error.value, hits["count"]
+
+    error, hits = run(main())
+    assert error.status == 503
+    assert hits == 2
+
+
+def test_post_is_never_retried():
+    async def main():
+        app, hits = flaky_app(failures=1)
+        server = await serve(app)
+        gateway = ExchangeGateway(str(server.make_url("")), "key", "secret")
+        try:
+            with pytest.raises(ExchangeError) as error:
+                await gateway.create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=1)
+        finally:
+            await gateway.close()
+            await server.close()
+        return error.value, hits["count"], gateway.stats()
+
+    error, hits, stats = run(main())
+    assert error.status == 503
+    assert hits == 1
+    assert stats["retries"] == 0
@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import pytest
+import websockets
+
+import services.stream_manager as stream_manager
+from services.stream_manager import StreamManager
+from tools.fake_binance_stream import make_handler
+
+STREAMS = [f"coin{i}usdt@ticker" for i in range(5)]
+
+
+@pytest.fixture(autouse=True)
+def fast_control(monkeypatch):
+    monkeypatch.setattr(stream_manager, "CONTROL_MESSAGE_INTERVAL", 0)
+    monkeypatch.setattr(stream_manager, "RECONNECT_BACKOFF_MIN", 0.05)
+
+
+class FakeStream:
+    """
+    The fake combined-stream server, remembering its open connections so
+    a test can drop them.
+    """
+
+    def __init__(self, rate: float = 50):
+        self.handler = make_handler(rate)
+        self.connections = set()
+        self.server = None
+
+    async def _handle(self, websocket):
+        self.connections.add(websocket)
+        try:
+            await self.handler(websocket)
+        finally:
+            self.connections.discard(websocket)
+
+    async def start(self) -> str:
+        self.server = await websockets.serve(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+    async def drop_connections(self):
+        for websocket in list(self.connections):
+            await websocket.close()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.02)
+
+
+def test_streams_are_sharded_and_changed_live():
+    async def main():
+        fake = FakeStream()
+        seen = set()
+        manager = StreamManager(lambda data: seen.add(data["stream"]), await fake.start(), max_streams_per_shard=2)
+        manager.start()
+        try:
+            await manager.set_streams(STREAMS)
+            assert len(manager.shards) == 3
+            assert sorted(len(shard.streams) for shard in manager.shards) == [1, 2, 2]
+            await wait_for(lambda: seen == set(STREAMS))
+
+            await manager.set_streams(STREAMS[:3])
+            # Frames already on the wire may still arrive for a moment
+            await asyncio.sleep(0.2)
+            seen.clear()
+            await wait_for(lambda: seen == set(STREAMS[:3]))
+            await asyncio.sleep(0.2)
+            assert seen == set(STREAMS[:3])
+            assert all(shard.stats()["connected"] for shard in manager.shards)
+            assert all(shard.reconnects == 0 for shard in manager.shards)
+        finally:
+            await manager.stop()
+            await fake.stop()
+
+    asyncio.run(main())
+
+
+def test_shards_reconnect_and_resubscribe():
+    async def main():
+        fake = FakeStream()
+        seen = set()
+        manager = StreamManager(lambda data: seen.add(data["stream"]), await fake.start(), max_streams_per_shard=2)
+        manager.start()
+        try:
+            await manager.set_streams(STREAMS)
+            await wait_for(lambda: seen == set(STREAMS))
+
+            await fake.drop_connections()
+            await wait_for(lambda: all(shard.reconnects >= 1 for shard in manager.shards))
+            seen.clear()
+            await wait_for(lambda: seen == set(STREAMS))
+            stats = manager.stats()
+            assert stats["streams"] == len(STREAMS)
+            assert all(shard["subscribed"] == shard["streams"] for shard in stats["shards"])
+        finally:
+            await manager.stop()
+            await fake.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,152 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from models import CryptoPair
+import services.symbol_registry as symbol_registry
+from services.symbol_registry import SymbolRegistry
+
+
+def pair(symbol: str, updated_at=None, **fields) -> dict:
+    doc = {
+        "symbol": symbol,
+        "base_asset": symbol[:-4],
+        "quote_asset": "USDT",
+        "status": "TRADING",
+        "min_qty": "0.001",
+        "step_size": "0.001",
+        "tick_size": "0.01",
+        **fields,
+    }
+    if updated_at is not None:
+        doc["updated_at"] = updated_at
+    return doc
+
+
+async def collection(docs):
+    await init_beanie(database=AsyncMongoMockClient()["registry"], document_models=[CryptoPair])
+    pairs = CryptoPair.get_motor_collection()
+    await pairs.insert_many(docs)
+    return pairs
+
+
+def counting_loads(registry: SymbolRegistry) -> list:
+    loads = []
+    load = registry.load
+
+    async def counted():
+        loads.append(1)
+        await load()
+
+    registry.load = counted
+    return loads
+
+
+def test_refresh_without_watermark_does_not_reload():
+    async def main():
+        # Pairs stored before the sync stamped updated_at
+        pairs = await collection([pair(f"C{i}USDT") for i in range(20)])
+        registry = SymbolRegistry()
+        await registry.load()
+        loads = counting_loads(registry)
+        assert registry.watermark is None
+        assert await registry.refresh() == 0
+        assert await registry.refresh() == 0
+        assert loads == []
+
+        stamped = datetime.now(timezone.utc)
+        await pairs.update_one({"symbol": "C3USDT"}, {"$set": {"status": "BREAK", "updated_at": stamped}})
+        assert await registry.refresh() == 1
+        assert registry.get("C3USDT").status == "BREAK"
+        assert loads == []
+
+    asyncio.run(main())
+
+
+def test_recent_stamps_are_read_until_they_settle(monkeypatch):
+    async def main():
+        # Mongo keeps milliseconds
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        pairs = await collection([pair(f"C{i}USDT", updated_at=now - timedelta(days=1)) for i in range(20)])
+        registry = SymbolRegistry()
+        await registry.load()
+        settled = registry.watermark
+
+        # The sync that wrote this may still be writing other pairs stamped alike
+        await pairs.update_one({"symbol": "C7USDT"}, {"$set": {"status": "BREAK", "updated_at": now}})
+        assert await registry.refresh() == 1
+        assert await registry.refresh() == 1
+        assert registry.watermark == settled
+
+        monkeypatch.setattr(symbol_registry, "SYMBOL_SYNC_SETTLE_SECONDS", 0)
+        assert await registry.refresh() == 1
+        assert registry.watermark == now
+        assert await registry.refresh() == 0
+
+    asyncio.run(main())
+
+
+def test_refresh_only_reads_pairs_after_the_watermark():
+    async def main():
+        old = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        pairs = await collection([pair(f"C{i}USDT", updated_at=old) for i in range(20)])
+        registry = SymbolRegistry()
+        await registry.load()
+        assert registry.watermark == old
+
+        newer = old + timedelta(days=1)
+        await pairs.update_one({"symbol": "C5USDT"}, {"$set": {"step_size": "0.1", "updated_at": newer}})
+        await pairs.insert_one(pair("NEWUSDT", updated_at=newer))
+        loads = counting_loads(registry)
+        assert await registry.refresh() == 2
+        assert registry.watermark == newer
+        assert registry.get("C5USDT").step_size == Decimal("0.1")
+        assert registry.get("NEWUSDT") is not None
+        assert await registry.refresh() == 0
+        assert loads == []
+
+    asyncio.run(main())
+
+
+def test_reload_swaps_rules_in_whole():
+    async def main():
+        await collection([pair(f"C{i}USDT") for i in range(200)])
+        registry = SymbolRegistry()
+        await registry.load()
+        sizes = []
+
+        async def watch():
+            for _ in range(100):
+                sizes.append(len(registry.rules))
+                await asyncio.sleep(0)
+
+        watcher = asyncio.create_task(watch())
+        await registry.load()
+        await watcher
+        assert min(sizes) == 200
+
+    asyncio.run(main())
+
+
+def test_check_order_quantizes_and_rejects():
+    async def main():
+        await collection([pair("BTCUSDT"), pair("HALTUSDT", status="HALT")])
+        registry = SymbolRegistry()
+        await registry.load()
+        return registry
+
+    registry = asyncio.run(main())
+    assert registry.check_order("BTCUSDT", Decimal("1.23456"), Decimal("100.129")) == (
+        Decimal("1.234"), Decimal("100.12")
+    )
+    with pytest.raises(ValueError, match="below the minimum"):
+        registry.check_order("BTCUSDT", Decimal("0.0005"))
+    with pytest.raises(ValueError, match="not trading"):
+        registry.check_order("HALTUSDT", Decimal("1"))
+    with pytest.raises(ValueError, match="Unknown symbol"):
+        registry.check_order("NOPEUSDT", Decimal("1"))
+    assert registry.rejected == 3
@@ -0,0 +1,60 @@
+from services.symbol_search import SymbolSearchIndex
+
+
+def index(*pairs) -> SymbolSearchIndex:
+    search = SymbolSearchIndex()
+    for symbol, base in pairs:
+        search.apply({"symbol": symbol, "base_asset": base})
+    return search
+
+
+PAIRS = [
+    ("BTCUSDT", "BTC"),
+    ("BTCBUSD", "BTC"),
+    ("WBTCUSDT", "WBTC"),
+    ("ETHBTC", "ETH"),
+    ("ETHUSDT", "ETH"),
+    ("DOGEUSDT", "DOGE"),
+]
+
+
+def symbols(result):
+    page, _ = result
+    return [symbol for symbol, _ in page]
+
+
+def test_exact_then_prefix_then_substring():
+    search = index(*PAIRS)
+    # BTC is the exact base asset of two pairs; ETHBTC and WBTCUSDT only contain it
+    assert symbols(search.search("btc")) == ["BTCBUSD", "BTCUSDT", "ETHBTC", "WBTCUSDT"]
+
+
+def test_case_and_whitespace_are_ignored():
+    search = index(*PAIRS)
+    assert symbols(search.search("  DoGe ")) == ["DOGEUSDT"]
+
+
+def test_queries_longer_than_the_ngram_size_are_verified():
+    search = index(*PAIRS)
+    assert symbols(search.search("thusd")) == ["ETHUSDT"]
+    assert symbols(search.search("usdtx")) == []
+
+
+def test_pages_and_totals():
+    search = index(*PAIRS)
+    page, total = search.search("usdt", skip=1, limit=2)
+    assert total == 4
+    assert [symbol for symbol, _ in page] == ["DOGEUSDT", "ETHUSDT"]
+    page, total = search.search(None, skip=4)
+    assert total == len(PAIRS)
+    assert [symbol for symbol, _ in page] == ["ETHUSDT", "WBTCUSDT"]
+
+
+def test_updates_are_picked_up_on_the_next_query():
+    search = index(*PAIRS)
+    assert symbols(search.search("pepe")) == []
+    search.apply({"symbol": "PEPEUSDT", "base_asset": "PEPE"})
+    search.apply({"symbol": "DOGEUSDT", "base_asset": "XDG"})
+    assert symbols(search.search("pepe")) == ["PEPEUSDT"]
+    assert symbols(search.search("xdg")) == ["DOGEUSDT"]
+    assert search.search()[1] == len(PAIRS) + 1
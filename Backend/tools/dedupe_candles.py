@@ -0,0 +1,99 @@
+"""
+Prepares an existing database for idempotent candle ingestion.
+
+Older syncs used insert_many and could store the same bar several times,
+which would stop the unique (symbol, interval, candle_time) index from
+being built at startup. This tool keeps the most recently written copy of
+each bar, tags legacy sync trackers with interval "1d", drops the old
+non-unique index and creates the unique ones.
+
+Run from the Backend directory before deploying:
+    python -m tools.dedupe_candles --dry-run
+    python -m tools.dedupe_candles
+"""
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DeleteMany
+
+from db import mongo_uri, DATABASE_NAME
+from services.candle_store import LEGACY_TRACKER_INTERVAL
+
+LEGACY_INDEX = "symbol_1_interval_1_candle_time_-1"
+UNIQUE_INDEX = "symbol_interval_candle_time_unique"
+DELETE_BATCH = 1000
+
+
+async def dedupe_candles(db, dry_run: bool):
+    pipeline = [
+        {"$group": {
+            "_id": {"symbol": "$symbol", "interval": "$interval", "candle_time": "$candle_time"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    groups = 0
+    extra_ids = []
+    async for group in db.candles.aggregate(pipeline, allowDiskUse=True):
+        groups += 1
+        # ObjectIds grow with insert time; keep the newest copy
+        extra_ids.extend(sorted(group["ids"])[:-1])
+
+    print(f"Found {groups} duplicated bars, {len(extra_ids)} extra documents")
+    if dry_run or not extra_ids:
+        return
+    ops = [
+        DeleteMany({"_id": {"$in": extra_ids[i:i + DELETE_BATCH]}})
+        for i in range(0, len(extra_ids), DELETE_BATCH)
+    ]
+    result = await db.candles.bulk_write(ops, ordered=False)
+    print(f"Deleted {result.deleted_count} duplicate candles")
+
+
+async def migrate_trackers(db, dry_run: bool):
+    legacy = {"interval": {"$exists": False}}
+    count = await db.candle_sync_tracker.count_documents(legacy)
+    print(f"Found {count} trackers without an interval")
+    if not dry_run and count:
+        await db.candle_sync_tracker.update_many(legacy, {"$set": {"interval": LEGACY_TRACKER_INTERVAL}})
+
+
+async def rebuild_indexes(db, dry_run: bool):
+    indexes = await db.candles.index_information()
+    if dry_run:
+        print(f"Would drop {LEGACY_INDEX}: {LEGACY_INDEX in indexes}")
+        return
+    if LEGACY_INDEX in indexes:
+        await db.candles.drop_index(LEGACY_INDEX)
+        print(f"Dropped {LEGACY_INDEX}")
+    await db.candles.create_index(
+        [("symbol", ASCENDING), ("interval", ASCENDING), ("candle_time", ASCENDING)],
+        unique=True,
+        name=UNIQUE_INDEX,
+    )
+    await db.candle_sync_tracker.create_index(
+        [("symbol", ASCENDING), ("interval", ASCENDING)],
+        unique=True,
+    )
+    print("Unique indexes in place")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(mongo_uri)
+    db = client[DATABASE_NAME]
+    try:
+        await migrate_trackers(db, args.dry_run)
+        await dedupe_candles(db, args.dry_run)
+        await rebuild_indexes(db, args.dry_run)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
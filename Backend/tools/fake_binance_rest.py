@@ -0,0 +1,205 @@
+"""
+Minimal stand-in for the Binance spot REST API (testnet or live).
+
+It serves the endpoints the exchange gateway uses: ping, account, order
+(POST and GET), klines, ticker/price and exchangeInfo. Signed requests are
+checked like Binance checks them: X-MBX-APIKEY header, HMAC-SHA256 of the
+query string, and timestamp within recvWindow. MARKET orders fill at once
+at a synthetic price; LIMIT orders stay NEW until queried --fill-after
+seconds later. Every response carries an X-MBX-USED-WEIGHT-1M header.
+Point the backend at it with:
+    BINANCE_API_URL=http://127.0.0.1:8765
+    BINANCE_MARKET_DATA_URL=http://127.0.0.1:8765
+    BINANCE_API_KEY=test BINANCE_SECRET_KEY=test
+
+Run from the Backend directory:
+    python -m tools.fake_binance_rest --port 8765 --latency 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import itertools
+import time
+from urllib.parse import parse_qsl
+
+from aiohttp import web
+
+SYMBOLS = {"BTCUSDT": ("BTC", 50000.0), "ETHUSDT": ("ETH", 3000.0), "BNBUSDT": ("BNB", 600.0)}
+INTERVAL_MS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000, "4h": 14_400_000, "1d": 86_400_000}
+
+
+def price_at(symbol: str, ms: int) -> float:
+    # Deterministic, so klines fetched twice are identical
+    base = SYMBOLS[symbol][1]
+    return round(base * (1 + 0.01 * ((ms // 60_000) % 97 - 48) / 48), 2)
+
+
+def error(status: int, code: int, msg: str):
+    return web.json_response({"code": code, "msg": msg}, status=status)
+
+
+def make_app(api_key: str, secret: str, latency: float, fill_after: float) -> web.Application:
+    orders = {}
+    order_ids = itertools.count(1)
+    weight = {"minute": 0, "used": 0}
+
+    @web.middleware
+    async def pacing(request, handler):
+        if latency:
+            await asyncio.sleep(latency)
+        minute = int(time.time() // 60)
+        if minute != weight["minute"]:
+            weight.update(minute=minute, used=0)
+        weight["used"] += 1
+        resp = await handler(request)
+        resp.headers["X-MBX-USED-WEIGHT-1M"] = str(weight["used"])
+        return resp
+
+    def signed_params(request, body: str = ""):
+        """
+        Returns the request parameters, or an error response.
+        """
+        if request.headers.get("X-MBX-APIKEY") != api_key:
+            return error(401, -2015, "Invalid API-key, IP, or permissions for action.")
+        query = request.query_string
+        if body:
+            query = f"{query}&{body}" if query else body
+        payload, _, signature = query.rpartition("&signature=")
+        expected = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(signature, expected):
+            return error(400, -1022, "Signature for this request is not valid.")
+        params = dict(parse_qsl(payload))
+        recv_window = int(params.get("recvWindow", 5000))
+        if abs(time.time() * 1000 - int(params.get("timestamp", 0))) > recv_window:
+            return error(400, -1021, "Timestamp for this request is outside of the recvWindow.")
+        return params
+
+    def order_view(order: dict) -> dict:
+        if order["status"] == "NEW" and time.time() - order["created"] >= fill_after:
+            order["status"] = "FILLED"
+            order["executedQty"] = order["origQty"]
+            order["fills"] = [{"price": order["price"], "qty": order["origQty"], "commission": "0",
+                               "commissionAsset": "USDT"}]
+        return {k: v for k, v in order.items() if k != "created"}
+
+    async def ping(request):
+        return web.json_response({})
+
+    async def account(request):
+        params = signed_params(request)
+        if isinstance(params, web.Response):
+            return params
+        balances = [{"asset": "USDT", "free": "10000.00000000", "locked": "0.00000000"}]
+        balances += [{"asset": base, "free": "1.00000000", "locked": "0.00000000"} for base, _ in SYMBOLS.values()]
+        return web.json_response({"canTrade": True, "accountType": "SPOT", "balances": balances})
+
+    async def create_order(request):
+        params = signed_params(request, await request.text())
+        if isinstance(params, web.Response):
+            return params
+        symbol = params.get("symbol")
+        if symbol not in SYMBOLS:
+            return error(400, -1121, "Invalid symbol.")
+        if "quantity" not in params or "e" in params["quantity"].lower():
+            return error(400, -1100, "Illegal characters found in parameter 'quantity'.")
+        order_type = params.get("type")
+        if order_type == "LIMIT" and ("price" not in params or params.get("timeInForce") != "GTC"):
+            return error(400, -1102, "Mandatory parameter 'price' or 'timeInForce' was not sent.")
+        now = time.time()
+        price = params["price"] if order_type == "LIMIT" else f"{price_at(symbol, int(now * 1000)):.8f}"
+        order = {
+            "symbol": symbol,
+            "orderId": next(order_ids),
+            "transactTime": int(now * 1000),
+            "price": price,
+            "origQty": params["quantity"],
+            "executedQty": "0.00000000",
+            "status": "NEW",
+            "type": order_type,
+            "side": params.get("side"),
+            "fills": [],
+            "created": now,
+        }
+        if order_type == "MARKET":
+            order["created"] = now - fill_after
+        orders[(symbol, order["orderId"])] = order
+        return web.json_response(order_view(order))
+
+    async def get_order(request):
+        params = signed_params(request)
+        if isinstance(params, web.Response):
+            return params
+        order = orders.get((params.get("symbol"), int(params.get("orderId", 0))))
+        if order is None:
+            return error(400, -2013, "Order does not exist.")
+        return web.json_response(order_view(order))
+
+    async def klines(request):
+        symbol = request.query.get("symbol")
+        step = INTERVAL_MS.get(request.query.get("interval"))
+        if symbol not in SYMBOLS or step is None:
+            return error(400, -1121, "Invalid symbol.")
+        now_ms = int(time.time() * 1000)
+        limit = min(int(request.query.get("limit", 500)), 1000)
+        end = min(int(request.query.get("endTime", now_ms)), now_ms)
+        start = int(request.query.get("startTime", end - step * (limit - 1)))
+        rows = []
+        open_ms = -(-start // step) * step
+        while open_ms <= end and len(rows) < limit:
+            o, c = price_at(symbol, open_ms), price_at(symbol, open_ms + step - 1)
+            rows.append([open_ms, f"{o:.8f}", f"{max(o, c) * 1.001:.8f}", f"{min(o, c) * 0.999:.8f}",
+                         f"{c:.8f}", "12.50000000", open_ms + step - 1, "0", 10, "0", "0", "0"])
+            open_ms += step
+        return web.json_response(rows)
+
+    async def ticker_price(request):
+        now_ms = int(time.time() * 1000)
+        symbol = request.query.get("symbol")
+        if symbol is None:
+            return web.json_response([{"symbol": s, "price": f"{price_at(s, now_ms):.8f}"} for s in SYMBOLS])
+        if symbol not in SYMBOLS:
+            return error(400, -1121, "Invalid symbol.")
+        return web.json_response({"symbol": symbol, "price": f"{price_at(symbol, now_ms):.8f}"})
+
+    async def exchange_info(request):
+        return web.json_response({"symbols": [
+            {
+                "symbol": symbol,
+                "baseAsset": base,
+                "quoteAsset": "USDT",
+                "status": "TRADING",
+                "isSpotTradingAllowed": True,
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "tickSize": "0.01000000"},
+                    {"filterType": "LOT_SIZE", "minQty": "0.00001000", "stepSize": "0.00001000"},
+                ],
+            }
+            for symbol, (base, _) in SYMBOLS.items()
+        ]})
+
+    app = web.Application(middlewares=[pacing])
+    app.router.add_get("/api/v3/ping", ping)
+    app.router.add_get("/api/v3/account", account)
+    app.router.add_post("/api/v3/order", create_order)
+    app.router.add_get("/api/v3/order", get_order)
+    app.router.add_get("/api/v3/klines", klines)
+    app.router.add_get("/api/v3/ticker/price", ticker_price)
+    app.router.add_get("/api/v3/exchangeInfo", exchange_info)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--api-key", default="test")
+    parser.add_argument("--secret", default="test")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--fill-after", type=float, default=5.0, help="seconds until LIMIT orders fill")
+    args = parser.parse_args()
+    web.run_app(make_app(args.api_key, args.secret, args.latency, args.fill_after), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
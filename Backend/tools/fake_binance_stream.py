@@ -0,0 +1,85 @@
+"""
+Minimal stand-in for the Binance combined-stream endpoint.
+
+It accepts connections on /stream, handles SUBSCRIBE / UNSUBSCRIBE /
+LIST_SUBSCRIPTIONS like Binance does, and emits synthetic @ticker frames
+for every subscribed stream. Point the stream manager at it with
+BINANCE_WS_BASE=ws://127.0.0.1:9443.
+
+Run from the Backend directory:
+    python -m tools.fake_binance_stream --port 9443 --rate 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import websockets
+
+
+def ticker_payload(stream: str) -> dict:
+    symbol = stream.split("@")[0].upper()
+    price = 100 + random.random()
+    return {
+        "stream": stream,
+        "data": {
+            "e": "24hrTicker",
+            "E": int(time.time() * 1000),
+            "s": symbol,
+            "c": f"{price:.4f}",
+            "P": f"{random.uniform(-5, 5):.3f}",
+        },
+    }
+
+
+async def pump(websocket, streams: set, rate: float):
+    while True:
+        for stream in list(streams):
+            await websocket.send(json.dumps(ticker_payload(stream)))
+        await asyncio.sleep(1 / rate)
+
+
+def make_handler(rate: float):
+    async def handler(websocket, path=None):
+        streams = set()
+        pump_task = asyncio.create_task(pump(websocket, streams, rate))
+        try:
+            async for message in websocket:
+                request = json.loads(message)
+                method = request.get("method")
+                params = request.get("params") or []
+                if method == "SUBSCRIBE":
+                    streams.update(params)
+                    result = None
+                elif method == "UNSUBSCRIBE":
+                    streams.difference_update(params)
+                    result = None
+                elif method == "LIST_SUBSCRIPTIONS":
+                    result = sorted(streams)
+                else:
+                    await websocket.send(json.dumps({"error": {"code": 2, "msg": "Invalid request"}, "id": request.get("id")}))
+                    continue
+                await websocket.send(json.dumps({"result": result, "id": request.get("id")}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            pump_task.cancel()
+
+    return handler
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9443)
+    parser.add_argument("--rate", type=float, default=1.0, help="frames per second per stream")
+    args = parser.parse_args()
+
+    async with websockets.serve(make_handler(args.rate), args.host, args.port):
+        print(f"Fake Binance stream listening on ws://{args.host}:{args.port}/stream")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
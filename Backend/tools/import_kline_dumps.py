@@ -0,0 +1,200 @@
+"""
+Loads the monthly (or daily) kline archives Binance publishes at
+data.binance.vision into the candle store, instead of spending weeks of
+REST request weight on years of 1m history.
+
+Files are named like BTCUSDT-1m-2023-01.zip; the symbol and interval are
+taken from the name. Each zip is streamed member by member and parsed in
+chunks, never decompressed to disk, and every chunk goes through the same
+bulk upsert path as the REST sync. Files are spread over a pool of worker
+processes. Bars are upserted by (symbol, interval, open time), so
+importing a file again only reports its bars as unchanged. With
+CANDLE_ARCHIVE=1, bars at or before the end of a series' disk archive are
+merged into the archive instead, since reads serve that range from disk.
+When a .CHECKSUM file sits next to a zip, the zip is verified first.
+
+Run from the Backend directory:
+    python -m tools.import_kline_dumps ~/dumps/BTCUSDT-1m-2024-*.zip
+    python -m tools.import_kline_dumps ~/dumps --workers 4 --chunk 50000
+    python -m tools.import_kline_dumps ~/dumps --dry-run
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import io
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DUMP_NAME = re.compile(r"^(?P<symbol>[A-Z0-9]+)-(?P<interval>\d+[smhdwM])-\d{4}-\d{2}(-\d{2})?\.zip$")
+# Open times after this are in microseconds (spot dumps from 2025 on)
+MAX_MS_TIMESTAMP = 10 ** 14
+
+_loop = None
+
+
+def _init_worker(dry_run: bool):
+    # One event loop and DB client per worker process, reused for every file
+    global _loop
+    _loop = asyncio.new_event_loop()
+    if not dry_run:
+        from db import init_db_for_worker
+        _loop.run_until_complete(init_db_for_worker())
+
+
+def find_dumps(paths):
+    files = []
+    for path in paths:
+        path = os.path.expanduser(path)
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "**", "*.zip"), recursive=True)))
+        else:
+            files.extend(sorted(glob.glob(path)))
+    return files
+
+
+def verify_checksum(path: str):
+    """
+    True/False against the published SHA-256, or None without a .CHECKSUM.
+    """
+    checksum_path = path + ".CHECKSUM"
+    if not os.path.exists(checksum_path):
+        return None
+    with open(checksum_path) as f:
+        expected = f.read().split()[0].lower()
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest() == expected
+
+
+def iter_chunks(path: str, chunk_size: int):
+    """
+    Yields lists of Binance kline rows ([open_ms, o, h, l, c, v]) from
+    every CSV member of the zip. Prices stay strings so they are stored
+    exactly, as with the REST sync.
+    """
+    with zipfile.ZipFile(path) as archive:
+        for member in archive.namelist():
+            if not member.endswith(".csv"):
+                continue
+            with archive.open(member) as raw:
+                chunk = []
+                for line in io.TextIOWrapper(raw, encoding="ascii"):
+                    fields = line.split(",", 6)
+                    if not fields[0].isdigit():
+                        continue  # header row, present in newer dumps
+                    open_time = int(fields[0])
+                    if open_time > MAX_MS_TIMESTAMP:
+                        open_time //= 1000
+                    chunk.append([open_time, *fields[1:6]])
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+                if chunk:
+                    yield chunk
+
+
+async def _import_file(path: str, symbol: str, interval: str, chunk_size: int, dry_run: bool) -> dict:
+    from services.candle_archive import candle_archive, CANDLE_ARCHIVE
+    from services.candle_series import CandleSeries, INTERVAL_MS
+    from services.candle_store import upsert_candles, invalidate_cached
+
+    result = {"path": path, "symbol": symbol, "interval": interval,
+              "rows": 0, "inserted": 0, "updated": 0, "unchanged": 0, "archived": 0}
+    # Hot copies of archived bars would be hidden behind the archive
+    manifest = candle_archive.manifest(symbol, interval) if CANDLE_ARCHIVE and interval in INTERVAL_MS else None
+    archived_until = manifest["last"] if manifest else None
+    cold = {}
+    for chunk in iter_chunks(path, chunk_size):
+        result["rows"] += len(chunk)
+        if dry_run:
+            continue
+        if archived_until is not None:
+            cold.update((k[0], k) for k in chunk if k[0] <= archived_until)
+            chunk = [k for k in chunk if k[0] > archived_until]
+        if chunk:
+            for key, count in (await upsert_candles(symbol, interval, chunk)).items():
+                result[key] += count
+    if cold:
+        # One merge per file: every archive write rewrites the whole series
+        rows = [cold[t] for t in sorted(cold)]
+        series = CandleSeries(symbol, interval, [k[0] for k in rows],
+                              *([float(k[i]) for k in rows] for i in range(1, 6)))
+        result["archived"] = await asyncio.to_thread(candle_archive.append, series)
+        await invalidate_cached(series)
+    return result
+
+
+def import_file(path: str, symbol: str, interval: str, chunk_size: int, dry_run: bool) -> dict:
+    started = time.monotonic()
+    checksum = verify_checksum(path)
+    if checksum is False:
+        return {"path": path, "error": "checksum mismatch"}
+    result = _loop.run_until_complete(_import_file(path, symbol, interval, chunk_size, dry_run))
+    result["checksum"] = checksum
+    result["seconds"] = time.monotonic() - started
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="zip files, globs or directories of zips")
+    parser.add_argument("--symbol", help="override the symbol taken from file names")
+    parser.add_argument("--interval", help="override the interval taken from file names")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="files imported in parallel")
+    parser.add_argument("--chunk", type=int, default=20000, help="rows per bulk write")
+    parser.add_argument("--dry-run", action="store_true", help="parse only, write nothing")
+    args = parser.parse_args()
+
+    jobs = []
+    for path in find_dumps(args.paths):
+        match = DUMP_NAME.match(os.path.basename(path))
+        symbol = args.symbol or (match and match["symbol"])
+        interval = args.interval or (match and match["interval"])
+        if not symbol or not interval:
+            print(f"  ⚠️ Skipping {path}: cannot tell symbol and interval from the name")
+            continue
+        jobs.append((path, symbol.upper(), interval))
+    print(f"Importing {len(jobs)} files with {args.workers} workers" + (" (dry run)" if args.dry_run else ""))
+
+    started = time.monotonic()
+    totals = {"rows": 0, "inserted": 0, "updated": 0, "unchanged": 0, "archived": 0}
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(args.dry_run,)) as pool:
+        futures = {
+            pool.submit(import_file, path, symbol, interval, args.chunk, args.dry_run): path
+            for path, symbol, interval in jobs
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"path": futures[future], "error": str(e)}
+            name = os.path.basename(result["path"])
+            if "error" in result:
+                failed += 1
+                print(f"  ❌ [{done}/{len(jobs)}] {name}: {result['error']}")
+                continue
+            for key in totals:
+                totals[key] += result[key]
+            elapsed = time.monotonic() - started
+            print(f"  [{done}/{len(jobs)}] {name}: {result['rows']} rows in {result['seconds']:.1f}s "
+                  f"(+{result['inserted']} new, {result['updated']} updated, {result['unchanged']} unchanged"
+                  + (f", {result['archived']} into the archive" if result["archived"] else "") + ")"
+                  f"  total {totals['rows'] / elapsed:.0f} rows/s")
+
+    elapsed = time.monotonic() - started
+    print(f"Done: {totals['rows']} rows from {len(jobs) - failed} files in {elapsed:.1f}s "
+          f"({totals['rows'] / elapsed if elapsed else 0:.0f} rows/s), {totals['inserted']} new, "
+          f"{totals['updated']} updated, {totals['unchanged']} unchanged"
+          + (f", {totals['archived']} into the archive" if totals["archived"] else "")
+          + (f", {failed} failed" if failed else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Copies Candle documents into CandleBucket documents so the API can be
+switched to CANDLE_STORAGE=buckets. Safe to re-run: bars are upserted
+into their buckets, so an interrupted migration can simply be restarted.
+The Candle documents are left in place until you drop them yourself.
+
+Run from the Backend directory:
+    python -m tools.migrate_candle_buckets
+    python -m tools.migrate_candle_buckets --symbol BTCUSDT --interval 1m --verify
+"""
+import argparse
+import asyncio
+import time
+
+from db import init_db_for_worker
+from models import Candle, CandleBucket
+from services.candle_series import FIELDS, to_ms
+from services.candle_store import BucketCandleStore, BAR_KEYS
+
+
+async def list_series(symbol=None, interval=None):
+    match = {}
+    if symbol:
+        match["symbol"] = symbol
+    if interval:
+        match["interval"] = interval
+    pipeline = [
+        {"$match": match},
+        {"$group": {"_id": {"symbol": "$symbol", "interval": "$interval"}, "bars": {"$sum": 1}}},
+        {"$sort": {"_id.symbol": 1, "_id.interval": 1}},
+    ]
+    return [
+        (row["_id"]["symbol"], row["_id"]["interval"], row["bars"])
+        async for row in Candle.get_motor_collection().aggregate(pipeline, allowDiskUse=True)
+    ]
+
+
+async def migrate_series(store, symbol: str, interval: str, batch_size: int) -> int:
+    cursor = Candle.get_motor_collection().find(
+        {"symbol": symbol, "interval": interval},
+        {"_id": 0, "candle_time": 1, **{f: 1 for f in FIELDS}},
+    ).sort("candle_time", 1).batch_size(batch_size)
+
+    migrated = 0
+    batch = []
+    async for row in cursor:
+        bar = {"t": to_ms(row["candle_time"])}
+        for field, key in zip(FIELDS, BAR_KEYS):
+            bar[key] = str(row[field])
+        batch.append((symbol, interval, bar))
+        if len(batch) >= batch_size:
+            await store.upsert_bars(batch)
+            migrated += len(batch)
+            batch = []
+    if batch:
+        await store.upsert_bars(batch)
+        migrated += len(batch)
+    return migrated
+
+
+async def bucket_bar_count(symbol: str, interval: str) -> int:
+    pipeline = [
+        {"$match": {"symbol": symbol, "interval": interval}},
+        {"$group": {"_id": None, "bars": {"$sum": "$bars"}}},
+    ]
+    rows = await CandleBucket.get_motor_collection().aggregate(pipeline).to_list(None)
+    return rows[0]["bars"] if rows else 0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbol", help="only migrate this symbol")
+    parser.add_argument("--interval", help="only migrate this interval")
+    parser.add_argument("--batch", type=int, default=10000, help="bars per bucket write")
+    parser.add_argument("--verify", action="store_true", help="compare bar counts after each series")
+    args = parser.parse_args()
+
+    await init_db_for_worker()
+    store = BucketCandleStore()
+    series = await list_series(args.symbol and args.symbol.upper(), args.interval)
+    total = sum(bars for _, _, bars in series)
+    print(f"Migrating {total} candles in {len(series)} series")
+
+    started = time.monotonic()
+    done = 0
+    mismatched = 0
+    for symbol, interval, bars in series:
+        done += await migrate_series(store, symbol, interval, args.batch)
+        elapsed = time.monotonic() - started
+        print(f"  {symbol} {interval}: {bars} bars ({done}/{total}, {done / elapsed:.0f} bars/s)")
+        if args.verify:
+            stored = await bucket_bar_count(symbol, interval)
+            if stored != bars:
+                mismatched += 1
+                print(f"  ⚠️ {symbol} {interval}: {bars} documents but {stored} bars in buckets")
+
+    elapsed = time.monotonic() - started
+    print(f"Done: {done} bars in {elapsed:.1f}s" + (f", {mismatched} series mismatched" if args.verify else ""))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
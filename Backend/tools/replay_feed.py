@@ -0,0 +1,113 @@
+"""
+Serves a feed log written by services/feed_recorder.py as a local
+Binance-style combined-stream endpoint.
+
+Each connection replays the log from the start, filtered to the streams it
+SUBSCRIBEs to, at the recorded pace (--speed 1), N times faster
+(--speed N) or as fast as possible (--speed max). Point the API at it with
+BINANCE_WS_BASE=ws://127.0.0.1:9443.
+
+Run from the Backend directory:
+    python -m tools.replay_feed feed.log --speed 10 --loop
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import websockets
+
+from services.feed_recorder import read_feed
+
+STREAM_PREFIX = '{"stream":"'
+
+
+def stream_name(frame: str) -> str:
+    # Binance frames start with {"stream":"<name>", so skip a full parse
+    if frame.startswith(STREAM_PREFIX):
+        end = frame.find('"', len(STREAM_PREFIX))
+        return frame[len(STREAM_PREFIX):end]
+    return json.loads(frame).get("stream", "")
+
+
+def load_feed(path: str):
+    records = [(ts_ns, stream_name(frame), frame) for ts_ns, frame in read_feed(path)]
+    print(f"Loaded {len(records)} frames from {path}")
+    return records
+
+
+async def replay(websocket, records, streams: set, speed, loop: bool, warmup: float):
+    # Subscriptions arrive in paced batches; let them land before frame 0
+    await asyncio.sleep(warmup)
+    while True:
+        started = time.monotonic()
+        base_ns = records[0][0] if records else 0
+        sent = 0
+        for ts_ns, stream, frame in records:
+            if stream not in streams:
+                continue
+            if speed:
+                due = started + (ts_ns - base_ns) / 1e9 / speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif sent % 1000 == 0:
+                # Yield now and then so control messages are still read
+                await asyncio.sleep(0)
+            await websocket.send(frame)
+            sent += 1
+        elapsed = time.monotonic() - started
+        print(f"Replayed {sent} frames in {elapsed:.2f}s ({sent / elapsed if elapsed else 0:.0f} frames/s)")
+        if not loop:
+            return
+        if not sent:
+            # Nothing recorded for these streams: a pass never awaits, so
+            # wait for the client to subscribe to something that is
+            await asyncio.sleep(1)
+
+
+def make_handler(records, speed, loop: bool, warmup: float = 1.0):
+    async def handler(websocket, path=None):
+        streams = set()
+        replay_task = None
+        try:
+            async for message in websocket:
+                request = json.loads(message)
+                method = request.get("method")
+                params = request.get("params") or []
+                if method == "SUBSCRIBE":
+                    streams.update(params)
+                elif method == "UNSUBSCRIBE":
+                    streams.difference_update(params)
+                await websocket.send(json.dumps({"result": None, "id": request.get("id")}))
+                if replay_task is None and streams:
+                    replay_task = asyncio.create_task(replay(websocket, records, streams, speed, loop, warmup))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            if replay_task:
+                replay_task.cancel()
+
+    return handler
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="feed log written with FEED_RECORD_PATH")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9443)
+    parser.add_argument("--speed", default="1", help="1 = recorded pace, N = N times faster, max = no delays")
+    parser.add_argument("--loop", action="store_true", help="start over when the log ends")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds between first SUBSCRIBE and replay")
+    args = parser.parse_args()
+
+    speed = 0 if args.speed == "max" else float(args.speed)
+    records = load_feed(args.path)
+
+    async with websockets.serve(make_handler(records, speed, args.loop, args.warmup), args.host, args.port):
+        print(f"Replaying on ws://{args.host}:{args.port}/stream at speed {args.speed}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
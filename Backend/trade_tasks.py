@@ -15,25 +15,24 @@ from services.portfolio import (
     update_portfolio_on_sell,
     get_user_by_id
 )
-from binance_config import client
+from services.exchange_gateway import exchange_gateway
+from services.ticker_cache import get_live_price
+from trading_config import TRADING_FEE_RATE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Trading fee constant
-TRADING_FEE_RATE = Decimal("0.001")
-
 
 @dramatiq.actor
-def process_trade_task(order_data: dict):
+async def process_trade_task(order_data: dict):
     """
     Dramatiq actor entrypoint.
-    Runs asyncio worker in sync context.
+    Runs on the worker's long-lived event loop (see services/worker_runtime.py).
     """
     try:
         logger.info(f"🎯 Received trade task: {order_data}")
-        asyncio.run(worker_main(order_data))
+        await worker_main(order_data)
     except Exception as e:
         logger.exception(f"❌ Dramatiq trade task top-level error: {e}")
 
@@ -54,9 +53,8 @@ async def worker_main(order_data: dict):
     logger.info(f"⚡ Starting worker_main for user {user_id}, {side} {quantity} {symbol} ({order_type})")
 
     try:
-        # ✅ Initialize DB
+        # ✅ No-op once the worker has booted
         await init_db_for_worker()
-        logger.info("✅ DB initialized")
 
         # ✅ Fetch User
         current_user = await get_user_by_id(user_id)
@@ -102,8 +100,7 @@ async def place_order_on_binance(symbol, side, order_type, quantity, price):
         if not price:
             raise ValueError("LIMIT orders require a price")
 
-        ticker = client.get_symbol_ticker(symbol=symbol)
-        live_price = Decimal(ticker["price"])
+        live_price = await get_live_price(symbol)
 
         is_fillable = (live_price <= price if side == "BUY" else live_price >= price)
 
@@ -115,7 +112,7 @@ async def place_order_on_binance(symbol, side, order_type, quantity, price):
                 "type": "MARKET",
                 "quantity": float(quantity)
             }
-            resp = client.create_order(**order_payload)
+            resp = await exchange_gateway.create_order(**order_payload)
             return resp, Decimal(resp["fills"][0]["price"])
         else:
             logger.info("⌛ LIMIT condition not met - placing LIMIT GTC")
@@ -127,7 +124,7 @@ async def place_order_on_binance(symbol, side, order_type, quantity, price):
                 "quantity": float(quantity),
                 "price": float(price)
             }
-            resp = client.create_order(**order_payload)
+            resp = await exchange_gateway.create_order(**order_payload)
             return resp, price
 
     else:
@@ -138,7 +135,7 @@ async def place_order_on_binance(symbol, side, order_type, quantity, price):
             "type": "MARKET",
             "quantity": float(quantity)
         }
-        resp = client.create_order(**order_payload)
+        resp = await exchange_gateway.create_order(**order_payload)
         return resp, Decimal(resp["fills"][0]["price"])
 
 
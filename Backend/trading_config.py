@@ -0,0 +1,4 @@
+from decimal import Decimal
+
+# Fee charged on the notional of every trade; also used by backtests
+TRADING_FEE_RATE = Decimal("0.001")